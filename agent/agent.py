@@ -17,14 +17,30 @@ Lesson progression:
 10: AoT (Atom of Thought)
 """
 
+import json
+import os
+import threading
 from typing import Any
 
-from shared.llm import LocalLLM
-from shared.utils import extract_json_from_text
+from shared.llm import LocalLLM, Deadline
 from agent.state import AgentState
 from agent.memory import Memory
-from agent.tools import get_tool_schema, execute_tool
+from agent.semantic_memory import SemanticMemory
+from agent.sqlite_memory import SQLiteMemory
+from agent.eviction import EvictionPolicy
+from agent.compaction import MemoryCompactor
+from agent.memory_writer import MemoryWriteError, MemoryWriter
+from agent.session import Session
+from agent.kv_pager import KVCachePager
+from agent.response_cache import SemanticCache
+from agent.router import FastPathRouter
+from agent.telemetry import Telemetry
+from agent.tools import TOOLS, ToolRegistry, ToolResult
 from agent.planner import create_plan, create_atomic_action, create_aot_graph, execute_graph
+from agent.contracts import (
+    Contract, Violation, generate_validated, fields_contract, decision_contract,
+    TOOL_CALL, TOOL_CALLS, AGENT_ACTION, MEMORY_REPLY,
+)
 
 
 class Agent:
@@ -35,15 +51,20 @@ class Agent:
     new methods and capabilities as lessons progress.
     """
     
-    def __init__(self, model_path: str):
+    def __init__(self, model_path: str | None = None, llm: LocalLLM | None = None):
         """
         Initialize the agent.
         
         Args:
             model_path: Path to the GGUF model file
+            llm: An already loaded model to use instead (lets many agents
+                share one model; calls into it must not overlap)
         """
+        if llm is None and model_path is None:
+            raise ValueError("Agent needs a model_path or an llm")
+        
         # Lesson 01: Basic LLM interaction
-        self.llm = LocalLLM(model_path)
+        self.llm = llm if llm is not None else LocalLLM(model_path)
         
         # Lesson 02: System prompt for consistent behavior
         self.system_prompt = (
@@ -52,11 +73,317 @@ class Agent:
             "You are honest about what you know and don't know."
         )
         
+        # Lesson 05: Tools the model may call
+        self.tools: ToolRegistry = TOOLS
+        # Answers unambiguous tool requests without the model (None = always ask it)
+        self.router: FastPathRouter | None = FastPathRouter(self.tools)
+        
         # Lesson 06: Agent state
         self.state = AgentState()
+        # Where run_loop / execute_aot_plan save progress (None = don't)
+        self.checkpoint_path: str | None = None
+        # The user session whose state and memory are in use (None = agent's own)
+        self.session: Session | None = None
         
         # Lesson 07: Memory system
         self.memory = Memory()
+        # Held by every change to memory from another thread (deferred
+        # writes, background compaction) and by the agent's own memory use
+        self.memory_lock = threading.RLock()
+        # Rendered memory blocks for prompts, reused until memory changes
+        self._memory_blocks: dict[tuple, tuple[str, list[str]]] = {}   # key -> (block, items)
+        self._memory_blocks_owner: tuple[Memory, int] | None = None      # (memory, version) they belong to
+        
+        # Why the last structured call failed (None if it succeeded)
+        self.last_violation: Violation | None = None
+        
+        # Opt-in background writer for facts the model asks to remember
+        self.memory_writer: MemoryWriter | None = None
+        
+        # Opt-in cache for answers to near-duplicate questions
+        self.response_cache: SemanticCache | None = None
+        
+        # Opt-in per-session model state, kept while sessions are idle
+        self.kv_pager: KVCachePager | None = None
+        
+        # Opt-in log of tool calls (None = don't log)
+        self.telemetry: Telemetry | None = None
+    
+    def enable_response_cache(
+        self,
+        threshold: float = 0.92,
+        max_entries: int = 1024,
+        ttl_seconds: float | None = 3600.0
+    ) -> SemanticCache:
+        """
+        Answer rephrasings of earlier questions from a semantic cache.
+        
+        Applies to generate_with_role() and run(). Questions are embedded
+        with the local model in embedding mode.
+        
+        Args:
+            threshold: Minimum cosine similarity to reuse an answer
+            max_entries: Maximum cached answers
+            ttl_seconds: How long an answer may be reused (None = forever)
+        
+        Returns:
+            The cache (inspect get_stats() for hit rates)
+        """
+        self.response_cache = SemanticCache(
+            self.llm.embed,
+            threshold=threshold,
+            max_entries=max_entries,
+            ttl_seconds=ttl_seconds
+        )
+        return self.response_cache
+    
+    def enable_semantic_memory(self, batch_size: int = 32, approximate: bool = False) -> SemanticMemory:
+        """
+        Switch memory search from shared words to shared meaning.
+        
+        Existing memories are carried over and embedded in one batch, and
+        the memory's settings (normalize, limits) are kept.
+        
+        Args:
+            batch_size: How many new memories to embed per embedding call
+            approximate: Use an approximate index (for very large memories)
+        
+        Returns:
+            The new memory
+        
+        Raises:
+            MemoryWriteError: If deferred writes lost facts queued for the
+                old memory (the switch has still happened)
+        """
+        memory = SemanticMemory(
+            self.llm.embed,
+            normalize=self.memory.normalize,
+            batch_size=batch_size,
+            approximate=approximate,
+            low_water=self.memory.low_water
+        )
+        return self._switch_memory(memory)
+    
+    def _switch_memory(self, memory: Memory) -> Memory:
+        """
+        Move the current memory's items and limits to a new, empty memory
+        and use it from now on.
+        
+        The eviction policy object moves too; it starts over tracking the
+        items under their new ids (TTLPolicy counts from now).
+        
+        With deferred memory writes enabled, the writer first writes what
+        is queued (so it is copied too) and stops, and a new writer (same
+        batch size) is started for the new memory.
+        
+        Raises:
+            MemoryWriteError: If some queued facts could not be written to
+                the old memory (the switch has still happened)
+        """
+        outgoing = self.memory_writer
+        lost = None
+        if outgoing is not None:
+            try:
+                outgoing.close()
+            except MemoryWriteError as e:
+                lost = e
+        
+        with self.memory_lock:
+            old = self.memory
+            memory.add_many(old.view())
+            if old.policy is not None:
+                old.policy.clear()
+                memory.set_limits(old.max_items, old.policy)
+            self.memory = memory
+            if outgoing is not None:
+                self.memory_writer = MemoryWriter(memory, batch_size=outgoing.batch_size, lock=self.memory_lock)
+        
+        if lost is not None:
+            raise lost
+        return memory
+    
+    def use_session(self, session: Session):
+        """
+        Work on behalf of a session: its state, memory and conversation.
+        
+        Swapping sessions is just swapping references; the model stays
+        loaded and is shared by every session. With KV paging enabled the
+        outgoing session's evaluated context is saved and the incoming
+        one's is loaded back.
+        
+        With deferred memory writes enabled, the writer finishes the
+        outgoing session's queued facts and a new writer (same batch size)
+        is started for the incoming session's memory.
+        
+        Args:
+            session: Session from a SessionStore
+        
+        Raises:
+            MemoryWriteError: If some of the outgoing session's facts could
+                not be written (the switch has still happened)
+        """
+        outgoing = None
+        if self.memory_writer is not None and session.memory is not self.memory:
+            outgoing = self.memory_writer
+            self.memory_writer = MemoryWriter(session.memory, batch_size=outgoing.batch_size, lock=self.memory_lock)
+        if self.kv_pager is not None and session is not self.session:
+            # No other thread's generation may land between the save and the restore
+            with self.llm.lock:
+                if self.session is not None:
+                    self.kv_pager.save(self.session.session_id)
+                self.kv_pager.restore(session.session_id)
+        self.session = session
+        self.state = session.state
+        self.memory = session.memory
+        if outgoing is not None:
+            outgoing.close()
+    
+    def enable_kv_paging(self, spill_dir: str, max_ram_bytes: int = 512 * 1024 * 1024) -> KVCachePager:
+        """
+        Keep each session's evaluated context while other sessions run.
+        
+        use_session() then saves the model state of the session going idle
+        and restores the one coming back, so a returning session's prompt
+        only evaluates what's new instead of its whole context.
+        
+        Args:
+            spill_dir: Directory for states that don't fit in RAM
+            max_ram_bytes: Most bytes of state kept in RAM for hot sessions
+        
+        Returns:
+            The pager (inspect get_stats() for RAM / disk hits)
+        """
+        self.kv_pager = KVCachePager(self.llm, spill_dir, max_ram_bytes=max_ram_bytes)
+        return self.kv_pager
+    
+    def enable_telemetry(self, telemetry: Telemetry) -> Telemetry:
+        """
+        Log every tool call the agent runs to telemetry, cache hits and
+        errors included.
+        
+        The agent's tool registry is shared (TOOLS by default), so calls
+        other agents make through it are logged too.
+        
+        Args:
+            telemetry: Where to log
+        
+        Returns:
+            The telemetry (inspect get_metrics() for tool success and cache rates)
+        """
+        self.telemetry = telemetry
+        self.tools.telemetry = telemetry
+        return telemetry
+    
+    def enable_checkpoints(self, path: str):
+        """
+        Save agent state after every completed step of run_loop and
+        execute_aot_plan, so resume_loop / resume_aot_plan can continue
+        after a crash.
+        
+        Starting a new run deletes the previous run's checkpoint, so a
+        crash before the new run's first step can't resume the old task.
+        
+        Args:
+            path: Checkpoint file path
+        """
+        self.checkpoint_path = path
+    
+    def _checkpoint(self):
+        """Save state if checkpointing is enabled."""
+        if self.checkpoint_path is not None:
+            self.state.save(self.checkpoint_path)
+    
+    def _clear_checkpoint(self):
+        """Delete the checkpoint, so a new run can't be confused with the previous one."""
+        if self.checkpoint_path is not None and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+    
+    def _restore(self, mode: str) -> bool:
+        """Load the checkpoint if there is one for this kind of run."""
+        if self.checkpoint_path is None or not os.path.exists(self.checkpoint_path):
+            return False
+        state = AgentState.load(self.checkpoint_path)
+        if state.mode != mode:
+            return False
+        self.state = state
+        return True
+    
+    def enable_deferred_memory_writes(self, batch_size: int = 32) -> MemoryWriter:
+        """
+        Save facts from run_with_memory in the background, in batches.
+        
+        Switching the memory backend later (enable_semantic_memory,
+        enable_persistent_memory) moves the queued facts and the writer to
+        the new memory.
+        
+        Args:
+            batch_size: Most facts written per add_many call
+        
+        Returns:
+            The writer (call close() on shutdown to write what's queued)
+        
+        Raises:
+            MemoryWriteError: If the previous writer lost facts (the new
+                writer is in place regardless)
+        """
+        outgoing = self.memory_writer
+        self.memory_writer = MemoryWriter(self.memory, batch_size=batch_size, lock=self.memory_lock)
+        if outgoing is not None:
+            outgoing.close()
+        return self.memory_writer
+    
+    def enable_memory_limits(
+        self,
+        max_items: int = 1000,
+        policy: EvictionPolicy | None = None
+    ) -> MemoryCompactor:
+        """
+        Keep memory bounded for very long sessions.
+        
+        Memory is capped at max_items (evicting by policy, LRU by default).
+        The returned compactor merges related facts with the LLM so fewer
+        need evicting: call compact_once() between turns, or start() it in
+        the background. It shares memory_lock with the agent's own memory
+        reads and writes; its model calls take the model's own lock (see
+        LocalLLM), like every other model call, and are made without
+        holding memory_lock.
+        
+        Args:
+            max_items: Memory capacity
+            policy: Eviction policy (see agent/eviction.py)
+        
+        Returns:
+            Compactor for this agent's memory
+        """
+        with self.memory_lock:
+            self.memory.set_limits(max_items, policy)
+        return MemoryCompactor(self.memory, self.llm, lock=self.memory_lock)
+    
+    def enable_persistent_memory(self, path: str, namespace: str = "default") -> SQLiteMemory:
+        """
+        Keep memory in a SQLite file so it survives restarts.
+        
+        Memories already in RAM are written to the file, and the memory's
+        settings (normalize, limits) are kept.
+        
+        Args:
+            path: SQLite file path
+            namespace: Whose memories to use (many users can share one file)
+        
+        Returns:
+            The new memory
+        
+        Raises:
+            MemoryWriteError: If deferred writes lost facts queued for the
+                old memory (the switch has still happened)
+        """
+        memory = SQLiteMemory(
+            path,
+            namespace=namespace,
+            normalize=self.memory.normalize,
+            low_water=self.memory.low_water
+        )
+        return self._switch_memory(memory)
     
     # ============================================================
     # LESSON 01: Basic LLM Chat
@@ -92,6 +419,14 @@ class Agent:
         Returns:
             The model's response with role-based behavior
         """
+        if self.response_cache is not None:
+            cached = self.response_cache.lookup(user_input, scope="role")
+            if cached is not None:
+                return cached
+        return self._generate_with_role(user_input)
+    
+    def _generate_with_role(self, user_input: str) -> str:
+        """Generate a role answer without looking in the response cache (stores it, though)."""
         # Use a format that doesn't confuse the model
         prompt = f"""{self.system_prompt}
 
@@ -102,13 +437,23 @@ Assistant:"""
         # Clean up any potential tag artifacts
         response = response.replace('<SYSTEM>', '').replace('</SYSTEM>', '')
         response = response.replace('<USER>', '').replace('</USER>', '')
-        return response.strip()
+        response = response.strip()
+        
+        if self.response_cache is not None and response:
+            self.response_cache.store(user_input, response, scope="role")
+        
+        return response
     
     # ============================================================
     # LESSON 03: Structured Outputs
     # ============================================================
     
-    def generate_structured(self, user_input: str, schema: str) -> dict | None:
+    def generate_structured(
+        self,
+        user_input: str,
+        schema: str,
+        contract: Contract | None = None
+    ) -> dict | None:
         """
         Generate structured JSON output with validation and retries.
         
@@ -117,9 +462,12 @@ Assistant:"""
         Args:
             user_input: The user's question or request
             schema: JSON schema description
+            contract: Optional contract the output must satisfy
+                (default: any JSON object)
             
         Returns:
             Parsed JSON dictionary or None if all retries failed
+            (self.last_violation says why)
         """
         prompt = f"""{self.system_prompt}
 
@@ -136,14 +484,10 @@ User request: {user_input}
 Response (JSON only):"""
         
         # Try up to 3 times
-        for attempt in range(3):
-            response = self.llm.generate(prompt, temperature=0.0)
-            parsed = extract_json_from_text(response)
-            
-            if parsed is not None:
-                return parsed
-        
-        return None
+        parsed, self.last_violation = generate_validated(
+            self.llm, prompt, contract or fields_contract([])
+        )
+        return parsed
     
     # ============================================================
     # LESSON 04: Decision Making
@@ -183,16 +527,10 @@ User request: {user_input}
 
 Response (JSON only):"""
         
-        for attempt in range(3):
-            response = self.llm.generate(prompt, temperature=0.0)
-            parsed = extract_json_from_text(response)
-            
-            if parsed and "decision" in parsed:
-                decision = parsed["decision"]
-                if decision in choices:
-                    return decision
-        
-        return None
+        parsed, self.last_violation = generate_validated(
+            self.llm, prompt, decision_contract(choices)
+        )
+        return parsed["decision"] if parsed else None
     
     # ============================================================
     # LESSON 05: Tools
@@ -204,18 +542,26 @@ Response (JSON only):"""
         
         Lesson 05 version.
         
+        Unambiguous requests ("What is 42 * 7?") are answered by the
+        fast-path router without calling the model; see self.router.
+        
         Args:
             user_input: The user's request
             
         Returns:
             Tool call specification or None if request failed
         """
+        if self.router is not None:
+            routed = self.router.route(user_input)
+            if routed is not None:
+                self.last_violation = None
+                return routed
+        
         prompt = f"""{self.system_prompt}
 
-You are a tool-calling assistant. When asked a math question, you must respond with ONLY valid JSON.
+You are a tool-calling assistant. When a request needs a tool, you must respond with ONLY valid JSON.
 
-Available tool: calculator
-- Parameters: a (number), b (number), operation ("add", "subtract", "multiply", or "divide")
+{self.tools.prompt_fragment()}
 
 CRITICAL INSTRUCTIONS:
 1. Respond with ONLY valid JSON
@@ -229,14 +575,8 @@ User request: {user_input}
 
 Response (JSON only):"""
         
-        for attempt in range(3):
-            response = self.llm.generate(prompt, temperature=0.0)
-            parsed = extract_json_from_text(response)
-            
-            if parsed and "tool" in parsed and "arguments" in parsed:
-                return parsed
-        
-        return None
+        parsed, self.last_violation = generate_validated(self.llm, prompt, TOOL_CALL)
+        return parsed
     
     def execute_tool_call(self, tool_call: dict) -> Any:
         """
@@ -248,31 +588,128 @@ Response (JSON only):"""
         Returns:
             Result of the tool execution
         """
-        return execute_tool(tool_call["tool"], tool_call["arguments"])
+        return self.tools.execute(tool_call["tool"], tool_call["arguments"])
+    
+    def _tool_calls_prompt(self, user_input: str) -> str:
+        """Prompt asking for every tool call a request needs, as one list."""
+        return f"""{self.system_prompt}
+
+You are a tool-calling assistant. List EVERY tool call needed to answer the request, and respond with ONLY valid JSON.
+
+{self.tools.prompt_fragment()}
+
+CRITICAL INSTRUCTIONS:
+1. Respond with ONLY valid JSON
+2. No explanations, no markdown, no other text
+3. Start your response with {{ and end with }}
+4. Calls run at the same time, so no call may need another call's result
+5. Use an empty list if no tool is needed
+
+Example format:
+{{"calls": [{{"tool": "calculator", "arguments": {{"a": 42, "b": 7, "operation": "multiply"}}}}, {{"tool": "calculator", "arguments": {{"a": 10, "b": 5, "operation": "add"}}}}]}}
+
+User request: {user_input}
+
+Response (JSON only):"""
+
+    def request_tool_calls(self, user_input: str) -> list[dict] | None:
+        """
+        Have the model request all the tool calls it needs in one turn.
+        
+        Args:
+            user_input: The user's request
+        
+        Returns:
+            List of tool calls (may be empty), or None if the request failed
+        """
+        parsed, self.last_violation = generate_validated(
+            self.llm, self._tool_calls_prompt(user_input), TOOL_CALLS
+        )
+        return parsed["calls"] if parsed else None
+    
+    def execute_tool_calls(self, tool_calls: list[dict]) -> list[ToolResult]:
+        """
+        Execute several tool calls concurrently.
+        
+        Args:
+            tool_calls: Dictionaries with "tool" and "arguments"
+        
+        Returns:
+            One ToolResult per call, in the same order
+        """
+        return self.tools.execute_many(tool_calls)
+    
+    def run_with_tools(self, user_input: str) -> str | None:
+        """
+        Answer a request that may need several tools, in two model calls.
+        
+        The model lists every call it needs, they run concurrently, and a
+        single follow-up prompt gives it all the results - instead of one
+        full round trip per tool.
+        
+        Args:
+            user_input: The user's request
+        
+        Returns:
+            The answer, or None if the model didn't produce valid tool calls
+        """
+        calls = self.request_tool_calls(user_input)
+        if calls is None:
+            return None
+        if not calls:
+            return self.generate_with_role(user_input)
+        
+        results = self.execute_tool_calls(calls)
+        lines = []
+        for i, outcome in enumerate(results, start=1):
+            shown = json.dumps(outcome.result, default=str) if outcome.ok else f"error: {outcome.error}"
+            lines.append(f"{i}. {outcome.tool}({json.dumps(outcome.arguments)}) -> {shown}")
+        results_block = "\n".join(lines)
+        
+        # The request prompt and the model's calls stay an unchanged prefix,
+        # so only the results and the question below are evaluated
+        follow_up = f"""{self._tool_calls_prompt(user_input)} {json.dumps({"calls": calls})}
+
+Tool results:
+{results_block}
+
+Using these results, answer the user's request in plain text (no JSON).
+
+Answer:"""
+        self.state.increment_step()
+        return self.llm.generate(follow_up)
     
     # ============================================================
     # LESSON 06: Agent Loop
     # ============================================================
     
-    def agent_step(self, user_input: str) -> dict | None:
+    def agent_step(
+        self,
+        user_input: str,
+        deadline: Deadline | None = None,
+        transcript: str = ""
+    ) -> dict | None:
         """
         Execute one step of the agent loop: observe → decide → act.
         
         Lesson 06 version.
         
+        The prompt only ever grows at the end: a fixed header, the task,
+        then the transcript of earlier steps. Each step's prompt starts
+        with the previous step's prompt, so llama.cpp reuses its KV cache
+        for all of it and only evaluates the newest step.
+        
         Args:
             user_input: User's input or system observation
+            deadline: Optional deadline; generation is aborted when it expires
+            transcript: Earlier steps of this run, from _transcript_line()
             
         Returns:
-            Action decision or None if step failed
+            Action decision or None if step failed (or timed out)
         """
-        state_dict = self.state.to_dict()
-        
         prompt = f"""{self.system_prompt}
 
-You are an agent. You must decide the next action and respond with ONLY valid JSON.
-
-Current state: steps={state_dict.get('steps', 0)}, done={state_dict.get('done', False)}
+You are an agent working on a task step by step. You must decide the next action and respond with ONLY valid JSON.
 
 Available actions: analyze, research, summarize, answer, done
 
@@ -280,77 +717,145 @@ CRITICAL INSTRUCTIONS:
 1. Respond with ONLY valid JSON
 2. No explanations, no markdown, no other text
 3. Start your response with {{ and end with }}
+4. Build on the steps already taken; don't repeat them
+5. Choose "done" when the task is complete
 
 Required JSON format:
 {{"action": "action_name", "reason": "explanation"}}
 
-User input: {user_input}
+Task: {user_input}
 
-Response (JSON only):"""
+Steps so far:
+{transcript}Step {self.state.steps + 1}:"""
         
-        for attempt in range(3):
-            response = self.llm.generate(prompt, temperature=0.0)
-            parsed = extract_json_from_text(response)
-            
-            if parsed and "action" in parsed:
-                if "reason" not in parsed:
-                    parsed["reason"] = f"Taking action: {parsed['action']}"
-                self.state.increment_step()
-                return parsed
+        parsed, self.last_violation = generate_validated(
+            self.llm, prompt, AGENT_ACTION, deadline=deadline, cue=f"Step {self.state.steps + 1}:"
+        )
+        
+        if parsed:
+            if "reason" not in parsed:
+                parsed["reason"] = f"Taking action: {parsed['action']}"
+            self.state.increment_step()
+            return parsed
+        
+        if deadline is not None and deadline.expired():
+            self.state.mark_timed_out()
         
         return None
     
-    def run_loop(self, user_input: str, max_steps: int = 5):
+    def run_loop(self, user_input: str, max_steps: int = 5, timeout: float | None = None):
         """
         Run the agent loop for multiple steps.
         
         Args:
             user_input: Initial user input
             max_steps: Maximum number of steps to execute
+            timeout: Optional wall-clock budget in seconds for the whole loop.
+                When it runs out, the actions completed so far are returned
+                and self.state.timed_out is set.
             
         Returns:
             List of action results
         """
         self.state.reset()
-        results = []
+        self.state.task = user_input
+        self.state.mode = "loop"
+        self._clear_checkpoint()
+        return self._continue_loop(max_steps, Deadline(timeout))
+    
+    def resume_loop(self, max_steps: int = 5, timeout: float | None = None) -> list:
+        """
+        Continue an interrupted run_loop from its last checkpoint.
+        
+        Completed steps are not run again.
+        
+        Args:
+            max_steps: Maximum number of steps in total (including resumed ones)
+            timeout: Optional wall-clock budget in seconds for the remaining steps
+        
+        Returns:
+            List of action results, including the ones from before the crash
+            (empty if there is no loop checkpoint)
+        """
+        if not self._restore("loop"):
+            return []
+        self.state.timed_out = False
+        return self._continue_loop(max_steps, Deadline(timeout))
+    
+    @staticmethod
+    def _transcript_line(step: int, action: dict) -> str:
+        """
+        Render one completed loop step for the agent_step transcript.
+        
+        The line starts the same way the step's prompt ended ("Step N:"),
+        so the prompt and the model's answer stay a prefix of the next prompt.
+        """
+        return f"Step {step}: {json.dumps(action, ensure_ascii=False)}\n"
+    
+    def _continue_loop(self, max_steps: int, deadline: Deadline) -> list:
+        """Run loop steps from the current state, checkpointing after each."""
+        # Rebuilt from results so a resumed loop sees the steps before the crash
+        transcript = "".join(
+            self._transcript_line(step, action)
+            for step, action in enumerate(self.state.results, start=1)
+        )
         
         while not self.state.done and self.state.steps < max_steps:
-            action = self.agent_step(user_input)
+            if deadline.expired():
+                self.state.mark_timed_out()
+                break
+            
+            action = self.agent_step(self.state.task, deadline=deadline, transcript=transcript)
             
             if action:
-                results.append(action)
+                transcript += self._transcript_line(self.state.steps, action)
+                self.state.results.append(action)
+                self.state.last_action = action
                 
                 # Simple termination condition
                 if action.get("action") == "done":
                     self.state.mark_done()
+                self._checkpoint()
             else:
                 break
         
-        return results
+        return list(self.state.results)
     
     # ============================================================
     # LESSON 07: Memory
     # ============================================================
     
-    def run_with_memory(self, user_input: str) -> dict | None:
+    def run_with_memory(
+        self,
+        user_input: str,
+        top_k: int = 8,
+        max_memory_tokens: int = 256
+    ) -> dict | None:
         """
         Run agent with memory context.
         
         Lesson 07 version.
         
+        Only the memories relevant to this input are put in the prompt
+        (see Memory.select), so the prompt doesn't grow with everything
+        the agent has ever saved.
+        
         Args:
             user_input: User's input
+            top_k: Maximum number of memories to include
+            max_memory_tokens: Approximate token budget for the memories
             
         Returns:
             Response with potential memory update
-        """
-        memory_context = self.memory.get_all()
         
-        # Build memory context string
-        if memory_context:
-            memory_str = "You remember the following:\n" + "\n".join(f"- {item}" for item in memory_context)
-        else:
-            memory_str = "You have no memories yet."
+        Raises:
+            MemoryWriteError: If facts saved on earlier turns (with deferred
+                writes) could not be written
+        """
+        # Read-your-writes: facts saved on earlier turns must be visible
+        if self.memory_writer is not None:
+            self.memory_writer.sync()
+        memory_str = self._memory_block(user_input, top_k, max_memory_tokens)
         
         prompt = f"""{self.system_prompt}
 
@@ -376,19 +881,63 @@ User input: {user_input}
 
 Response (JSON only):"""
         
-        for attempt in range(3):
-            response = self.llm.generate(prompt, temperature=0.0)
-            parsed = extract_json_from_text(response)
+        parsed, self.last_violation = generate_validated(self.llm, prompt, MEMORY_REPLY)
+        
+        if parsed:
+            # Save to memory if requested
+            if parsed.get("save_to_memory"):
+                if self.memory_writer is not None:
+                    self.memory_writer.put(parsed["save_to_memory"])
+                else:
+                    with self.memory_lock:
+                        self.memory.add(parsed["save_to_memory"])
             
-            if parsed and "reply" in parsed:
-                # Save to memory if requested
-                if parsed.get("save_to_memory"):
-                    self.memory.add(parsed["save_to_memory"])
-                
-                self.state.increment_step()
-                return parsed
+            self.state.increment_step()
         
-        return None
+        return parsed
+    
+    def _memory_block(self, user_input: str, top_k: int, max_tokens: int) -> str:
+        """
+        Render the memory section of the run_with_memory prompt.
+        
+        Blocks are cached per input until memory changes (its version
+        moves, or a different memory is swapped in), so a repeated turn
+        against unchanged memory reuses the same string. The items of a
+        reused block are still counted as used by the eviction policy.
+        
+        Args:
+            user_input: User's input (selects which memories are relevant)
+            top_k: Maximum number of memories
+            max_tokens: Approximate token budget for the memories
+        
+        Returns:
+            The memory section text
+        """
+        with self.memory_lock:
+            # Expiring first, so a block holding expired items isn't reused
+            self.memory.expire()
+            # The memory object itself, not id(): ids are reused after garbage collection
+            owner = self._memory_blocks_owner
+            if owner is None or owner[0] is not self.memory or owner[1] != self.memory.version:
+                self._memory_blocks = {}
+                self._memory_blocks_owner = (self.memory, self.memory.version)
+            
+            key = (user_input, top_k, max_tokens)
+            cached = self._memory_blocks.get(key)
+            if cached is not None:
+                block, memory_context = cached
+                self.memory.touch(memory_context)
+                return block
+            
+            memory_context = self.memory.select(user_input, top_k=top_k, max_tokens=max_tokens)
+            if memory_context:
+                block = "You remember the following:\n" + "\n".join(f"- {item}" for item in memory_context)
+            else:
+                block = "You have no memories yet."
+            if len(self._memory_blocks) >= 64:
+                self._memory_blocks.pop(next(iter(self._memory_blocks)))
+            self._memory_blocks[key] = (block, memory_context)
+            return block
     
     # ============================================================
     # LESSON 08: Planning
@@ -481,21 +1030,110 @@ Response (JSON only):"""
         """
         return create_aot_graph(self.llm, goal)
     
-    def execute_aot_plan(self, graph: dict) -> list:
+    def execute_aot_plan(self, graph: dict, timeout: float | None = None) -> list:
         """
         Execute an AoT graph respecting dependencies.
         
+        Each node's action is run by _execute_node: as a registered tool
+        call when the model maps it to one, otherwise as one generation.
+        
+        The graph's progress is kept in state.current_plan, state.mode and
+        state.results (started afresh for every graph) so resume_aot_plan
+        can continue it. The rest of the state, such as steps and done, is
+        left as it was.
+        
         Args:
             graph: AoT graph
+            timeout: Optional wall-clock budget in seconds for the whole graph
             
         Returns:
-            List of execution results
+            List of execution results (nodes cut off by the timeout are
+            marked with "timed_out": True)
+        """
+        self.state.current_plan = graph
+        self.state.mode = "graph"
+        self.state.results = []
+        self.state.timed_out = False
+        self._clear_checkpoint()
+        return self._continue_graph(Deadline(timeout))
+    
+    def resume_aot_plan(self, timeout: float | None = None) -> list:
         """
+        Continue an interrupted execute_aot_plan from its last checkpoint.
+        
+        Nodes that already ran are not executed again.
+        
+        Args:
+            timeout: Optional wall-clock budget in seconds for the remaining nodes
+        
+        Returns:
+            List of execution results, including the ones from before the
+            crash (empty if there is no graph checkpoint)
+        """
+        if not self._restore("graph"):
+            return []
+        self.state.timed_out = False
+        return self._continue_graph(Deadline(timeout))
+    
+    def _continue_graph(self, deadline: Deadline) -> list:
+        """Execute the remaining nodes of state.current_plan, checkpointing after each."""
         def execute_action(action: str):
-            # Placeholder for actual action execution
-            return f"Executed: {action}"
+            return self._execute_node(action, deadline)
+        
+        def record(result: dict):
+            self.state.results.append(result)
+            self._checkpoint()
+        
+        results = execute_graph(
+            self.state.current_plan,
+            execute_action,
+            deadline=deadline,
+            completed=self.state.results,
+            on_result=record
+        )
         
-        return execute_graph(graph, execute_action)
+        if deadline.expired():
+            self.state.mark_timed_out()
+        
+        return results
+    
+    def _execute_node(self, action: str, deadline: Deadline) -> Any:
+        """
+        Run one graph node's action.
+        
+        The action is turned into an atomic action first. If that names a
+        registered tool, the tool is called with its inputs; otherwise the
+        model carries out the step in one generation.
+        
+        Args:
+            action: The node's action text
+            deadline: Deadline for the whole graph
+        
+        Returns:
+            The tool's result or the generated text
+        
+        Raises:
+            TimeoutError: If the deadline expired during the node
+            ValueError: If the tool doesn't exist
+        """
+        atomic = create_atomic_action(self.llm, action, deadline=deadline)
+        if atomic is not None and atomic["action"] in self.tools:
+            return self.tools.execute(atomic["action"], atomic.get("inputs", {}))
+        if deadline.expired():
+            raise TimeoutError("Deadline exceeded during execution")
+        
+        prompt = f"""{self.system_prompt}
+
+Carry out this step and reply with its result only.
+
+Step: {action}
+
+Result:"""
+
+        result = self.llm.complete(prompt, deadline=deadline)
+        if result.timed_out:
+            raise TimeoutError("Deadline exceeded during execution")
+        return result.text.strip()
     
     # ============================================================
     # MAIN RUN METHOD (evolves across lessons)
@@ -514,10 +1152,36 @@ Response (JSON only):"""
         Returns:
             The agent's response
         """
+        if self.session is None:
+            return self._answer(user_input)
+        
+        self.session.add_turn("user", user_input)
+        reply = self._answer(user_input)
+        self.session.add_turn("assistant", reply)
+        return reply
+    
+    def _memory_scope(self) -> str:
+        """Cache scope: answers are only valid for the memory (and user) they used."""
+        owner = f"{self.session.session_id}:" if self.session is not None else ""
+        return f"{owner}memory:{self.memory.version}"
+    
+    def _answer(self, user_input: str) -> str:
+        """Answer from the response cache, memory, or plain generation."""
+        scope = self._memory_scope()
+        if self.response_cache is not None:
+            cached = self.response_cache.lookup(user_input, scope=scope)
+            if cached is not None:
+                return cached
+        
         result = self.run_with_memory(user_input)
         
         if result and "reply" in result:
+            # Turns that changed memory must run again to change it again
+            # (a deferred write may not have reached memory.version yet)
+            changed_memory = result.get("save_to_memory") or scope != self._memory_scope()
+            if self.response_cache is not None and not changed_memory:
+                self.response_cache.store(user_input, result["reply"], scope=scope)
             return result["reply"]
         
-        # Fallback to simple generation
-        return self.generate_with_role(user_input)
\ No newline at end of file
+        # Fallback to simple generation (the cache was already checked above)
+        return self._generate_with_role(user_input)
\ No newline at end of file
@@ -0,0 +1,222 @@
+"""
+Memory compaction - merge many small related facts into summaries.
+
+Long sessions collect lots of small facts about the same thing:
+
+    User lives in Paris
+    User moved to Paris in 2021
+    User's apartment in Paris is near the Louvre
+
+Eviction would just drop some of them. Compaction asks the LLM to merge
+related facts into one entry instead, so memory (and the memory part of
+every prompt) shrinks without losing what was said.
+
+It can run on demand (compact_once) or as a background thread. A group
+the LLM fails to merge is retried later with exponential backoff, not on
+every pass.
+"""
+
+import threading
+import time
+from contextlib import AbstractContextManager
+from typing import Callable
+
+from agent.contracts import MEMORY_SUMMARY, generate_validated
+from agent.memory import Memory
+from shared.llm import LocalLLM
+from shared.utils import estimate_tokens
+
+
+class MemoryCompactor:
+    """
+    Periodically merge groups of related small memory items with the LLM.
+    
+    Usage:
+        compactor = MemoryCompactor(agent.memory, agent.llm, lock=agent.memory_lock)
+        compactor.start(interval=60)
+        ...
+        compactor.stop()
+    
+    Memory may not be used from two threads at once: the compactor holds
+    `lock` while it reads and changes memory, and anything else using the
+    same memory must hold the same lock. The summary is written without
+    it (LocalLLM serializes model calls with its own lock), so a slow
+    generation doesn't block memory reads and writes; the group is checked
+    again before it is replaced.
+    """
+    
+    def __init__(
+        self,
+        memory: Memory,
+        llm: LocalLLM,
+        lock: AbstractContextManager | None = None,
+        min_items: int = 50,
+        group_size: int = 6,
+        min_group: int = 3,
+        max_fact_tokens: int = 32,
+        scan: int = 20,
+        min_relevance: float = 0.5,
+        backoff: float = 60.0,
+        max_backoff: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize the compactor.
+        
+        Args:
+            memory: Memory to compact
+            llm: Model that writes the summaries
+            lock: Lock shared with everything else using memory
+            min_items: Don't compact memories smaller than this
+            group_size: Most facts merged into one summary
+            min_group: Fewest related facts worth merging
+            max_fact_tokens: Only facts this short are merged (summaries aren't re-merged)
+            scan: Oldest items considered as group seeds per pass
+            min_relevance: Related facts must score at least this fraction of
+                the closest one (so sharing only "user" with the seed doesn't count)
+            backoff: Seconds before a group that failed to merge is tried
+                again (doubled after every further failure)
+            max_backoff: Longest wait before retrying a failed group
+            clock: Time source for backoff (seconds)
+        """
+        self.memory = memory
+        self.llm = llm
+        self.lock = lock if lock is not None else threading.Lock()
+        self.min_items = min_items
+        self.group_size = group_size
+        self.min_group = min_group
+        self.max_fact_tokens = max_fact_tokens
+        self.scan = scan
+        self.min_relevance = min_relevance
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.clock = clock
+        
+        self.merged = 0        # Facts replaced by summaries
+        self.summaries = 0     # Summaries written
+        self.failures = 0      # Groups the LLM didn't merge
+        self._failed: dict[tuple[str, ...], tuple[int, float]] = {}   # Group -> (failures, retry at)
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+    
+    def _find_group(self) -> list[str] | None:
+        """Find old small facts that are about the same thing (skipping groups backing off)."""
+        now = self.clock()
+        for seed in self.memory.get_oldest(self.scan):
+            if estimate_tokens(seed) > self.max_fact_tokens:
+                continue
+            ranked = self.memory.rank_with_ids(seed, self.group_size * 2 + 1)
+            group = [(item_id, item) for item_id, item, _ in ranked if item == seed]
+            related = [(item_id, item, score) for item_id, item, score in ranked if item != seed]
+            cutoff = related[0][2] * self.min_relevance if related else 0.0
+            for item_id, item, score in related:
+                if score < cutoff or len(group) == self.group_size:
+                    break
+                if estimate_tokens(item) <= self.max_fact_tokens:
+                    group.append((item_id, item))
+            if len(group) >= self.min_group:
+                # Oldest first, so the prompt can say later facts win
+                facts = [item for _, item in sorted(group)]
+                failed = self._failed.get(tuple(facts))
+                if failed is None or now >= failed[1]:
+                    return facts
+        return None
+    
+    def _record_failure(self, group: list[str]):
+        """Back off from a group the LLM couldn't merge."""
+        key = tuple(group)
+        failures = self._failed.get(key, (0, 0.0))[0] + 1
+        delay = min(self.backoff * 2 ** (failures - 1), self.max_backoff)
+        self._failed[key] = (failures, self.clock() + delay)
+        self.failures += 1
+    
+    def _summarize(self, facts: list[str]) -> str | None:
+        """Ask the LLM to merge facts into one."""
+        fact_list = "\n".join(f"- {fact}" for fact in facts)
+        prompt = f"""Merge these remembered facts into ONE short fact that keeps every detail.
+If facts contradict each other, keep the one listed last.
+
+Facts:
+{fact_list}
+
+Required JSON format:
+{{"summary": "the merged fact"}}
+
+Response (JSON only):"""
+        parsed, _ = generate_validated(self.llm, prompt, MEMORY_SUMMARY)
+        return parsed["summary"].strip() if parsed and parsed["summary"].strip() else None
+    
+    def compact_once(self) -> bool:
+        """
+        Merge one group of related facts, if there is one.
+        
+        Returns:
+            True if memory was compacted
+        """
+        with self.lock:
+            if len(self.memory) < self.min_items:
+                return False
+            group = self._find_group()
+            if group is None:
+                return False
+        
+        summary = self._summarize(group)
+        
+        with self.lock:
+            if summary is None:
+                self._record_failure(group)
+                return False
+            # Memory kept changing while the model wrote the summary
+            if not all(fact in self.memory for fact in group):
+                return False
+            
+            self._failed.pop(tuple(group), None)
+            for fact in group:
+                self.memory.remove(fact)
+            self.memory.add(summary)
+        
+        self.merged += len(group)
+        self.summaries += 1
+        return True
+    
+    def _loop(self, interval: float):
+        """Background thread body: compact until stopped."""
+        while not self._stop.is_set():
+            # Keep going while there's work, then sleep
+            if not self.compact_once():
+                self._stop.wait(interval)
+    
+    def start(self, interval: float = 60.0):
+        """
+        Start compacting in a background thread.
+        
+        Args:
+            interval: Seconds to wait when there is nothing to compact
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, args=(interval,), daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: float | None = None):
+        """
+        Stop the background thread (the current merge is finished first).
+        
+        Args:
+            timeout: Seconds to wait for the thread
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+    
+    def get_stats(self) -> dict:
+        """Get compaction counters as dictionary."""
+        return {
+            "summaries": self.summaries,
+            "merged_facts": self.merged,
+            "failures": self.failures,
+            "failed_groups": len(self._failed),
+            "memory_items": len(self.memory),
+        }
@@ -0,0 +1,370 @@
+"""
+JSON contracts for agent outputs.
+
+A contract is the shape a model response must have: which keys are
+required, what type each value is, which values are allowed.
+
+Contracts are compiled once into a list of small checks, so validating a
+response is a handful of dict lookups. The same contracts are used by the
+agent, the planner and the evals, and a failed check says exactly what was
+wrong - which is fed back to the model on the next retry.
+"""
+
+import json
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable
+
+from shared.llm import LocalLLM, Deadline
+
+
+# Reasons a response can violate a contract
+NOT_JSON = "not_json"
+MISSING_FIELD = "missing_field"
+WRONG_TYPE = "wrong_type"
+NOT_ALLOWED = "not_allowed"
+
+
+@dataclass(frozen=True)
+class Violation:
+    """Why a response failed its contract."""
+    reason: str
+    path: str
+    message: str
+    
+    def __str__(self) -> str:
+        """Human- and model-readable description."""
+        return f"{self.path}: {self.message}" if self.path else self.message
+
+
+# Type names used in error messages
+_TYPE_NAMES = {
+    str: "string",
+    int: "integer",
+    float: "number",
+    bool: "boolean",
+    dict: "object",
+    list: "list",
+    type(None): "null",
+}
+
+
+def _check_type(types: tuple) -> Callable:
+    """Compile an isinstance check (bools are not numbers)."""
+    allow_bool = bool in types
+    expected = " or ".join(_TYPE_NAMES.get(t, t.__name__) for t in types)
+    
+    def check(value, path):
+        if isinstance(value, types) and (allow_bool or not isinstance(value, bool)):
+            return None
+        return Violation(WRONG_TYPE, path, f"expected {expected}, got {_TYPE_NAMES.get(type(value), type(value).__name__)}")
+    
+    return check
+
+
+def _check_enum(allowed: frozenset) -> Callable:
+    """Compile a membership check against allowed values."""
+    shown = ", ".join(sorted(repr(v) for v in allowed))
+    
+    def check(value, path):
+        try:
+            if value in allowed:
+                return None
+        except TypeError:
+            # Unhashable values (lists, dicts) can't be in the set
+            pass
+        return Violation(NOT_ALLOWED, path, f"must be one of {shown}, got {value!r}")
+    
+    return check
+
+
+def _check_list(item_check: Callable) -> Callable:
+    """Compile a check for a list whose items all pass item_check."""
+    is_list = _check_type((list,))
+    
+    def check(value, path):
+        violation = is_list(value, path)
+        if violation:
+            return violation
+        for i, item in enumerate(value):
+            violation = item_check(item, f"{path}[{i}]")
+            if violation:
+                return violation
+        return None
+    
+    return check
+
+
+def _check_object(fields: list) -> Callable:
+    """Compile a check for an object with the given (key, required, check) fields."""
+    is_object = _check_type((dict,))
+    
+    def check(value, path):
+        violation = is_object(value, path)
+        if violation:
+            return violation
+        for key, required, field_check in fields:
+            field_path = f"{path}.{key}" if path else key
+            if key not in value:
+                if required:
+                    return Violation(MISSING_FIELD, field_path, "required field is missing")
+                continue
+            if field_check is not None:
+                violation = field_check(value[key], field_path)
+                if violation:
+                    return violation
+        return None
+    
+    return check
+
+
+def _compile(spec) -> Callable | None:
+    """
+    Turn a spec into a check function.
+    
+    Spec forms:
+        None                    - anything
+        str, int, dict, ...     - that type ("float" accepts ints too)
+        (str, type(None))       - any of these types
+        {"a", "b"} / frozenset  - one of these values
+        [spec]                  - a list of items matching spec
+        Contract                - a nested object contract
+    """
+    if spec is None:
+        return None
+    if isinstance(spec, Contract):
+        return spec._check
+    if isinstance(spec, (set, frozenset)):
+        return _check_enum(frozenset(spec))
+    if isinstance(spec, list):
+        item_check = _compile(spec[0]) if spec else None
+        return _check_list(item_check or (lambda value, path: None))
+    if isinstance(spec, type):
+        spec = (spec,)
+    if isinstance(spec, tuple):
+        if float in spec and int not in spec:
+            spec = spec + (int,)
+        return _check_type(spec)
+    raise TypeError(f"Unsupported contract spec: {spec!r}")
+
+
+class Contract:
+    """
+    A compiled JSON object contract.
+    
+    Usage:
+        TOOL_CALL = Contract("tool_call", {"tool": str, "arguments": dict})
+        violation = TOOL_CALL.validate(parsed)
+        if violation is None:
+            ...
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        fields: dict,
+        optional: tuple = (),
+        check: Callable[[dict, str], Violation | None] | None = None
+    ):
+        """
+        Compile a contract.
+        
+        Args:
+            name: Name used in reports
+            fields: Mapping of key to spec (see _compile for spec forms)
+            optional: Keys that may be absent (but are checked when present)
+            check: Extra check of the whole object, run once its fields pass;
+                takes (value, path) and returns a Violation or None
+        """
+        self.name = name
+        self.fields = dict(fields)
+        self.optional = frozenset(optional)
+        check_fields = _check_object([
+            (key, key not in self.optional, _compile(spec))
+            for key, spec in self.fields.items()
+        ])
+        if check is None:
+            self._check = check_fields
+        else:
+            def check_all(value, path):
+                return check_fields(value, path) or check(value, path)
+            
+            self._check = check_all
+    
+    def validate(self, value: Any) -> Violation | None:
+        """
+        Check a parsed response against the contract.
+        
+        Args:
+            value: Parsed JSON (None means parsing failed)
+        
+        Returns:
+            The first violation found, or None if the value is valid
+        """
+        if value is None:
+            return Violation(NOT_JSON, "", "response was not valid JSON")
+        return self._check(value, "")
+    
+    def is_valid(self, value: Any) -> bool:
+        """Check whether a parsed response satisfies the contract."""
+        return value is not None and self._check(value, "") is None
+    
+    def __repr__(self) -> str:
+        """String representation of the contract."""
+        return f"Contract({self.name}: {', '.join(self.fields)})"
+
+
+# ============================================================
+# Contracts used by the agent, planner and evals
+# ============================================================
+
+TOOL_CALL = Contract("tool_call", {"tool": str, "arguments": dict})
+
+TOOL_CALLS = Contract("tool_calls", {"calls": [TOOL_CALL]})
+
+AGENT_ACTION = Contract("agent_action", {"action": str, "reason": None}, optional=("reason",))
+
+MEMORY_REPLY = Contract(
+    "memory_reply",
+    {"reply": str, "save_to_memory": (str, type(None))},
+    optional=("save_to_memory",)
+)
+
+PLAN = Contract("plan", {"steps": list})
+
+ATOMIC_ACTION = Contract("atomic_action", {"action": str, "inputs": dict}, optional=("inputs",))
+
+AOT_NODE = Contract("aot_node", {"id": None, "action": None, "depends_on": list})
+
+
+def _check_aot_nodes(graph: dict, path: str) -> Violation | None:
+    """Require at least one well-formed node (the planner drops the others)."""
+    nodes = graph["nodes"]
+    nodes_path = f"{path}.nodes" if path else "nodes"
+    if any(AOT_NODE.is_valid(node) for node in nodes):
+        return None
+    if nodes:
+        return AOT_NODE._check(nodes[0], f"{nodes_path}[0]")
+    return Violation(MISSING_FIELD, nodes_path, "at least one node is required")
+
+
+AOT_GRAPH = Contract("aot_graph", {"nodes": list}, check=_check_aot_nodes)
+
+MEMORY_SUMMARY = Contract("memory_summary", {"summary": str})
+
+
+@lru_cache(maxsize=128)
+def _decision_contract(choices: tuple) -> Contract:
+    """Compile (once per set of choices) the contract for a decision."""
+    return Contract("decision", {"decision": frozenset(choices)})
+
+
+def decision_contract(choices: list[str]) -> Contract:
+    """
+    Get the contract for choosing one of the given options.
+    
+    Args:
+        choices: Allowed decisions
+    
+    Returns:
+        Compiled contract (cached per distinct choices)
+    """
+    return _decision_contract(tuple(choices))
+
+
+@lru_cache(maxsize=128)
+def _fields_contract(fields: tuple) -> Contract:
+    """Compile (once per field list) a presence-only contract."""
+    return Contract("required_fields", {f: None for f in fields})
+
+
+def fields_contract(fields: list[str]) -> Contract:
+    """
+    Get a contract that only requires the given fields to be present.
+    
+    Used for free-form structured output (lesson 03 and its evals).
+    
+    Args:
+        fields: Required field names
+    
+    Returns:
+        Compiled contract (cached per distinct field list)
+    """
+    return _fields_contract(tuple(fields))
+
+
+# ============================================================
+# Retry policy
+# ============================================================
+
+# How prompts asking for JSON end, unless they say otherwise
+JSON_CUE = "Response (JSON only):"
+
+
+def feedback_prompt(prompt: str, previous: Any, violation: Violation, cue: str = JSON_CUE) -> str:
+    """
+    Extend a prompt with the rejected response and the reason it was rejected.
+    
+    The original prompt and the model's own answer stay an unchanged
+    prefix, so llama.cpp can reuse its cached evaluation and only the
+    feedback lines are new.
+    
+    Args:
+        prompt: The original prompt (ending in cue)
+        previous: The rejected parsed response (None if it wasn't JSON)
+        violation: Why the previous response failed
+        cue: The line the original prompt ends with, repeated so the
+            retry asks for the same thing (e.g. "Step 3:")
+    
+    Returns:
+        Prompt for the next attempt
+    """
+    shown = json.dumps(previous) if previous is not None else "(not valid JSON)"
+    return f"""{prompt} {shown}
+
+That response was rejected: {violation}
+
+{cue}"""
+
+
+def generate_validated(
+    llm: LocalLLM,
+    prompt: str,
+    contract: Contract,
+    attempts: int = 3,
+    deadline: Deadline | None = None,
+    cue: str = JSON_CUE
+) -> tuple[dict | None, Violation | None]:
+    """
+    Generate JSON until it satisfies a contract.
+    
+    Each retry tells the model what was wrong with its last response instead
+    of re-sending the same prompt (which at temperature 0 gives the same
+    answer again).
+    
+    Args:
+        llm: The language model to use
+        prompt: Prompt asking for JSON
+        contract: Contract the response must satisfy
+        attempts: Maximum number of generations
+        deadline: Optional shared deadline; no new attempt starts after it
+        cue: The line prompt ends with (see feedback_prompt)
+    
+    Returns:
+        (valid response, None) or (None, last violation)
+    """
+    violation = None
+    current_prompt = prompt
+    
+    for attempt in range(attempts):
+        if deadline is not None and deadline.expired():
+            break
+        
+        parsed = llm.generate_json(current_prompt, deadline=deadline)
+        violation = contract.validate(parsed)
+        if violation is None:
+            return parsed, None
+        
+        current_prompt = feedback_prompt(prompt, parsed, violation, cue)
+    
+    return None, violation
@@ -14,6 +14,8 @@ This module provides:
 from typing import Any, Callable
 from dataclasses import dataclass, field
 
+from agent.contracts import fields_contract, NOT_JSON
+
 
 @dataclass
 class EvalResult:
@@ -92,12 +94,15 @@ class AgentEval:
             input_text = case["input"]
             schema = case["schema"]
             required_fields = case.get("must_have_fields", [])
+            contract = fields_contract(required_fields)
             
             try:
-                result = self.agent.generate_structured(input_text, schema)
+                result = self.agent.generate_structured(input_text, schema, contract=contract)
+                # On failure the agent reports why its last attempt was rejected
+                violation = contract.validate(result) if result is not None else self.agent.last_violation
                 
                 # Check 1: Did we get valid JSON?
-                if result is None:
+                if result is None and (violation is None or violation.reason == NOT_JSON):
                     suite.add_result(EvalResult(
                         passed=False,
                         input=input_text,
@@ -108,13 +113,12 @@ class AgentEval:
                     continue
                 
                 # Check 2: Are required fields present?
-                missing_fields = [f for f in required_fields if f not in result]
-                if missing_fields:
+                if violation is not None:
                     suite.add_result(EvalResult(
                         passed=False,
                         input=input_text,
                         expected=f"Fields: {required_fields}",
-                        actual=f"Missing: {missing_fields}",
+                        actual=str(violation),
                         error="Schema contract violated"
                     ))
                     continue
@@ -139,6 +143,9 @@ class AgentEval:
         """
         Test tool call accuracy - correct tool selected with valid arguments.
         
+        The model is asked every time: the agent's fast-path router is
+        bypassed, so routed inputs still measure the model.
+        
         Args:
             cases: List of {"input": str, "expected_tool": str, "expected_args": dict (optional)}
             
@@ -153,7 +160,7 @@ class AgentEval:
             expected_args = case.get("expected_args")
             
             try:
-                tool_call = self.agent.request_tool(input_text)
+                tool_call = self._model_tool_call(input_text)
                 
                 # Check 1: Did we get a tool call?
                 if tool_call is None:
@@ -209,6 +216,14 @@ class AgentEval:
         
         return suite
     
+    def _model_tool_call(self, input_text: str) -> dict | None:
+        """Ask the model for a tool call, with the agent's router turned off."""
+        router, self.agent.router = getattr(self.agent, "router", None), None
+        try:
+            return self.agent.request_tool(input_text)
+        finally:
+            self.agent.router = router
+    
     def test_decisions(self, cases: list[dict]) -> EvalSuiteResult:
         """
         Test decision routing - agent picks correct action from choices.
@@ -0,0 +1,184 @@
+"""
+Eviction policies for bounded memory.
+
+When Memory is given max_items, something has to go once it is full. A
+policy decides what:
+
+- LRUPolicy: the item least recently added or used in a prompt/search
+- TTLPolicy: items older than a time limit (and the oldest when full)
+- ImportancePolicy: the item with the lowest importance score
+
+Policies only track item ids; Memory tells them when items are added,
+used and removed, and asks them which ids to drop. Expired ids are
+dropped on every add and every read, so an expired item is never
+returned.
+"""
+
+import heapq
+import time
+from collections import OrderedDict
+from typing import Callable
+
+
+class EvictionPolicy:
+    """
+    Base class: decides which memory items to drop.
+    
+    Subclasses override the hooks they need.
+    """
+    
+    def added(self, item_id: int, item: str):
+        """Called after an item is stored."""
+        pass
+    
+    def restored(self, item_id: int, item: str, age: float):
+        """
+        Called for an item that was already stored when the policy was
+        attached (e.g. memory reopened from disk).
+        
+        Args:
+            item_id: The item's id
+            item: The item
+            age: Seconds since the item was first stored (0.0 if unknown)
+        """
+        self.added(item_id, item)
+    
+    def accessed(self, item_id: int):
+        """Called when an item is returned by search or selected for a prompt."""
+        pass
+    
+    def removed(self, item_id: int):
+        """Called after an item is removed (by eviction or explicitly)."""
+        pass
+    
+    def expired(self) -> list[int]:
+        """Ids that must go regardless of capacity."""
+        return []
+    
+    def victims(self, count: int) -> list[int]:
+        """Pick count ids to evict."""
+        raise NotImplementedError
+    
+    def clear(self):
+        """Forget all tracked items."""
+        pass
+
+
+class LRUPolicy(EvictionPolicy):
+    """Evict the least recently used items."""
+    
+    def __init__(self):
+        """Initialize with nothing tracked."""
+        self._order: OrderedDict[int, None] = OrderedDict()    # Least recently used first
+    
+    def added(self, item_id: int, item: str):
+        """Track a new item as the most recently used."""
+        self._order[item_id] = None
+    
+    def accessed(self, item_id: int):
+        """Mark an item as the most recently used."""
+        if item_id in self._order:
+            self._order.move_to_end(item_id)
+    
+    def removed(self, item_id: int):
+        """Stop tracking an item."""
+        self._order.pop(item_id, None)
+    
+    def victims(self, count: int) -> list[int]:
+        """The count least recently used ids."""
+        return [item_id for item_id, _ in zip(self._order, range(count))]
+    
+    def clear(self):
+        """Forget all tracked items."""
+        self._order.clear()
+
+
+class TTLPolicy(EvictionPolicy):
+    """Expire items after ttl_seconds; when full, evict the oldest."""
+    
+    def __init__(self, ttl_seconds: float, clock: Callable[[], float] = time.time):
+        """
+        Initialize with nothing tracked.
+        
+        Args:
+            ttl_seconds: How long an item is kept
+            clock: Time source (seconds)
+        """
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._added_at: OrderedDict[int, float] = OrderedDict()    # Oldest first
+    
+    def added(self, item_id: int, item: str):
+        """Record when an item was stored."""
+        self._added_at[item_id] = self.clock()
+    
+    def restored(self, item_id: int, item: str, age: float):
+        """Record an existing item as stored age seconds ago, so reopening doesn't restart its ttl."""
+        self._added_at[item_id] = self.clock() - age
+    
+    def removed(self, item_id: int):
+        """Stop tracking an item."""
+        self._added_at.pop(item_id, None)
+    
+    def expired(self) -> list[int]:
+        """Ids stored more than ttl_seconds ago, oldest first."""
+        # Items are in insertion order, so stop at the first one still alive
+        cutoff = self.clock() - self.ttl_seconds
+        expired = []
+        for item_id, added_at in self._added_at.items():
+            if added_at > cutoff:
+                break
+            expired.append(item_id)
+        return expired
+    
+    def victims(self, count: int) -> list[int]:
+        """The count oldest ids."""
+        return [item_id for item_id, _ in zip(self._added_at, range(count))]
+    
+    def clear(self):
+        """Forget all tracked items."""
+        self._added_at.clear()
+
+
+class ImportancePolicy(EvictionPolicy):
+    """
+    Evict the least important items.
+    
+    Importance is score(item) when stored, plus access_weight for every
+    time the item is used afterwards.
+    """
+    
+    def __init__(self, score: Callable[[str], float], access_weight: float = 0.1):
+        """
+        Initialize with nothing tracked.
+        
+        Args:
+            score: Importance of an item's text (higher = keep longer)
+            access_weight: Importance added each time an item is used
+        """
+        self.score = score
+        self.access_weight = access_weight
+        self._importance: dict[int, float] = {}
+    
+    def added(self, item_id: int, item: str):
+        """Score a new item."""
+        self._importance[item_id] = self.score(item)
+    
+    def accessed(self, item_id: int):
+        """Raise an item's importance by access_weight."""
+        if item_id in self._importance:
+            self._importance[item_id] += self.access_weight
+    
+    def removed(self, item_id: int):
+        """Stop tracking an item."""
+        self._importance.pop(item_id, None)
+    
+    def victims(self, count: int) -> list[int]:
+        """The count least important ids."""
+        # Ties go to the older item
+        lowest = heapq.nsmallest(count, self._importance.items(), key=lambda entry: (entry[1], entry[0]))
+        return [item_id for item_id, _ in lowest]
+    
+    def clear(self):
+        """Forget all tracked items."""
+        self._importance.clear()
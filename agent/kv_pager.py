@@ -0,0 +1,248 @@
+"""
+KV-cache paging - keep each session's evaluated context between turns.
+
+The expensive part of answering is prompt evaluation: llama.cpp runs the
+whole prompt through the model to fill its KV cache. It reuses the cache
+when the next prompt starts with the same tokens, but there is only one
+cache, so when the agent switches to another session the previous
+session's context is overwritten and has to be evaluated again when that
+session comes back.
+
+KVCachePager saves the model's state when a session goes idle and loads
+it back when the session returns:
+- hot sessions stay in RAM, up to max_ram_bytes
+- colder ones are spilled to one file per session
+- loading a state is a memory copy, not a forward pass over the history
+
+States are only valid for the model (and context size) that made them;
+spill files from another model are ignored.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+from llama_cpp import LlamaState
+
+from shared.llm import LocalLLM
+
+# Bump when the spill file layout changes, so old files are ignored
+KV_FORMAT = 1
+
+
+@dataclass
+class KVPagerStats:
+    """Counters for the KV-cache pager."""
+    saves: int = 0
+    ram_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    spills: int = 0
+    
+    def to_dict(self) -> dict:
+        """Export stats as dictionary."""
+        return {
+            "saves": self.saves,
+            "ram_hits": self.ram_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "spills": self.spills,
+        }
+
+
+def _compact(state: LlamaState) -> LlamaState:
+    """
+    Drop the logits rows nothing reads.
+    
+    llama.cpp keeps one row of logits per token (n_tokens x vocabulary,
+    often larger than the KV cache itself), but without logits_all only
+    the last row is ever written or sampled from.
+    
+    The compact state loads as it is: load_state() assigns the saved
+    scores to the model's first n_tokens rows, and NumPy broadcasts the
+    single row over them, so the full array is never rebuilt.
+    """
+    return LlamaState(
+        input_ids=state.input_ids,
+        scores=np.ascontiguousarray(state.scores[-1:]),
+        n_tokens=state.n_tokens,
+        llama_state=state.llama_state,
+        llama_state_size=state.llama_state_size,
+        seed=state.seed,
+    )
+
+
+def _state_bytes(state: LlamaState) -> int:
+    """RAM held by a (compact) state."""
+    return len(state.llama_state) + state.scores.nbytes + state.input_ids.nbytes
+
+
+class KVCachePager:
+    """
+    Per-session model state, in RAM for hot sessions and on disk for the rest.
+    
+    Usage:
+        pager = KVCachePager(llm, "kv_cache/", max_ram_bytes=1 << 30)
+        pager.save("alice")       # Alice goes idle
+        ...                       # Other sessions use the model
+        pager.restore("alice")    # Alice is back: her context is loaded
+    
+    save() and restore() call into the model, so like any other model call
+    they must not overlap with generation.
+    """
+    
+    def __init__(self, llm: LocalLLM, spill_dir: str, max_ram_bytes: int = 512 * 1024 * 1024):
+        """
+        Initialize the pager.
+        
+        Args:
+            llm: Model whose state is paged
+            spill_dir: Directory for spilled states (created if missing)
+            max_ram_bytes: Most bytes of state kept in RAM (0 = always spill)
+        """
+        self.llm = llm
+        self.spill_dir = spill_dir
+        self.max_ram_bytes = max_ram_bytes
+        self.stats = KVPagerStats()
+        os.makedirs(spill_dir, exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._ram: OrderedDict[str, LlamaState] = OrderedDict()   # Least recently used first
+        self._ram_bytes = 0
+    
+    def _path(self, session_id: str) -> str:
+        """Spill file for a session (hashed, so any id is a safe file name)."""
+        digest = hashlib.sha256(session_id.encode("utf-8")).hexdigest()
+        return os.path.join(self.spill_dir, f"{digest}.kv.npz")
+    
+    def _write(self, session_id: str, state: LlamaState):
+        """Write a compact state to its spill file atomically."""
+        path = self._path(session_id)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            np.savez(
+                f,
+                format=np.array(KV_FORMAT),
+                model=np.array(self.llm.model_path),
+                n_ctx=np.array(self.llm.n_ctx),
+                input_ids=state.input_ids,
+                scores=state.scores,
+                n_tokens=np.array(state.n_tokens),
+                llama_state=np.frombuffer(state.llama_state, dtype=np.uint8),
+                seed=np.array(state.seed),
+            )
+        os.replace(temp_path, path)
+    
+    def _read(self, session_id: str) -> LlamaState | None:
+        """Read a compact state from disk (None if missing or from another model)."""
+        path = self._path(session_id)
+        if not os.path.exists(path):
+            return None
+        with np.load(path, allow_pickle=False) as data:
+            if (
+                int(data["format"]) != KV_FORMAT
+                or str(data["model"]) != self.llm.model_path
+                or int(data["n_ctx"]) != self.llm.n_ctx
+            ):
+                return None
+            llama_state = data["llama_state"].tobytes()
+            return LlamaState(
+                input_ids=data["input_ids"],
+                scores=data["scores"],
+                n_tokens=int(data["n_tokens"]),
+                llama_state=llama_state,
+                llama_state_size=len(llama_state),
+                seed=int(data["seed"]),
+            )
+    
+    def _keep(self, session_id: str, state: LlamaState):
+        """Put a state in the RAM tier as most recently used (lock held)."""
+        old = self._ram.pop(session_id, None)
+        if old is not None:
+            self._ram_bytes -= _state_bytes(old)
+        self._ram[session_id] = state
+        self._ram_bytes += _state_bytes(state)
+    
+    def _spill_over_budget(self):
+        """Move least recently used states to disk until within max_ram_bytes (lock held)."""
+        while self._ram and self._ram_bytes > self.max_ram_bytes:
+            session_id, state = self._ram.popitem(last=False)
+            self._ram_bytes -= _state_bytes(state)
+            self._write(session_id, state)
+            self.stats.spills += 1
+    
+    def save(self, session_id: str):
+        """
+        Save the model's current context as a session's state.
+        
+        Call it when the session goes idle, before another session uses
+        the model.
+        
+        Args:
+            session_id: Session / user id
+        """
+        state = _compact(self.llm.save_state())
+        with self._lock:
+            self._keep(session_id, state)
+            self.stats.saves += 1
+            self._spill_over_budget()
+    
+    def restore(self, session_id: str) -> bool:
+        """
+        Load a session's saved state into the model.
+        
+        Args:
+            session_id: Session / user id
+        
+        Returns:
+            True if a state was loaded, False if the session has none
+            (its next prompt is evaluated from scratch)
+        """
+        with self._lock:
+            state = self._ram.get(session_id)
+            if state is not None:
+                self._ram.move_to_end(session_id)
+                self.stats.ram_hits += 1
+            else:
+                state = self._read(session_id)
+                if state is None:
+                    self.stats.misses += 1
+                    return False
+                self.stats.disk_hits += 1
+                self._keep(session_id, state)
+                self._spill_over_budget()
+        
+        self.llm.load_state(state)
+        return True
+    
+    def discard(self, session_id: str):
+        """Forget a session's state in RAM and on disk."""
+        with self._lock:
+            state = self._ram.pop(session_id, None)
+            if state is not None:
+                self._ram_bytes -= _state_bytes(state)
+            path = self._path(session_id)
+            if os.path.exists(path):
+                os.remove(path)
+    
+    def flush(self):
+        """Write every state in RAM to disk (they stay in RAM), e.g. before shutdown."""
+        with self._lock:
+            for session_id, state in self._ram.items():
+                self._write(session_id, state)
+    
+    def get_stats(self) -> dict:
+        """Get pager counters as dictionary."""
+        with self._lock:
+            return {**self.stats.to_dict(), "in_ram": len(self._ram), "ram_bytes": self._ram_bytes}
+    
+    def __len__(self) -> int:
+        """Return the number of states in RAM."""
+        return len(self._ram)
+    
+    def __repr__(self) -> str:
+        """String representation of the pager."""
+        return f"KVCachePager({len(self._ram)} in RAM, {self._ram_bytes} bytes, spill_dir={self.spill_dir!r})"
@@ -5,6 +5,23 @@ Memory is explicit storage, not consciousness.
 It's data that persists across agent steps and can be queried.
 """
 
+from collections.abc import Iterable
+from itertools import islice
+
+from agent.eviction import EvictionPolicy, LRUPolicy
+from agent.text_index import InvertedIndex, tokenize
+from shared.utils import estimate_tokens
+
+
+def exact_key(item: str) -> str:
+    """Dedupe key that treats only identical strings as duplicates."""
+    return item
+
+
+def folded_key(item: str) -> str:
+    """Dedupe key that ignores case and runs of whitespace."""
+    return " ".join(item.casefold().split())
+
 
 class Memory:
     """
@@ -13,11 +30,56 @@ class Memory:
     This is intentionally basic and grows in lessons:
     - Lesson 07: Basic list-based memory
     - Future: Add semantic search, persistence, etc.
+    
+    Items are stored in a dict keyed by their dedupe key. Python dicts keep
+    insertion order, so this behaves like the original list (oldest first)
+    while checking for duplicates in O(1) instead of scanning every item.
+    
+    Every item also goes into an inverted index as it is added, so search
+    only looks at items sharing a word with the query and ranks them with
+    BM25.
+    
+    With max_items set, memory stays bounded: once it is full, the
+    eviction policy (LRU by default, see agent/eviction.py) drops items
+    down to low_water * max_items, so eviction runs once per batch of adds
+    rather than on every add. Items a policy expires (TTLPolicy) are
+    dropped on the next add or read, so reads never return them.
     """
     
-    def __init__(self):
-        """Initialize empty memory."""
-        self.items = []
+    def __init__(
+        self,
+        normalize: bool = False,
+        max_items: int | None = None,
+        policy: EvictionPolicy | None = None,
+        low_water: float = 0.9
+    ):
+        """
+        Initialize empty memory.
+        
+        Args:
+            normalize: Treat items that differ only in case or whitespace
+                as duplicates (the first one stored is kept)
+            max_items: Capacity (None = unbounded)
+            policy: Decides what to evict (default: LRUPolicy if bounded)
+            low_water: Fraction of max_items to shrink to when full
+        """
+        self.normalize = normalize
+        self.key_func = folded_key if normalize else exact_key
+        self._ids: dict[str, int] = {}      # Dedupe key -> item id
+        self._texts: dict[int, str] = {}    # Item id -> item, oldest first
+        self._next_id = 0
+        self._index = InvertedIndex()
+        # Bumped on every change, so caches can tell when memory is different
+        self.version = 0
+        self.max_items = max_items
+        self.policy = policy if policy is not None else (LRUPolicy() if max_items else None)
+        self.low_water = low_water
+        self.evictions = 0
+    
+    @property
+    def items(self) -> list[str]:
+        """All stored items, oldest first (a copy)."""
+        return self.get_all()
     
     def add(self, item: str):
         """
@@ -26,17 +88,152 @@ class Memory:
         Args:
             item: String to remember
         """
-        if item and item not in self.items:
-            self.items.append(item)
+        if not item:
+            return
+        key = self.key_func(item)
+        if key not in self._ids:
+            item_id = self._next_id
+            self._next_id += 1
+            self._ids[key] = item_id
+            self._texts[item_id] = item
+            self._index_item(item_id, item)
+            self.version += 1
+            if self.policy is not None:
+                self.policy.added(item_id, item)
+                self._enforce_limits()
+    
+    def add_many(self, items: Iterable[str]):
+        """
+        Add several items at once.
+        
+        Args:
+            items: Strings to remember, oldest first
+        """
+        for item in items:
+            self.add(item)
+    
+    def _index_item(self, item_id: int, item: str):
+        """Make a newly added item searchable."""
+        self._index.add(item_id, item)
+    
+    def _unindex_item(self, item_id: int, item: str):
+        """Make a removed item unsearchable."""
+        self._index.remove(item_id, item)
+    
+    def remove(self, item: str) -> bool:
+        """
+        Remove an item (or its stored duplicate) from memory.
+        
+        Args:
+            item: String to forget
+        
+        Returns:
+            True if it was stored
+        """
+        item_id = self._id_of(item)
+        if item_id is None:
+            return False
+        return self._remove_id(item_id)
+    
+    def _remove_id(self, item_id: int) -> bool:
+        """Remove an item by id from every structure (False if it isn't stored)."""
+        item = self._texts.pop(item_id, None)
+        if item is None:
+            return False
+        del self._ids[self.key_func(item)]
+        self._unindex_item(item_id, item)
+        if self.policy is not None:
+            self.policy.removed(item_id)
+        self.version += 1
+        return True
+    
+    def expire(self):
+        """Drop the items the eviction policy says have expired."""
+        if self.policy is None:
+            return
+        for item_id in self.policy.expired():
+            if self._remove_id(item_id):
+                self.evictions += 1
+    
+    def _enforce_limits(self):
+        """Drop expired items, then evict down to low water if over capacity."""
+        self.expire()
+        
+        size = len(self)
+        if self.max_items is not None and size > self.max_items:
+            target = int(self.max_items * self.low_water)
+            for item_id in self.policy.victims(size - target):
+                if self._remove_id(item_id):
+                    self.evictions += 1
+    
+    def set_limits(self, max_items: int | None, policy: EvictionPolicy | None = None):
+        """
+        Bound (or unbound) memory that may already hold items.
+        
+        Args:
+            max_items: Capacity (None = unbounded)
+            policy: Decides what to evict (default: LRUPolicy)
+        """
+        self.max_items = max_items
+        self.policy = policy if policy is not None else LRUPolicy()
+        for item_id, item, age in self._all_with_ages():
+            self.policy.restored(item_id, item, age)
+        self._enforce_limits()
+    
+    def _touch(self, item_ids):
+        """Tell the eviction policy these items were just used."""
+        if self.policy is not None:
+            for item_id in item_ids:
+                self.policy.accessed(item_id)
+    
+    def touch(self, items: Iterable[str]):
+        """
+        Count items as used, as if search() or select() had returned them.
+        
+        For callers that reuse an earlier selection instead of selecting
+        again, so the eviction policy still sees the items in use.
+        
+        Args:
+            items: Stored items (unknown ones are ignored)
+        """
+        if self.policy is not None:
+            self._touch(item_id for item_id in map(self._id_of, items) if item_id is not None)
+    
+    def _id_of(self, item: str) -> int | None:
+        """Id of a stored item (or its duplicate), None if it isn't stored."""
+        return self._ids.get(self.key_func(item))
+    
+    def __contains__(self, item: str) -> bool:
+        """Check whether an item (or a duplicate of it) is stored."""
+        self.expire()
+        return self.key_func(item) in self._ids
     
     def get_all(self) -> list[str]:
         """
         Retrieve all memory items.
         
         Returns:
-            List of all stored items
+            List of all stored items (a copy you may change)
+        """
+        self.expire()
+        return list(self._texts.values())
+    
+    def view(self) -> Iterable[str]:
+        """
+        Read-only view of all items, oldest first, without copying.
+        
+        The view is live: it reflects later adds and removes, and must not
+        be iterated while memory is being changed.
+        
+        Returns:
+            Iterable over the stored items
         """
-        return self.items.copy()
+        self.expire()
+        return self._texts.values()
+    
+    def __iter__(self):
+        """Iterate over items, oldest first, without copying."""
+        return iter(self.view())
     
     def get_recent(self, n: int = 5) -> list[str]:
         """
@@ -48,29 +245,180 @@ class Memory:
         Returns:
             List of recent items
         """
-        return self.items[-n:] if self.items else []
+        if n <= 0:
+            return []
+        self.expire()
+        # Walk back from the newest item instead of copying everything
+        recent = list(islice(reversed(self._texts.values()), n))
+        recent.reverse()
+        return recent
+    
+    def get_oldest(self, n: int = 5) -> list[str]:
+        """
+        Get the n oldest memory items.
+        
+        Args:
+            n: Number of items to retrieve
+        
+        Returns:
+            List of the oldest items, oldest first
+        """
+        self.expire()
+        return list(islice(self._texts.values(), max(n, 0)))
     
-    def search(self, query: str) -> list[str]:
+    def search(self, query: str, top_k: int | None = None) -> list[str]:
         """
-        Simple search through memory items.
+        Find the memory items most relevant to a query.
         
         Args:
-            query: String to search for
+            query: Words to search for
+            top_k: Maximum number of items (None = all matches)
             
         Returns:
-            List of items containing the query
+            Items sharing words with the query, most relevant first
+        """
+        ranked = self.rank_with_ids(query, top_k)
+        self._touch(item_id for item_id, _, _ in ranked)
+        return [item for _, item, _ in ranked]
+    
+    def rank(self, query: str, top_k: int | None = None) -> list[tuple[str, float]]:
+        """
+        Score memory items against a query.
+        
+        Queries without any indexable words (only punctuation or very
+        common words) fall back to a case-insensitive substring match.
+        
+        Args:
+            query: Words to search for
+            top_k: Maximum number of items (None = all matches)
+        
+        Returns:
+            List of (item, BM25 score), best first
+        """
+        self.expire()
+        if not tokenize(query):
+            query_lower = query.lower()
+            matches = [(item, 0.0) for item in self._texts.values() if query_lower in item.lower()]
+            return matches[:top_k] if top_k is not None else matches
+        
+        return [(self._texts[item_id], score) for item_id, score in self._index.search(query, top_k)]
+    
+    def select(
+        self,
+        query: str,
+        top_k: int = 8,
+        max_tokens: int = 256,
+        recency_weight: float = 0.3,
+        fallback_recent: int = 3
+    ) -> list[str]:
+        """
+        Pick the items worth putting in a prompt for this query.
+        
+        Items are ranked by relevance (scaled so the best match is 1.0)
+        plus a bonus of up to recency_weight for newer items, so a fresh
+        fact beats an equally relevant stale one. The best are taken until
+        top_k items or max_tokens are reached. If nothing is relevant, the
+        most recent items are used instead.
+        
+        Cost depends on how many items match the query, not on how many
+        are stored, so prompts stay the same size however long a session runs.
+        
+        Args:
+            query: The current user input
+            top_k: Maximum number of items
+            max_tokens: Approximate token budget for all selected items
+            recency_weight: Bonus for the newest item (older items get less)
+            fallback_recent: Recent items to use when nothing matches
+        
+        Returns:
+            Selected items, oldest first
+        """
+        self.expire()
+        id_range = self._id_range()
+        if id_range is None or top_k <= 0:
+            return []
+        
+        ranked = self._rank_with_ids(query, top_k * 4)
+        if not ranked:
+            ranked = [(item_id, item, 0.0) for item_id, item in self._recent_with_ids(fallback_recent)]
+        
+        first_id, last_id = id_range
+        span = max(1, last_id - first_id)
+        best_score = max(score for _, _, score in ranked) or 1.0
+        
+        candidates = []
+        for item_id, item, score in ranked:
+            recency = (item_id - first_id) / span
+            candidates.append((score / best_score + recency_weight * recency, item_id, item))
+        candidates.sort(reverse=True)
+        
+        selected = []
+        used = 0
+        for _, item_id, item in candidates:
+            cost = estimate_tokens(item)
+            if used + cost > max_tokens:
+                continue
+            selected.append((item_id, item))
+            used += cost
+            if len(selected) == top_k:
+                break
+        
+        selected.sort()
+        self._touch(item_id for item_id, _ in selected)
+        return [item for _, item in selected]
+    
+    def rank_with_ids(self, query: str, top_k: int | None = None) -> list[tuple[int, str, float]]:
+        """
+        Score memory items against a query, with each item's id.
+        
+        Ids grow with insertion order, so sorting by id puts the oldest
+        item first. Unlike search(), this doesn't count as using the items.
+        
+        Args:
+            query: Words to search for
+            top_k: Maximum number of items (None = all matches)
+        
+        Returns:
+            List of (id, item, score), best first
         """
-        query_lower = query.lower()
-        return [item for item in self.items if query_lower in item.lower()]
+        self.expire()
+        return self._rank_with_ids(query, top_k)
+    
+    def _rank_with_ids(self, query: str, limit: int | None) -> list[tuple[int, str, float]]:
+        """rank(), with each item's id (ids grow with insertion order)."""
+        return [(self._ids[self.key_func(item)], item, score) for item, score in self.rank(query, limit)]
+    
+    def _all_with_ids(self) -> Iterable[tuple[int, str]]:
+        """Every (id, item) pair, oldest first."""
+        return list(self._texts.items())
+    
+    def _all_with_ages(self) -> Iterable[tuple[int, str, float]]:
+        """Every (id, item, seconds since stored) triple, oldest first (ages unknown here: 0.0)."""
+        return [(item_id, item, 0.0) for item_id, item in self._all_with_ids()]
+    
+    def _recent_with_ids(self, n: int) -> list[tuple[int, str]]:
+        """The n newest (id, item) pairs, newest first."""
+        return list(islice(reversed(self._texts.items()), n)) if n > 0 else []
+    
+    def _id_range(self) -> tuple[int, int] | None:
+        """Ids of the oldest and newest item (None when empty)."""
+        if not self._texts:
+            return None
+        return next(iter(self._texts)), next(reversed(self._texts))
     
     def clear(self):
         """Clear all memory."""
-        self.items = []
+        self._ids = {}
+        self._texts = {}
+        self._index.clear()
+        if self.policy is not None:
+            self.policy.clear()
+        self.version += 1
     
     def __len__(self) -> int:
         """Return the number of items in memory."""
-        return len(self.items)
+        return len(self._texts)
     
     def __repr__(self) -> str:
         """String representation of memory."""
-        return f"Memory({len(self.items)} items)"
\ No newline at end of file
+        return f"Memory({len(self._texts)} items)"
\ No newline at end of file
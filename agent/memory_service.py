@@ -0,0 +1,308 @@
+"""
+Memory service - one memory per tenant, safe to share between threads.
+
+A server handling many users can't keep one Memory per user in a plain
+dict: Memory has no locking, and the dict grows with every user ever seen.
+
+MemoryService:
+- keeps each tenant's Memory behind a lock (lock striping: a fixed pool of
+  locks, tenant -> lock by hash, so memory for locks doesn't grow with
+  tenants and unrelated tenants rarely wait on each other)
+- keeps at most max_resident tenants in RAM, spilling the least recently
+  used one to SQLite and loading it back on its next request (each lock
+  stripe keeps one connection to the file and reuses it for every tenant
+  it guards)
+- counts reads, writes, loads and spills per tenant
+"""
+
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Iterator
+
+from agent.memory import Memory
+from agent.sqlite_memory import SQLiteMemory
+
+
+@dataclass
+class TenantStats:
+    """Usage counters for one tenant (kept while the tenant is spilled)."""
+    reads: int = 0
+    writes: int = 0
+    loads: int = 0
+    spills: int = 0
+    items: int = 0
+    chars: int = 0
+    resident: bool = False
+    
+    def to_dict(self) -> dict:
+        """Export stats as dictionary."""
+        return {
+            "items": self.items,
+            "chars": self.chars,
+            "resident": self.resident,
+            "reads": self.reads,
+            "writes": self.writes,
+            "loads": self.loads,
+            "spills": self.spills,
+        }
+
+
+class MemoryService:
+    """
+    Thread-safe, multi-tenant memory.
+    
+    Usage:
+        service = MemoryService("memory.db", max_resident=1000)
+        service.add("alice", "User prefers dark mode")
+        service.select("alice", "What's my display preference?")
+        
+        # Several operations as one unit:
+        with service.locked("alice") as memory:
+            if "User is new" in memory:
+                memory.remove("User is new")
+    
+    Without a store_path nothing can be spilled, so every tenant stays
+    resident. Don't call the service from inside a locked() block: holding
+    one tenant's lock while waiting for another's can deadlock.
+    """
+    
+    def __init__(
+        self,
+        store_path: str | None = None,
+        max_resident: int = 1000,
+        stripes: int = 64,
+        memory_factory: Callable[[], Memory] = Memory
+    ):
+        """
+        Initialize the service.
+        
+        Args:
+            store_path: SQLite file tenants are spilled to (None = never spill)
+            max_resident: Most tenants kept in RAM
+            stripes: Number of tenant locks
+            memory_factory: Creates the in-RAM memory for a tenant
+        """
+        self.store_path = store_path
+        self.max_resident = max_resident
+        self.memory_factory = memory_factory
+        
+        self._locks = [threading.RLock() for _ in range(stripes)]
+        self._stores: list[SQLiteMemory | None] = [None] * stripes   # Per stripe, opened on first spill/load
+        self._registry_lock = threading.Lock()                   # Guards the dicts below
+        self._resident: OrderedDict[str, Memory] = OrderedDict()  # Least recently used first
+        self._stats: dict[str, TenantStats] = {}
+        self._loaded_version: dict[str, int] = {}                # Memory version when loaded/spilled
+    
+    def _stripe(self, tenant: str) -> int:
+        """Index of the stripe a tenant belongs to."""
+        return hash(tenant) % len(self._locks)
+    
+    def _lock_for(self, tenant: str) -> threading.RLock:
+        """The stripe lock guarding a tenant."""
+        return self._locks[self._stripe(tenant)]
+    
+    def _store_for(self, tenant: str) -> SQLiteMemory:
+        """The tenant's stripe's store, switched to the tenant's namespace (tenant lock held)."""
+        stripe = self._stripe(tenant)
+        store = self._stores[stripe]
+        if store is None:
+            store = self._stores[stripe] = SQLiteMemory(self.store_path, namespace=tenant)
+        elif store.namespace != tenant:
+            store.use_namespace(tenant)
+        return store
+    
+    def _stats_for(self, tenant: str) -> TenantStats:
+        """Counters for a tenant, created on first use."""
+        with self._registry_lock:
+            return self._stats.setdefault(tenant, TenantStats())
+    
+    # ------------------------------------------------------------
+    # Residency
+    # ------------------------------------------------------------
+    
+    def _get_resident(self, tenant: str) -> Memory:
+        """Return a tenant's memory, loading it from the store if needed (tenant lock held)."""
+        with self._registry_lock:
+            memory = self._resident.get(tenant)
+            if memory is not None:
+                self._resident.move_to_end(tenant)
+                return memory
+        
+        memory = self.memory_factory()
+        stats = self._stats_for(tenant)
+        if self.store_path is not None:
+            items = self._store_for(tenant).get_all()
+            if items:
+                memory.add_many(items)
+                stats.loads += 1
+        
+        with self._registry_lock:
+            self._resident[tenant] = memory
+            self._loaded_version[tenant] = memory.version
+            stats.resident = True
+        return memory
+    
+    def _spill(self, tenant: str, memory: Memory):
+        """Write a tenant's memory to the store if it changed (tenant lock held)."""
+        if memory.version == self._loaded_version.get(tenant):
+            return
+        # One transaction: a failure keeps the previously spilled items
+        self._store_for(tenant).replace_all(memory.view())
+        self._loaded_version[tenant] = memory.version
+        self._stats_for(tenant).spills += 1
+    
+    def _evict_over_capacity(self):
+        """Spill least recently used tenants until within max_resident (no tenant lock held)."""
+        if self.store_path is None:
+            return
+        while True:
+            with self._registry_lock:
+                if len(self._resident) <= self.max_resident:
+                    return
+                victim = next(iter(self._resident))
+            
+            # Taking the victim's lock means nobody is using it while it's
+            # written out, and anyone who wants it next waits for the write
+            with self._lock_for(victim):
+                with self._registry_lock:
+                    memory = self._resident.get(victim)
+                    if memory is None or next(iter(self._resident)) != victim:
+                        continue
+                self._spill(victim, memory)
+                with self._registry_lock:
+                    del self._resident[victim]
+                    self._loaded_version.pop(victim, None)
+                    stats = self._stats[victim]
+                    stats.resident = False
+                    stats.items = len(memory)
+                    stats.chars = sum(len(item) for item in memory.view())
+    
+    @contextmanager
+    def locked(self, tenant: str, write: bool = True) -> Iterator[Memory]:
+        """
+        Use a tenant's memory exclusively.
+        
+        Args:
+            tenant: Tenant id
+            write: Count this as a write (False = a read)
+        
+        Yields:
+            The tenant's Memory (only use it inside the with block)
+        """
+        with self._lock_for(tenant):
+            memory = self._get_resident(tenant)
+            stats = self._stats_for(tenant)
+            try:
+                yield memory
+            finally:
+                if write:
+                    stats.writes += 1
+                else:
+                    stats.reads += 1
+                stats.items = len(memory)
+        self._evict_over_capacity()
+    
+    # ------------------------------------------------------------
+    # Memory operations
+    # ------------------------------------------------------------
+    
+    def add(self, tenant: str, item: str):
+        """Add an item to a tenant's memory."""
+        with self.locked(tenant) as memory:
+            memory.add(item)
+    
+    def add_many(self, tenant: str, items: list[str]):
+        """Add several items to a tenant's memory."""
+        with self.locked(tenant) as memory:
+            memory.add_many(items)
+    
+    def remove(self, tenant: str, item: str) -> bool:
+        """Remove an item from a tenant's memory."""
+        with self.locked(tenant) as memory:
+            return memory.remove(item)
+    
+    def clear(self, tenant: str):
+        """Clear a tenant's memory."""
+        with self.locked(tenant) as memory:
+            memory.clear()
+    
+    def get_all(self, tenant: str) -> list[str]:
+        """All of a tenant's items, oldest first."""
+        with self.locked(tenant, write=False) as memory:
+            return memory.get_all()
+    
+    def get_recent(self, tenant: str, n: int = 5) -> list[str]:
+        """A tenant's n most recent items."""
+        with self.locked(tenant, write=False) as memory:
+            return memory.get_recent(n)
+    
+    def search(self, tenant: str, query: str, top_k: int | None = None) -> list[str]:
+        """Search a tenant's memory (see Memory.search)."""
+        with self.locked(tenant, write=False) as memory:
+            return memory.search(query, top_k)
+    
+    def select(self, tenant: str, query: str, **kwargs) -> list[str]:
+        """Pick a tenant's items for a prompt (see Memory.select)."""
+        with self.locked(tenant, write=False) as memory:
+            return memory.select(query, **kwargs)
+    
+    # ------------------------------------------------------------
+    # Maintenance and metrics
+    # ------------------------------------------------------------
+    
+    def flush(self):
+        """Write every changed resident tenant to the store (they stay resident)."""
+        if self.store_path is None:
+            return
+        with self._registry_lock:
+            tenants = list(self._resident)
+        for tenant in tenants:
+            with self._lock_for(tenant):
+                with self._registry_lock:
+                    memory = self._resident.get(tenant)
+                if memory is not None:
+                    self._spill(tenant, memory)
+    
+    def close(self):
+        """Write every changed resident tenant to the store and close its connections."""
+        self.flush()
+        for stripe, lock in enumerate(self._locks):
+            with lock:
+                store, self._stores[stripe] = self._stores[stripe], None
+                if store is not None:
+                    store.close()
+    
+    def metrics(self, tenant: str | None = None) -> dict:
+        """
+        Get size and usage metrics.
+        
+        Args:
+            tenant: One tenant's metrics (None = all tenants seen)
+        
+        Returns:
+            Metrics dict for the tenant, or {tenant: metrics} for all
+        """
+        if tenant is not None:
+            with self._lock_for(tenant):
+                with self._registry_lock:
+                    memory = self._resident.get(tenant)
+                stats = self._stats_for(tenant)
+                if memory is not None:
+                    stats.items = len(memory)
+                    stats.chars = sum(len(item) for item in memory.view())
+                return stats.to_dict()
+        
+        with self._registry_lock:
+            tenants = list(self._stats)
+        return {name: self.metrics(name) for name in tenants}
+    
+    def get_stats(self) -> dict:
+        """Get service-wide counters as dictionary."""
+        with self._registry_lock:
+            return {"tenants": len(self._stats), "resident": len(self._resident), "max_resident": self.max_resident}
+    
+    def __repr__(self) -> str:
+        """String representation of the service."""
+        return f"MemoryService({len(self._resident)} resident of {len(self._stats)} tenants)"
@@ -0,0 +1,207 @@
+"""
+Deferred memory writes.
+
+Saving a fact can be slow: SemanticMemory embeds it, SQLiteMemory writes
+it to disk. Doing that inside run_with_memory puts it between the model's
+reply and the user.
+
+MemoryWriter takes writes off that path: put() only queues the item, and
+a background thread applies queued items in batches with add_many (one
+embedding call, one transaction). Before reading memory again, the agent
+calls sync(), which waits for anything still queued - so a session always
+sees its own writes, but usually finds the queue already empty because
+the user took longer to reply than the write did.
+
+A batch that fails to write is not retried. The next sync() or close()
+raises MemoryWriteError with the lost items, so the failure surfaces in
+the caller instead of only in the stats.
+"""
+
+import threading
+import time
+from contextlib import AbstractContextManager
+
+from agent.memory import Memory
+
+
+class MemoryWriteError(RuntimeError):
+    """Queued memory items could not be written."""
+    
+    def __init__(self, items: list[str], error: Exception):
+        """
+        Initialize with what was lost.
+        
+        Args:
+            items: Items from every batch that failed since the last report
+            error: The most recent failure
+        """
+        super().__init__(f"{len(items)} memory writes failed: {type(error).__name__}: {error}")
+        self.items = items
+        self.error = error
+
+
+class MemoryWriter:
+    """
+    Background writer that applies memory adds in batches.
+    
+    Usage:
+        writer = MemoryWriter(agent.memory)
+        writer.put("User prefers dark mode")   # Returns immediately
+        writer.sync()                          # Before reading memory
+        writer.close()
+    
+    Writes hold `lock`; anything else that changes the same memory from
+    another thread (e.g. a MemoryCompactor) should hold it too.
+    """
+    
+    def __init__(
+        self,
+        memory: Memory,
+        batch_size: int = 32,
+        linger: float = 0.01,
+        lock: AbstractContextManager | None = None
+    ):
+        """
+        Start the writer thread.
+        
+        Args:
+            memory: Memory to write to
+            batch_size: Most items applied per add_many call
+            linger: Seconds to wait for more items before writing a partial batch
+            lock: Lock held while writing (default: a new RLock)
+        """
+        self.memory = memory
+        self.batch_size = batch_size
+        self.linger = linger
+        self.lock = lock if lock is not None else threading.RLock()
+        
+        self.written = 0
+        self.batches = 0
+        self.errors = 0
+        self.last_error: Exception | None = None
+        self._failed: list[str] = []       # Items lost since the last sync/close raised
+        
+        self._queue: list[str] = []
+        self._in_flight = 0
+        self._closed = False
+        self._changed = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def put(self, item: str):
+        """
+        Queue an item to be added to memory.
+        
+        Args:
+            item: String to remember
+        """
+        if not item:
+            return
+        with self._changed:
+            if self._closed:
+                raise RuntimeError("MemoryWriter is closed")
+            self._queue.append(item)
+            self._changed.notify_all()
+    
+    def pending(self) -> list[str]:
+        """Items queued but not yet being written (a copy)."""
+        with self._changed:
+            return list(self._queue)
+    
+    def sync(self, timeout: float | None = None) -> bool:
+        """
+        Wait until every queued item has been written.
+        
+        Args:
+            timeout: Seconds to wait at most (None = no limit)
+        
+        Returns:
+            True if the queue is empty, False if the timeout ran out first
+        
+        Raises:
+            MemoryWriteError: If a batch failed to write since the last
+                sync() or close() (each failure is raised once)
+        """
+        with self._changed:
+            done = self._changed.wait_for(lambda: not self._queue and not self._in_flight, timeout)
+        self._raise_failures()
+        return done
+    
+    def _raise_failures(self):
+        """Raise MemoryWriteError for batches that failed since the last call."""
+        with self._changed:
+            failed, self._failed = self._failed, []
+            error = self.last_error
+        if failed:
+            raise MemoryWriteError(failed, error) from error
+    
+    def _next_batch(self) -> list[str] | None:
+        """Wait for items and take up to batch_size of them (None = shut down)."""
+        with self._changed:
+            self._changed.wait_for(lambda: self._queue or self._closed)
+            if not self._queue:
+                return None
+            
+            # Give a burst of writes a moment to arrive, so they share a batch
+            deadline = time.monotonic() + self.linger
+            while len(self._queue) < self.batch_size and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._changed.wait(remaining)
+            
+            batch = self._queue[:self.batch_size]
+            del self._queue[:self.batch_size]
+            self._in_flight = len(batch)
+            return batch
+    
+    def _run(self):
+        """Writer thread body."""
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                with self.lock:
+                    self.memory.add_many(batch)
+                self.written += len(batch)
+            except Exception as e:
+                # Keep the writer alive; the next sync() or close() raises it
+                with self._changed:
+                    self.errors += 1
+                    self.last_error = e
+                    self._failed.extend(batch)
+            finally:
+                with self._changed:
+                    self._in_flight = 0
+                    self.batches += 1
+                    self._changed.notify_all()
+    
+    def close(self, timeout: float | None = None):
+        """
+        Write everything still queued and stop the thread.
+        
+        Args:
+            timeout: Seconds to wait for the thread
+        
+        Raises:
+            MemoryWriteError: If a batch failed to write and wasn't reported
+                by sync() yet
+        """
+        with self._changed:
+            self._closed = True
+            self._changed.notify_all()
+        self._thread.join(timeout)
+        self._raise_failures()
+    
+    def get_stats(self) -> dict:
+        """Get writer counters as dictionary."""
+        with self._changed:
+            queued = len(self._queue) + self._in_flight
+        return {
+            "written": self.written,
+            "batches": self.batches,
+            "queued": queued,
+            "errors": self.errors,
+            "last_error": str(self.last_error) if self.last_error else None,
+        }
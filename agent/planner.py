@@ -5,7 +5,8 @@ Planning is data generation, not reasoning.
 Plans are inspectable, modifiable data structures.
 """
 
-from shared.llm import LocalLLM
+from shared.llm import LocalLLM, Deadline
+from agent.contracts import generate_validated, PLAN, ATOMIC_ACTION, AOT_GRAPH, AOT_NODE
 
 
 def create_plan(llm: LocalLLM, goal: str) -> dict | None:
@@ -21,8 +22,6 @@ def create_plan(llm: LocalLLM, goal: str) -> dict | None:
     Returns:
         Plan as a dictionary with a "steps" list, or None if generation failed
     """
-    from shared.utils import extract_json_from_text
-    
     prompt = f"""Create a step-by-step plan to achieve the goal. Respond with ONLY valid JSON.
 
 CRITICAL INSTRUCTIONS:
@@ -37,17 +36,11 @@ Goal: {goal}
 
 Response (JSON only):"""
     
-    for attempt in range(3):
-        response = llm.generate(prompt, temperature=0.0)
-        plan = extract_json_from_text(response)
-        
-        if plan and "steps" in plan and isinstance(plan["steps"], list):
-            return plan
-    
-    return None
+    plan, _ = generate_validated(llm, prompt, PLAN)
+    return plan
 
 
-def create_atomic_action(llm: LocalLLM, step: str) -> dict | None:
+def create_atomic_action(llm: LocalLLM, step: str, deadline: Deadline | None = None) -> dict | None:
     """
     Convert a plan step into an atomic action.
     
@@ -56,12 +49,11 @@ def create_atomic_action(llm: LocalLLM, step: str) -> dict | None:
     Args:
         llm: The language model to use
         step: A step from a plan
+        deadline: Optional deadline; generation is aborted when it expires
         
     Returns:
         Atomic action as a dictionary, or None if generation failed
     """
-    from shared.utils import extract_json_from_text
-    
     prompt = f"""Convert this step into an atomic action. Respond with ONLY valid JSON.
 
 CRITICAL INSTRUCTIONS:
@@ -83,14 +75,8 @@ Step to convert:
 
 Response (JSON only):"""
     
-    for attempt in range(3):
-        response = llm.generate(prompt, temperature=0.0)
-        action = extract_json_from_text(response)
-        
-        if action and "action" in action:
-            return action
-    
-    return None
+    action, _ = generate_validated(llm, prompt, ATOMIC_ACTION, deadline=deadline)
+    return action
 
 
 def create_aot_graph(llm: LocalLLM, goal: str) -> dict | None:
@@ -106,8 +92,6 @@ def create_aot_graph(llm: LocalLLM, goal: str) -> dict | None:
     Returns:
         AoT graph with nodes and dependencies, or None if generation failed
     """
-    from shared.utils import extract_json_from_text
-    
     prompt = f"""Create an atomic execution graph for the goal. Each node is a single action. Dependencies are node IDs. Respond with ONLY valid JSON.
 
 CRITICAL INSTRUCTIONS:
@@ -127,43 +111,50 @@ Goal: {goal}
 
 Response (JSON only):"""
     
-    for attempt in range(3):
-        response = llm.generate(prompt, temperature=0.0)
-        graph = extract_json_from_text(response)
-        
-        if graph and "nodes" in graph and isinstance(graph["nodes"], list):
-            # Validate graph structure
-            valid_nodes = []
-            for node in graph["nodes"]:
-                if isinstance(node, dict) and "id" in node and "action" in node and "depends_on" in node:
-                    # Ensure depends_on is a list
-                    if not isinstance(node["depends_on"], list):
-                        continue
-                    valid_nodes.append(node)
-            
-            if valid_nodes:
-                return {"nodes": valid_nodes}
+    # AOT_GRAPH requires at least one well-formed node
+    graph, _ = generate_validated(llm, prompt, AOT_GRAPH)
+    if graph is None:
+        return None
     
-    return None
+    # Keep the well-formed nodes, drop the rest
+    return {"nodes": [node for node in graph["nodes"] if AOT_NODE.is_valid(node)]}
 
 
-def execute_graph(graph: dict, executor_func) -> list:
+def execute_graph(
+    graph: dict,
+    executor_func,
+    deadline: Deadline | None = None,
+    completed: list | None = None,
+    on_result=None
+) -> list:
     """
     Execute an AoT graph respecting dependencies.
     
+    If the deadline expires, no further nodes are started. A node whose
+    executor raises TimeoutError once the deadline has expired was cut off
+    part-way: like the nodes that never started, it is reported with
+    "timed_out": True and is not passed to on_result, so callers can tell
+    a partial run from a failed one and a resumed run executes it again.
+    
     Args:
         graph: AoT graph with nodes and dependencies
         executor_func: Function to execute each action (takes action string)
+        deadline: Optional deadline for the whole graph
+        completed: Results of nodes already executed by an earlier run
+            (they are not executed again)
+        on_result: Optional callback given each new node result as soon
+            as it exists (e.g. to checkpoint progress)
         
     Returns:
-        List of execution results in order
+        List of execution results in order (completed ones first)
     """
     if not graph or "nodes" not in graph:
         return []
     
     nodes = graph["nodes"]
-    executed = set()
-    results = []
+    results = list(completed or [])
+    executed = {result["node_id"] for result in results}
+    interrupted = {}
     
     # Simple topological execution
     # In a real implementation, this would be more sophisticated
@@ -180,6 +171,10 @@ def execute_graph(graph: dict, executor_func) -> list:
             if node_id in executed:
                 continue
             
+            # Stop scheduling new nodes once time is up
+            if deadline is not None and deadline.expired():
+                break
+            
             # Check if all dependencies are met
             dependencies = node.get("depends_on", [])
             if all(dep in executed for dep in dependencies):
@@ -194,6 +189,12 @@ def execute_graph(graph: dict, executor_func) -> list:
                     })
                     executed.add(node_id)
                 except Exception as e:
+                    if isinstance(e, TimeoutError) and deadline is not None and deadline.expired():
+                        # Cut off part-way: the node did not complete, so it is
+                        # neither marked executed nor passed to on_result, and
+                        # a resumed run starts it again
+                        interrupted[node_id] = str(e)
+                        break
                     results.append({
                         "node_id": node_id,
                         "action": node["action"],
@@ -202,5 +203,22 @@ def execute_graph(graph: dict, executor_func) -> list:
                     })
                     # Mark as executed even on failure to avoid infinite loops
                     executed.add(node_id)
+                
+                if on_result is not None:
+                    on_result(results[-1])
+        
+        if deadline is not None and deadline.expired():
+            break
+    
+    if deadline is not None and deadline.expired():
+        for node in nodes:
+            if node["id"] not in executed:
+                results.append({
+                    "node_id": node["id"],
+                    "action": node["action"],
+                    "error": interrupted.get(node["id"], "Deadline exceeded before execution"),
+                    "success": False,
+                    "timed_out": True
+                })
     
     return results
\ No newline at end of file
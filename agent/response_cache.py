@@ -0,0 +1,227 @@
+"""
+Semantic response cache.
+
+Many user questions are rephrasings of the same thing ("How do I reset my
+password?" / "password reset how?"). Instead of running a full generation
+for each, the question is embedded and compared with questions answered
+before. If one is similar enough, its answer is returned.
+
+This is a cache, not memory: entries expire, the oldest are evicted, and
+nothing here is ever shown to the model.
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+
+from shared.vector_index import VectorIndex
+
+
+@dataclass
+class CacheEntry:
+    """One cached question and its answer."""
+    question: str
+    answer: str
+    scope: str
+    created_at: float
+    hits: int = 0
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters for the cache."""
+    hits: int = 0
+    exact_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups answered from the cache (0.0 to 1.0)."""
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+    
+    def to_dict(self) -> dict:
+        """Export stats as dictionary."""
+        return {
+            "hits": self.hits,
+            "exact_hits": self.exact_hits,
+            "misses": self.misses,
+            "hit_rate": f"{self.hit_rate:.2%}",
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class SemanticCache:
+    """
+    Answer near-duplicate questions from earlier answers.
+    
+    Usage:
+        cache = SemanticCache(llm.embed, threshold=0.92)
+        answer = cache.lookup(question)
+        if answer is None:
+            answer = generate(question)
+            cache.store(question, answer)
+    
+    Entries are only matched within the same scope. Use a scope for
+    anything the answer depends on besides the question (for example the
+    memory it was generated with). Each scope has its own vector index, so
+    near matches from other scopes never take up a lookup's candidates.
+    """
+    
+    def __init__(
+        self,
+        embed: Callable[[list[str]], np.ndarray],
+        threshold: float = 0.92,
+        max_entries: int = 1024,
+        ttl_seconds: float | None = 3600.0,
+        candidates: int = 4
+    ):
+        """
+        Initialize an empty cache.
+        
+        Args:
+            embed: Function that embeds a batch of texts (e.g. LocalLLM.embed)
+            threshold: Minimum cosine similarity for a hit
+            max_entries: Oldest-used entries are evicted beyond this
+            ttl_seconds: Entries older than this are never returned (None = forever)
+            candidates: Nearest neighbours to check for an entry that hasn't expired
+        """
+        self.embed = embed
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.candidates = candidates
+        self.stats = CacheStats()
+        
+        self._entries: OrderedDict[int, CacheEntry] = OrderedDict()  # Least recently used first
+        self._exact: dict[tuple, int] = {}                           # (scope, question) -> entry id
+        self._indexes: dict[str, VectorIndex] = {}                   # Scope -> its entries' vectors
+        self._next_id = 0
+        self._last_embedded: tuple[str, np.ndarray] | None = None
+    
+    @staticmethod
+    def _normalize(question: str) -> str:
+        """Fold case and whitespace so trivially different questions match exactly."""
+        return " ".join(question.lower().split())
+    
+    def _vector(self, question: str) -> np.ndarray:
+        """Embed a question, reusing the vector from the previous lookup."""
+        if self._last_embedded is not None and self._last_embedded[0] == question:
+            return self._last_embedded[1]
+        vector = self.embed([question])[0]
+        self._last_embedded = (question, vector)
+        return vector
+    
+    def _expired(self, entry: CacheEntry, now: float) -> bool:
+        """Check whether an entry has outlived its TTL."""
+        return self.ttl_seconds is not None and now - entry.created_at > self.ttl_seconds
+    
+    def _remove(self, entry_id: int):
+        """Drop an entry from every structure."""
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        self._exact.pop((entry.scope, self._normalize(entry.question)), None)
+        index = self._indexes[entry.scope]
+        index.remove(entry_id)
+        if len(index) == 0:
+            # Scopes come and go (e.g. one per memory version)
+            del self._indexes[entry.scope]
+    
+    def _hit(self, entry_id: int, entry: CacheEntry) -> str:
+        """Record a hit and return the cached answer."""
+        entry.hits += 1
+        self._entries.move_to_end(entry_id)
+        self.stats.hits += 1
+        return entry.answer
+    
+    def lookup(self, question: str, scope: str = "") -> str | None:
+        """
+        Find a cached answer for this question or a close rephrasing.
+        
+        Args:
+            question: The user's input
+            scope: Only entries stored with the same scope can match
+        
+        Returns:
+            The cached answer, or None on a miss
+        """
+        now = time.time()
+        
+        # Identical question (after case/whitespace folding): no embedding needed
+        entry_id = self._exact.get((scope, self._normalize(question)))
+        if entry_id is not None:
+            entry = self._entries[entry_id]
+            if not self._expired(entry, now):
+                self.stats.exact_hits += 1
+                return self._hit(entry_id, entry)
+            self._remove(entry_id)
+            self.stats.expirations += 1
+        
+        index = self._indexes.get(scope)
+        if index is not None:
+            for entry_id, score in index.search(self._vector(question), self.candidates):
+                if score < self.threshold:
+                    break
+                entry = self._entries[entry_id]
+                if self._expired(entry, now):
+                    self._remove(entry_id)
+                    self.stats.expirations += 1
+                    continue
+                return self._hit(entry_id, entry)
+        
+        self.stats.misses += 1
+        return None
+    
+    def store(self, question: str, answer: str, scope: str = ""):
+        """
+        Cache an answer.
+        
+        Args:
+            question: The user's input
+            answer: The answer that was generated for it
+            scope: Scope the answer is valid in
+        """
+        key = (scope, self._normalize(question))
+        if key in self._exact:
+            self._remove(self._exact[key])
+        
+        vector = self._vector(question)
+        index = self._indexes.get(scope)
+        if index is None:
+            index = self._indexes[scope] = VectorIndex(dim=len(vector))
+        
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = CacheEntry(question, answer, scope, time.time())
+        self._exact[key] = entry_id
+        index.add(entry_id, vector)
+        
+        while len(self._entries) > self.max_entries:
+            oldest_id = next(iter(self._entries))
+            self._remove(oldest_id)
+            self.stats.evictions += 1
+    
+    def clear(self):
+        """Drop all entries (stats are kept)."""
+        self._entries.clear()
+        self._exact.clear()
+        self._indexes.clear()
+    
+    def get_stats(self) -> dict:
+        """Get hit-rate metrics as dictionary."""
+        return {**self.stats.to_dict(), "entries": len(self._entries)}
+    
+    def __len__(self) -> int:
+        """Return the number of cached entries."""
+        return len(self._entries)
+    
+    def __repr__(self) -> str:
+        """String representation of the cache."""
+        return f"SemanticCache({len(self._entries)} entries, hit_rate={self.stats.hit_rate:.0%})"
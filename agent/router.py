@@ -0,0 +1,192 @@
+"""
+Fast-path router - answer obvious tool requests without the model.
+
+"What is 42 * 7?" has exactly one correct tool call, and a regular
+expression finds it in microseconds. Asking the model for it costs a full
+generation (and can still go wrong).
+
+The router runs before request_tool:
+- exact intents: known inputs mapped straight to a tool call
+- rules: compiled patterns that build a tool call from a match
+  (built in: "<number> <operator> <number>" arithmetic)
+
+Only unambiguous inputs are routed. Anything else - "If I have 15 apples
+and buy 27 more..." - misses and goes to the model as before.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Container
+
+
+def _number(text: str) -> int | float:
+    """Parse a matched number, keeping integers as int."""
+    return float(text) if "." in text else int(text)
+
+
+# Operator words and symbols -> calculator operation. Words (and "x")
+# must have whitespace on both sides, so "0x10" or "2x" is never routed
+OPERATORS = {
+    "+": "add",
+    "plus": "add",
+    "-": "subtract",
+    "minus": "subtract",
+    "*": "multiply",
+    "x": "multiply",
+    "×": "multiply",
+    "times": "multiply",
+    "multiplied by": "multiply",
+    "/": "divide",
+    "÷": "divide",
+    "divided by": "divide",
+}
+
+_NUMBER = r"(-?\d+(?:\.\d+)?)"
+_SYMBOL = "|".join(re.escape(op) for op in OPERATORS if not op[0].isalpha())
+_WORD = "|".join(
+    r"\s+".join(op.split()) for op in sorted(OPERATORS, key=len, reverse=True) if op[0].isalpha()
+)
+
+# "What is 42 * 7?", "Calculate 100 + 50", "50 minus 25" - the whole input,
+# exactly two numbers and one operator
+ARITHMETIC = re.compile(
+    rf"(?:(?:what(?:'s|\s+is)|calculate|compute|evaluate|how\s+much\s+is)\s+)?"
+    rf"{_NUMBER}(?:\s*({_SYMBOL})\s*|\s+({_WORD})\s+){_NUMBER}\s*[?.!=]*",
+    re.IGNORECASE,
+)
+
+
+def arithmetic_call(match: re.Match) -> dict:
+    """Build a calculator call from an ARITHMETIC match."""
+    a, symbol, word, b = match.groups()
+    operator = symbol or " ".join(word.lower().split())
+    return {
+        "tool": "calculator",
+        "arguments": {"a": _number(a), "b": _number(b), "operation": OPERATORS[operator]},
+    }
+
+
+@dataclass
+class RouterStats:
+    """Hit counters for the router."""
+    hits: int = 0
+    misses: int = 0
+    by_route: dict[str, int] = field(default_factory=dict)
+    
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of inputs routed without the model (0.0 to 1.0)."""
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+    
+    def to_dict(self) -> dict:
+        """Export stats as dictionary."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": f"{self.hit_rate:.2%}",
+            "by_route": dict(self.by_route),
+        }
+
+
+class FastPathRouter:
+    """
+    Turn unambiguous requests into tool calls without an LLM call.
+    
+    Usage:
+        router = FastPathRouter()
+        router.route("What is 42 * 7?")
+        # {"tool": "calculator", "arguments": {"a": 42, "b": 7, "operation": "multiply"}}
+        router.route("Tell me a joke")   # None: ask the model
+        
+        router.add_intent("reset", {"tool": "reset_session", "arguments": {}})
+        router.add_rule("weather", r"weather in (\\w+)", lambda m: {"tool": "weather", "arguments": {"city": m[1]}})
+    """
+    
+    def __init__(self, tools: Container[str] | None = None):
+        """
+        Initialize the router with the built-in arithmetic rule.
+        
+        Args:
+            tools: Names of available tools; calls to other tools are
+                never routed (None = don't check)
+        """
+        self.tools = tools
+        self.stats = RouterStats()
+        self._intents: dict[str, dict] = {}
+        self._rules: list[tuple[str, re.Pattern, Callable[[re.Match], dict | None]]] = []
+        self.add_rule("arithmetic", ARITHMETIC, arithmetic_call)
+    
+    @staticmethod
+    def _normalize(text: str) -> str:
+        """Fold case, whitespace and trailing punctuation for exact intents."""
+        return " ".join(text.lower().split()).rstrip("?.! ")
+    
+    def add_intent(self, text: str, tool_call: dict):
+        """
+        Route one exact input (ignoring case, spacing and final punctuation).
+        
+        Args:
+            text: The input
+            tool_call: The call to make for it
+        """
+        self._intents[self._normalize(text)] = tool_call
+    
+    def add_rule(self, name: str, pattern: str | re.Pattern, build: Callable[[re.Match], dict | None]):
+        """
+        Route inputs that fully match a pattern.
+        
+        Rules are tried in the order they were added. The pattern must match
+        the whole input, so a rule can't fire on part of a longer request.
+        
+        Args:
+            name: Rule name (used in stats)
+            pattern: Regular expression (compiled case-insensitively if a string)
+            build: Makes the tool call from the match (None = don't route)
+        """
+        if isinstance(pattern, str):
+            pattern = re.compile(pattern, re.IGNORECASE)
+        self._rules.append((name, pattern, build))
+    
+    def _allowed(self, tool_call: dict | None) -> bool:
+        """Check a built call targets an available tool."""
+        return tool_call is not None and (self.tools is None or tool_call["tool"] in self.tools)
+    
+    def _hit(self, route: str, tool_call: dict) -> dict:
+        """Count a routed input."""
+        self.stats.hits += 1
+        self.stats.by_route[route] = self.stats.by_route.get(route, 0) + 1
+        return tool_call
+    
+    def route(self, text: str) -> dict | None:
+        """
+        Find the tool call for an input, if it's unambiguous.
+        
+        Args:
+            text: User input
+        
+        Returns:
+            {"tool": ..., "arguments": {...}}, or None to ask the model
+        """
+        tool_call = self._intents.get(self._normalize(text))
+        if self._allowed(tool_call):
+            return self._hit("intent", {"tool": tool_call["tool"], "arguments": dict(tool_call["arguments"])})
+        
+        stripped = text.strip()
+        for name, pattern, build in self._rules:
+            match = pattern.fullmatch(stripped)
+            if match is not None:
+                tool_call = build(match)
+                if self._allowed(tool_call):
+                    return self._hit(name, tool_call)
+        
+        self.stats.misses += 1
+        return None
+    
+    def get_stats(self) -> dict:
+        """Get hit-rate metrics as dictionary."""
+        return self.stats.to_dict()
+    
+    def __repr__(self) -> str:
+        """String representation of the router."""
+        return f"FastPathRouter({len(self._intents)} intents, {len(self._rules)} rules, hit_rate={self.stats.hit_rate:.0%})"
@@ -0,0 +1,144 @@
+"""
+Semantic memory - search by meaning instead of by shared words.
+
+"What's my display preference?" shares no useful word with "User prefers
+dark mode", so word-based search can't connect them. Embeddings can: the
+model maps both sentences to vectors that point in similar directions.
+
+Vectors are kept in one float32 NumPy matrix (shared.vector_index), and a
+query is a single matrix-vector product followed by a top-k selection.
+Items are not word-indexed: search never uses shared words. For
+hundreds of thousands of items, approximate=True switches to a clustered
+index (shared.ivf_index) that only scans the clusters nearest the query.
+"""
+
+from collections.abc import Iterable
+from typing import Callable
+
+import numpy as np
+
+from agent.eviction import EvictionPolicy
+from agent.memory import Memory
+from shared.ivf_index import IVFIndex
+from shared.vector_index import VectorIndex
+
+
+class SemanticMemory(Memory):
+    """
+    Memory whose search ranks items by embedding similarity.
+    
+    Everything else (dedupe, ordering, get_recent) is inherited from
+    Memory. New items are not embedded one by one: they are queued and
+    embedded in a single batch the next time a search needs them (or when
+    the queue reaches batch_size).
+    
+    Usage:
+        memory = SemanticMemory(llm.embed)
+        memory.add("User prefers dark mode")
+        memory.search("What's my display preference?", top_k=3)
+    """
+    
+    def __init__(
+        self,
+        embed: Callable[[list[str]], np.ndarray],
+        normalize: bool = False,
+        batch_size: int = 32,
+        min_score: float = 0.0,
+        approximate: bool = False,
+        max_items: int | None = None,
+        policy: EvictionPolicy | None = None,
+        low_water: float = 0.9
+    ):
+        """
+        Initialize empty semantic memory.
+        
+        Args:
+            embed: Function that embeds a batch of texts (e.g. LocalLLM.embed)
+            normalize: Treat items differing only in case/whitespace as duplicates
+            batch_size: Embed queued items once this many are waiting
+            min_score: Drop results with a lower cosine similarity
+            approximate: Use an IVF index (faster on very large memories, may miss items)
+            max_items: Capacity (None = unbounded)
+            policy: Decides what to evict (see agent/eviction.py)
+            low_water: Fraction of max_items to shrink to when full
+        """
+        super().__init__(normalize=normalize, max_items=max_items, policy=policy, low_water=low_water)
+        self.embed = embed
+        self.batch_size = batch_size
+        self.min_score = min_score
+        self.approximate = approximate
+        self._vectors: VectorIndex | IVFIndex | None = None    # Created once the dimension is known
+        self._pending: dict[int, str] = {}          # Item id -> text waiting for an embedding
+    
+    def _index_item(self, item_id: int, item: str):
+        """Queue a new item for embedding (instead of indexing its words)."""
+        self._pending[item_id] = item
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+    
+    def _unindex_item(self, item_id: int, item: str):
+        """Drop a removed item's vector."""
+        if self._pending.pop(item_id, None) is None and self._vectors is not None:
+            self._vectors.remove(item_id)
+    
+    def add_many(self, items: Iterable[str]):
+        """
+        Add several items and embed them in one batch.
+        
+        Args:
+            items: Strings to remember, oldest first
+        """
+        batch_size, self.batch_size = self.batch_size, float("inf")
+        try:
+            super().add_many(items)
+        finally:
+            self.batch_size = batch_size
+        self.flush()
+    
+    def flush(self):
+        """Embed every queued item in one call."""
+        if not self._pending:
+            return
+        ids = list(self._pending)
+        vectors = self.embed(list(self._pending.values()))
+        self._pending = {}
+        
+        if self._vectors is None:
+            index_class = IVFIndex if self.approximate else VectorIndex
+            self._vectors = index_class(dim=vectors.shape[1])
+        self._vectors.add_many(ids, vectors)
+    
+    def rank(self, query: str, top_k: int | None = None) -> list[tuple[str, float]]:
+        """
+        Score memory items by similarity of meaning to a query.
+        
+        Args:
+            query: Question or statement to match
+            top_k: Maximum number of items (None = all)
+            
+        Returns:
+            List of (item, cosine similarity), best first
+        """
+        self.expire()
+        self.flush()
+        if self._vectors is None or len(self._vectors) == 0:
+            return []
+        
+        query_vector = self.embed([query])[0]
+        k = len(self._vectors) if top_k is None else top_k
+        return [
+            (self._texts[item_id], score)
+            for item_id, score in self._vectors.search(query_vector, k)
+            if score >= self.min_score
+        ]
+    
+    def clear(self):
+        """Clear all memory and vectors."""
+        super().clear()
+        self._pending = {}
+        if self._vectors is not None:
+            self._vectors.clear()
+    
+    def __repr__(self) -> str:
+        """String representation of memory."""
+        return f"SemanticMemory({len(self)} items, {len(self._pending)} pending)"
\ No newline at end of file
@@ -0,0 +1,354 @@
+"""
+Sessions - the per-user part of an agent.
+
+An Agent bundles the model (gigabytes, shared by everyone) with state,
+memory and conversation (kilobytes, one per user). Hosting many users
+means keeping the big part once and swapping the small parts in and out.
+
+A Session holds the per-user parts. A SessionStore keeps the most
+recently used sessions in RAM and spills the rest to disk, so thousands
+of idle sessions cost disk space, not memory. Rehydrating one is a single
+file read.
+
+Memory is spilled as its items plus its settings and version, and rebuilt
+as a plain Memory. Give the store a memory_factory to rebuild sessions
+with another kind of memory (SemanticMemory, a custom eviction policy).
+
+Usage:
+    llm = LocalLLM(model_path)
+    agent = Agent(llm=llm)
+    store = SessionStore("sessions/")
+    
+    with store.session("alice") as session:
+        agent.use_session(session)
+        reply = agent.run("What's my name?")
+"""
+
+import hashlib
+import marshal
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Iterator
+
+from agent.memory import Memory
+from agent.state import AgentState
+
+# Bump when the session layout changes, so old spill files are rejected
+SESSION_FORMAT = 2
+
+
+@dataclass
+class Session:
+    """Everything that belongs to one user: state, memory and conversation."""
+    session_id: str
+    state: AgentState = field(default_factory=AgentState)
+    memory: Memory = field(default_factory=Memory)
+    conversation: list[dict] = field(default_factory=list)
+    last_active: float = field(default_factory=time.time)
+    max_turns: int = 50
+    
+    def add_turn(self, role: str, content: str):
+        """
+        Append a message, keeping only the last max_turns.
+        
+        Args:
+            role: "user" or "assistant"
+            content: Message text
+        """
+        self.conversation.append({"role": role, "content": content})
+        if len(self.conversation) > self.max_turns:
+            del self.conversation[:len(self.conversation) - self.max_turns]
+        self.last_active = time.time()
+    
+    def to_bytes(self) -> bytes:
+        """Serialize the session (memory is stored as its items, settings and version)."""
+        memory = {
+            "items": self.memory.get_all(),
+            "version": self.memory.version,
+            "normalize": self.memory.normalize,
+            "max_items": self.memory.max_items,
+            "low_water": self.memory.low_water,
+        }
+        return marshal.dumps((
+            SESSION_FORMAT,
+            self.session_id,
+            self.state.to_bytes(),
+            memory,
+            self.conversation,
+            self.last_active,
+            self.max_turns,
+        ))
+    
+    @classmethod
+    def from_bytes(cls, data: bytes, memory_factory: Callable[[], Memory] | None = None) -> "Session":
+        """
+        Rebuild a session from to_bytes() output.
+        
+        The memory keeps its version, so caches keyed on it (the response
+        cache's memory scope) can't mistake the rebuilt memory for an
+        earlier state with different content.
+        
+        Args:
+            data: Serialized session
+            memory_factory: Makes the empty memory to load items into
+                (default: a Memory with the saved settings)
+        
+        Raises:
+            ValueError: If the data is corrupt or from another format version
+        """
+        try:
+            version, session_id, state, saved, conversation, last_active, max_turns = marshal.loads(data)
+        except (EOFError, ValueError, TypeError) as e:
+            raise ValueError(f"Corrupt session data: {e}") from e
+        if version != SESSION_FORMAT:
+            raise ValueError(f"Unsupported session format: {version}")
+        
+        if memory_factory is not None:
+            memory = memory_factory()
+        else:
+            memory = Memory(normalize=saved["normalize"], max_items=saved["max_items"], low_water=saved["low_water"])
+        memory.add_many(saved["items"])
+        memory.version = max(memory.version, saved["version"])
+        return cls(session_id, AgentState.from_bytes(state), memory, conversation, last_active, max_turns)
+
+
+@dataclass
+class SessionStoreStats:
+    """Counters for the session store."""
+    created: int = 0
+    loads: int = 0
+    spills: int = 0
+    
+    def to_dict(self) -> dict:
+        """Export stats as dictionary."""
+        return {"created": self.created, "loads": self.loads, "spills": self.spills}
+
+
+class SessionStore:
+    """
+    LRU cache of sessions in RAM, backed by one file per session on disk.
+    
+    Sessions in use (inside a session() block) are never spilled. Each
+    session should be used by one request at a time.
+    
+    Spill files are written outside the store lock, so one slow disk
+    write doesn't stall every other user. A session requested while its
+    file is still being written is taken back from RAM, not from disk.
+    """
+    
+    def __init__(
+        self,
+        spill_dir: str,
+        max_resident: int = 1000,
+        memory_factory: Callable[[], Memory] | None = None
+    ):
+        """
+        Initialize the store.
+        
+        Args:
+            spill_dir: Directory for spilled sessions (created if missing)
+            max_resident: Most sessions kept in RAM
+            memory_factory: Makes the memory of new and rehydrated sessions
+                (default: Memory)
+        """
+        self.spill_dir = spill_dir
+        self.max_resident = max_resident
+        self.memory_factory = memory_factory
+        self.stats = SessionStoreStats()
+        os.makedirs(spill_dir, exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._resident: OrderedDict[str, Session] = OrderedDict()   # Least recently used first
+        self._in_use: dict[str, int] = {}                           # Session id -> active users
+        self._writing: dict[str, Session] = {}                      # Spilled, file not written yet
+    
+    def _path(self, session_id: str) -> str:
+        """Spill file for a session (hashed, so any id is a safe file name)."""
+        digest = hashlib.sha256(session_id.encode("utf-8")).hexdigest()
+        return os.path.join(self.spill_dir, f"{digest}.session")
+    
+    def _load_or_create(self, session_id: str) -> Session:
+        """Take a session being spilled back, read it from disk, or start a new one (lock held)."""
+        session = self._writing.get(session_id)
+        if session is not None:
+            return session
+        
+        path = self._path(session_id)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                session = Session.from_bytes(f.read(), self.memory_factory)
+            self.stats.loads += 1
+        else:
+            if self.memory_factory is not None:
+                session = Session(session_id, memory=self.memory_factory())
+            else:
+                session = Session(session_id)
+            self.stats.created += 1
+        return session
+    
+    def _write(self, session_id: str, data: bytes):
+        """Write serialized session data to its spill file atomically."""
+        path = self._path(session_id)
+        # Per-thread temp file: save_all may write the same session at the same time
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+    
+    def _evict_over_capacity(self) -> list[tuple[Session, bytes]]:
+        """
+        Take least recently used idle sessions out of RAM until within
+        max_resident (lock held).
+        
+        Returns:
+            (session, serialized data) pairs for _spill() to write once the
+            lock is released
+        """
+        excess = len(self._resident) - self.max_resident
+        if excess <= 0:
+            return []
+        victims = []
+        for session_id in self._resident:
+            # A session whose last spill is still being written stays until it's done
+            if session_id not in self._in_use and session_id not in self._writing:
+                victims.append(session_id)
+                if len(victims) == excess:
+                    break
+        # Serialized under the lock (the session may be taken back and changed
+        # meanwhile), and before any leaves RAM: if one can't be, none is lost
+        spilled = []
+        for session_id in victims:
+            session = self._resident[session_id]
+            spilled.append((session, session.to_bytes()))
+        for session, _ in spilled:
+            del self._resident[session.session_id]
+            self._writing[session.session_id] = session
+        return spilled
+    
+    def _spill(self, spilled: list[tuple[Session, bytes]]):
+        """
+        Write sessions taken out by _evict_over_capacity (lock not held).
+        
+        A session whose file can't be written goes back into RAM as the
+        least recently used one; the first error is raised once every
+        session has been handled.
+        """
+        error = None
+        for session, data in spilled:
+            session_id = session.session_id
+            try:
+                self._write(session_id, data)
+                written = True
+            except OSError as e:
+                error = error or e
+                written = False
+            with self._lock:
+                if self._writing.get(session_id) is session:
+                    del self._writing[session_id]
+                    if written:
+                        self.stats.spills += 1
+                    elif session_id not in self._resident:
+                        self._resident[session_id] = session
+                        self._resident.move_to_end(session_id, last=False)
+                elif written and session_id not in self._writing:
+                    # Deleted while it was being written: the file is stale
+                    self._remove_file(session_id)
+        if error is not None:
+            raise error
+    
+    def _remove_file(self, session_id: str):
+        """Delete a session's spill file if there is one."""
+        path = self._path(session_id)
+        if os.path.exists(path):
+            os.remove(path)
+    
+    def get(self, session_id: str) -> Session:
+        """
+        Get a session, loading it from disk or creating it if needed.
+        
+        Prefer session(), which also keeps the session from being spilled
+        while it's in use.
+        
+        Args:
+            session_id: Session / user id
+        
+        Returns:
+            The session
+        
+        Raises:
+            OSError: If a session spilled to make room couldn't be written
+                (it stays in RAM)
+        """
+        with self._lock:
+            session = self._resident.get(session_id)
+            if session is None:
+                session = self._load_or_create(session_id)
+                self._resident[session_id] = session
+            else:
+                self._resident.move_to_end(session_id)
+            spilled = self._evict_over_capacity()
+        self._spill(spilled)
+        return session
+    
+    @contextmanager
+    def session(self, session_id: str) -> Iterator[Session]:
+        """
+        Use a session; it stays in RAM until the block ends.
+        
+        Args:
+            session_id: Session / user id
+        
+        Yields:
+            The session
+        """
+        with self._lock:
+            self._in_use[session_id] = self._in_use.get(session_id, 0) + 1
+        try:
+            session = self.get(session_id)
+            session.last_active = time.time()
+            yield session
+        finally:
+            with self._lock:
+                remaining = self._in_use[session_id] - 1
+                if remaining:
+                    self._in_use[session_id] = remaining
+                else:
+                    del self._in_use[session_id]
+                spilled = self._evict_over_capacity()
+            self._spill(spilled)
+    
+    def delete(self, session_id: str):
+        """Forget a session in RAM and on disk."""
+        with self._lock:
+            self._resident.pop(session_id, None)
+            self._writing.pop(session_id, None)
+            self._remove_file(session_id)
+    
+    def save_all(self):
+        """Write every resident session to disk (they stay resident)."""
+        with self._lock:
+            snapshots = [(session.session_id, session.to_bytes()) for session in self._resident.values()]
+        for session_id, data in snapshots:
+            self._write(session_id, data)
+    
+    def get_stats(self) -> dict:
+        """Get store counters as dictionary."""
+        with self._lock:
+            return {**self.stats.to_dict(), "resident": len(self._resident), "in_use": len(self._in_use)}
+    
+    def __len__(self) -> int:
+        """Return the number of sessions in RAM."""
+        return len(self._resident)
+    
+    def __repr__(self) -> str:
+        """String representation of the store."""
+        return f"SessionStore({len(self._resident)} resident, spill_dir={self.spill_dir!r})"
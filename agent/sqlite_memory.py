@@ -0,0 +1,440 @@
+"""
+Persistent memory on SQLite.
+
+Memory (agent/memory.py) lives in process RAM and is gone on restart.
+SQLiteMemory has the same interface but keeps items in a SQLite file:
+
+- WAL journal mode, so readers don't block the writer
+- FTS5 full-text index (BM25 ranking), kept in sync by triggers
+- Many users ("namespaces") in one file
+- Writes are buffered and committed in batches, one transaction each
+- Nothing is loaded on open; every read is a query
+"""
+
+import re
+import sqlite3
+import time
+from collections.abc import Iterable
+
+from agent.eviction import EvictionPolicy
+from agent.memory import Memory
+from agent.text_index import STOPWORDS
+
+_WORD = re.compile(r"\w+")
+
+_INSERT = "INSERT OR IGNORE INTO memories (namespace, key, item, created_at) VALUES (?, ?, ?, ?)"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS memories (
+    id INTEGER PRIMARY KEY,
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    item TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    UNIQUE (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS memories_by_namespace ON memories (namespace, id);
+CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5(
+    item, content='memories', content_rowid='id', tokenize='porter'
+);
+CREATE TRIGGER IF NOT EXISTS memories_fts_insert AFTER INSERT ON memories BEGIN
+    INSERT INTO memories_fts (rowid, item) VALUES (new.id, new.item);
+END;
+CREATE TRIGGER IF NOT EXISTS memories_fts_delete AFTER DELETE ON memories BEGIN
+    INSERT INTO memories_fts (memories_fts, rowid, item) VALUES ('delete', old.id, old.item);
+END;
+"""
+
+
+def _match_query(query: str) -> str:
+    """Turn free text into an FTS5 query matching any of its words."""
+    words = [word for word in _WORD.findall(query.lower()) if word not in STOPWORDS]
+    return " OR ".join(f'"{word}"' for word in words)
+
+
+class SQLiteMemory(Memory):
+    """
+    Memory stored in a SQLite file.
+    
+    Usage:
+        memory = SQLiteMemory("memory.db", namespace="alice")
+        memory.add("User prefers dark mode")
+        memory.search("dark mode")
+        memory.close()
+    
+    Items added are visible to this object's reads right away; they reach
+    the file (and other connections) when flush() runs, which happens
+    automatically every batch_size items, before every read and on close().
+    
+    With max_items (or set_limits), the eviction policy tracks items by
+    their SQLite rowid. Limits are checked on every add, so each add is
+    committed right away instead of waiting for a full batch.
+    """
+    
+    def __init__(
+        self,
+        path: str,
+        namespace: str = "default",
+        normalize: bool = False,
+        batch_size: int = 64,
+        max_items: int | None = None,
+        policy: EvictionPolicy | None = None,
+        low_water: float = 0.9
+    ):
+        """
+        Open (or create) a memory file.
+        
+        Args:
+            path: SQLite file path (":memory:" for a throwaway database)
+            namespace: Whose memories this object reads and writes
+            normalize: Treat items differing only in case/whitespace as duplicates
+            batch_size: Commit buffered items once this many are waiting
+            max_items: Capacity of this namespace (None = unbounded)
+            policy: Decides what to evict (default: LRUPolicy if bounded)
+            low_water: Fraction of max_items to shrink to when full
+        """
+        super().__init__(normalize=normalize, max_items=max_items, policy=policy, low_water=low_water)
+        self.path = path
+        self.namespace = namespace
+        self.batch_size = batch_size
+        
+        # Usable from a writer thread; callers serialize access (see MemoryWriter)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        
+        self._pending: list[tuple[str, str, float]] = []    # (key, item, created_at) not yet committed
+        self._pending_keys: set[str] = set()
+        self._count: int | None = None                      # Counted on first len()
+        if self.policy is not None:
+            self.set_limits(max_items, self.policy)
+    
+    # ------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------
+    
+    def _queue(self, item: str) -> bool:
+        """Buffer an item unless it (or a duplicate) is already stored."""
+        if not item:
+            return False
+        key = self.key_func(item)
+        if key in self._pending_keys or self._stored(key):
+            return False
+        
+        self._pending.append((key, item, time.time()))
+        self._pending_keys.add(key)
+        if self._count is not None:
+            self._count += 1
+        self.version += 1
+        return True
+    
+    def add(self, item: str):
+        """
+        Add an item to memory.
+        
+        Args:
+            item: String to remember
+        """
+        if not self._queue(item):
+            return
+        if self.policy is not None:
+            # The policy needs the rowid, and limits are checked now
+            self.flush()
+            self._enforce_limits()
+        elif len(self._pending) >= self.batch_size:
+            self.flush()
+    
+    def add_many(self, items: Iterable[str]):
+        """
+        Add several items in a single transaction.
+        
+        Args:
+            items: Strings to remember, oldest first
+        """
+        for item in items:
+            self._queue(item)
+        self.flush()
+        if self.policy is not None:
+            self._enforce_limits()
+    
+    def replace_all(self, items: Iterable[str]):
+        """
+        Replace every item in this namespace with items, in one transaction.
+        
+        If anything fails, the transaction is rolled back and the old items
+        stay, so the namespace is never left half written (or empty).
+        Items buffered but not yet flushed are replaced as well.
+        
+        Args:
+            items: The new contents, oldest first
+        """
+        rows: dict[str, str] = {}
+        for item in items:
+            if item:
+                rows.setdefault(self.key_func(item), item)
+        
+        now = time.time()
+        with self._conn:
+            self._conn.execute("DELETE FROM memories WHERE namespace = ?", (self.namespace,))
+            self._conn.executemany(_INSERT, [(self.namespace, key, item, now) for key, item in rows.items()])
+        self._pending = []
+        self._pending_keys = set()
+        self._count = len(rows)
+        self.version += 1
+        
+        if self.policy is not None:
+            self.policy.clear()
+            for item_id, item in self._all_with_ids():
+                self.policy.added(item_id, item)
+            self._enforce_limits()
+    
+    def flush(self):
+        """Commit buffered items in one transaction."""
+        if not self._pending:
+            return
+        rows = [(self.namespace, key, item, created_at) for key, item, created_at in self._pending]
+        inserted = []
+        with self._conn:
+            if self.policy is None:
+                self._conn.executemany(_INSERT, rows)
+            else:
+                # One statement per row, to learn each rowid for the policy
+                for row in rows:
+                    cursor = self._conn.execute(_INSERT, row)
+                    if cursor.rowcount > 0:
+                        inserted.append((cursor.lastrowid, row[2]))
+        self._pending = []
+        self._pending_keys = set()
+        for item_id, item in inserted:
+            self.policy.added(item_id, item)
+    
+    def remove(self, item: str) -> bool:
+        """
+        Delete an item (or its stored duplicate).
+        
+        Args:
+            item: String to forget
+        
+        Returns:
+            True if it was stored
+        """
+        key = self.key_func(item)
+        if key in self._pending_keys:
+            self._pending_keys.discard(key)
+            self._pending = [entry for entry in self._pending if entry[0] != key]
+            if self._count is not None:
+                self._count -= 1
+            self.version += 1
+            return True
+        
+        item_id = self._id_of(item)
+        return item_id is not None and self._remove_id(item_id)
+    
+    def _remove_id(self, item_id: int) -> bool:
+        """Delete a committed item by rowid (False if it isn't stored)."""
+        with self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM memories WHERE namespace = ? AND id = ?", (self.namespace, item_id)
+            )
+        if cursor.rowcount == 0:
+            return False
+        if self._count is not None:
+            self._count -= 1
+        if self.policy is not None:
+            self.policy.removed(item_id)
+        self.version += 1
+        return True
+    
+    def clear(self):
+        """Delete every item in this namespace."""
+        self._pending = []
+        self._pending_keys = set()
+        with self._conn:
+            self._conn.execute("DELETE FROM memories WHERE namespace = ?", (self.namespace,))
+        if self.policy is not None:
+            self.policy.clear()
+        self._count = 0
+        self.version += 1
+    
+    # ------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------
+    
+    def _stored(self, key: str) -> bool:
+        """Check the file for a dedupe key."""
+        row = self._conn.execute(
+            "SELECT 1 FROM memories WHERE namespace = ? AND key = ?", (self.namespace, key)
+        ).fetchone()
+        return row is not None
+    
+    def _id_of(self, item: str) -> int | None:
+        """Rowid of a committed item (or its duplicate), None if it isn't stored."""
+        row = self._conn.execute(
+            "SELECT id FROM memories WHERE namespace = ? AND key = ?", (self.namespace, self.key_func(item))
+        ).fetchone()
+        return None if row is None else row[0]
+    
+    def _query(self, sql: str, *params) -> list:
+        """Run a read after committing buffered items (so reads see every add)."""
+        self.flush()
+        return self._conn.execute(sql, (self.namespace, *params)).fetchall()
+    
+    def __contains__(self, item: str) -> bool:
+        """Check whether an item (or a duplicate of it) is stored."""
+        self.expire()
+        key = self.key_func(item)
+        return key in self._pending_keys or self._stored(key)
+    
+    def get_all(self) -> list[str]:
+        """
+        Retrieve all memory items in this namespace.
+        
+        Returns:
+            List of all stored items, oldest first
+        """
+        self.expire()
+        return [item for (item,) in self._query("SELECT item FROM memories WHERE namespace = ? ORDER BY id")]
+    
+    def view(self) -> Iterable[str]:
+        """
+        Stream all items in this namespace, oldest first.
+        
+        Rows are read from the file as they are iterated, so the whole
+        namespace is never held in RAM at once.
+        
+        Returns:
+            Iterable over the stored items
+        """
+        self.expire()
+        self.flush()
+        cursor = self._conn.execute("SELECT item FROM memories WHERE namespace = ? ORDER BY id", (self.namespace,))
+        return (item for (item,) in cursor)
+    
+    def __iter__(self):
+        """Stream items, oldest first."""
+        return iter(self.view())
+    
+    def get_recent(self, n: int = 5) -> list[str]:
+        """
+        Get the n most recent memory items.
+        
+        Args:
+            n: Number of recent items to retrieve
+        
+        Returns:
+            List of recent items, oldest first
+        """
+        self.expire()
+        recent = [item for _, item in self._recent_with_ids(n)]
+        recent.reverse()
+        return recent
+    
+    def get_oldest(self, n: int = 5) -> list[str]:
+        """
+        Get the n oldest memory items.
+        
+        Args:
+            n: Number of items to retrieve
+        
+        Returns:
+            List of the oldest items, oldest first
+        """
+        self.expire()
+        rows = self._query("SELECT item FROM memories WHERE namespace = ? ORDER BY id LIMIT ?", max(n, 0))
+        return [item for (item,) in rows]
+    
+    def rank(self, query: str, top_k: int | None = None) -> list[tuple[str, float]]:
+        """
+        Score memory items against a query with FTS5's BM25.
+        
+        Args:
+            query: Words to search for
+            top_k: Maximum number of items (None = all matches)
+        
+        Returns:
+            List of (item, BM25 score), best first
+        """
+        return [(item, score) for _, item, score in self.rank_with_ids(query, top_k)]
+    
+    def _rank_with_ids(self, query: str, limit: int | None) -> list[tuple[int, str, float]]:
+        """Ranked (id, item, score) rows; a LIMIT of -1 means no limit in SQLite."""
+        limit = -1 if limit is None else limit
+        match = _match_query(query)
+        if not match:
+            # No indexable words: case-insensitive substring match, oldest first
+            return self._query(
+                "SELECT id, item, 0.0 FROM memories WHERE namespace = ? AND instr(lower(item), ?) > 0 "
+                "ORDER BY id LIMIT ?",
+                query.lower(), limit
+            )
+        return self._query(
+            "SELECT m.id, m.item, -bm25(memories_fts) AS score "
+            "FROM memories_fts JOIN memories AS m ON m.id = memories_fts.rowid "
+            "WHERE m.namespace = ? AND memories_fts MATCH ? "
+            "ORDER BY score DESC, m.id DESC LIMIT ?",
+            match, limit
+        )
+    
+    def _all_with_ids(self) -> Iterable[tuple[int, str]]:
+        """Every (rowid, item) pair in this namespace, oldest first."""
+        return self._query("SELECT id, item FROM memories WHERE namespace = ? ORDER BY id")
+    
+    def _all_with_ages(self) -> Iterable[tuple[int, str, float]]:
+        """Every (rowid, item, seconds since stored) triple in this namespace, oldest first."""
+        now = time.time()
+        rows = self._query("SELECT id, item, created_at FROM memories WHERE namespace = ? ORDER BY id")
+        return [(item_id, item, max(0.0, now - created_at)) for item_id, item, created_at in rows]
+    
+    def _recent_with_ids(self, n: int) -> list[tuple[int, str]]:
+        """The n newest (id, item) pairs, newest first."""
+        if n <= 0:
+            return []
+        return self._query("SELECT id, item FROM memories WHERE namespace = ? ORDER BY id DESC LIMIT ?", n)
+    
+    def _id_range(self) -> tuple[int, int] | None:
+        """Ids of the oldest and newest item (None when empty)."""
+        first_id, last_id = self._query("SELECT MIN(id), MAX(id) FROM memories WHERE namespace = ?")[0]
+        return None if first_id is None else (first_id, last_id)
+    
+    def namespaces(self) -> list[str]:
+        """List every namespace with stored items in this file."""
+        self.flush()
+        return [name for (name,) in self._conn.execute("SELECT DISTINCT namespace FROM memories ORDER BY namespace")]
+    
+    def use_namespace(self, namespace: str):
+        """
+        Read and write another namespace of the same file from now on.
+        
+        The open connection is reused, so switching costs no new connection
+        or schema setup. Items buffered for the old namespace are committed
+        first.
+        
+        Args:
+            namespace: Whose memories to use
+        """
+        self.flush()
+        self.namespace = namespace
+        self._count = None
+        self.version += 1
+        if self.policy is not None:
+            self.policy.clear()
+            self.set_limits(self.max_items, self.policy)
+    
+    def close(self):
+        """Commit buffered items and close the file."""
+        self.flush()
+        self._conn.close()
+    
+    def __len__(self) -> int:
+        """Return the number of items in this namespace."""
+        if self._count is None:
+            self.flush()
+            self._count = self._conn.execute(
+                "SELECT COUNT(*) FROM memories WHERE namespace = ?", (self.namespace,)
+            ).fetchone()[0]
+        return self._count
+    
+    def __repr__(self) -> str:
+        """String representation of memory."""
+        return f"SQLiteMemory({self.path!r}, namespace={self.namespace!r}, {len(self)} items)"
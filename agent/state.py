@@ -3,8 +3,38 @@ Agent state management.
 
 State is explicit, inspectable, and modifiable.
 It's not hidden in conversation history or mysterious context.
+
+Because it's explicit, it can also be saved: a checkpoint written after
+every step lets a long run that crashed continue from its last completed
+step instead of repeating every LLM call.
 """
 
+import marshal
+import os
+
+# Bump when the fields below change, so old checkpoints are rejected
+CHECKPOINT_FORMAT = 1
+
+_PLAIN = (str, int, float, bool, bytes, type(None))
+
+
+def _plain(value):
+    """
+    Convert a value to the built-in types marshal can write.
+    
+    Containers are converted item by item, objects with a to_dict() (like
+    ToolResult) become that dict, and anything else becomes its repr().
+    """
+    if isinstance(value, _PLAIN):
+        return value
+    if isinstance(value, dict):
+        return {key if isinstance(key, _PLAIN) else repr(key): _plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [_plain(item) for item in value]
+    if callable(getattr(value, "to_dict", None)):
+        return _plain(value.to_dict())
+    return repr(value)
+
 
 class AgentState:
     """
@@ -16,14 +46,25 @@ class AgentState:
     - Lesson 08: Add planning state
     - Lesson 09: Add execution state
     - Lesson 10: Add dependency tracking
+    
+    Fields are declared in __slots__: no per-instance __dict__, and the
+    full field list is right here.
     """
     
+    __slots__ = (
+        "steps",
+        "done",
+        "current_plan",
+        "last_action",
+        "timed_out",
+        "task",         # What the current run is working on (user input or goal)
+        "mode",         # Which run produced the progress: "loop", "graph" or None
+        "results",      # Completed step / node results, in order
+    )
+    
     def __init__(self):
         """Initialize a new agent state."""
-        self.steps = 0
-        self.done = False
-        self.current_plan = None
-        self.last_action = None
+        self.reset()
     
     def increment_step(self):
         """Increment the step counter."""
@@ -33,12 +74,20 @@ class AgentState:
         """Mark the agent's task as complete."""
         self.done = True
     
+    def mark_timed_out(self):
+        """Record that the task stopped because its deadline expired."""
+        self.timed_out = True
+    
     def reset(self):
         """Reset the state for a new task."""
         self.steps = 0
         self.done = False
         self.current_plan = None
         self.last_action = None
+        self.timed_out = False
+        self.task = None
+        self.mode = None
+        self.results = []
     
     def to_dict(self) -> dict:
         """
@@ -52,8 +101,90 @@ class AgentState:
             "done": self.done,
             "current_plan": self.current_plan,
             "last_action": self.last_action,
+            "timed_out": self.timed_out,
+            "task": self.task,
+            "mode": self.mode,
+            "results": self.results,
         }
     
+    def to_bytes(self) -> bytes:
+        """
+        Serialize the state to a compact binary checkpoint.
+        
+        Uses marshal, which makes writing a checkpoint after every step
+        cheap but only handles built-in types (dicts, lists, strings,
+        numbers...). Anything else, such as a tool returning its own
+        objects, is converted first (see _plain), so a state loaded from a
+        checkpoint holds plain data in its place.
+        
+        Returns:
+            Checkpoint bytes
+        """
+        values = tuple(getattr(self, name) for name in self.__slots__)
+        try:
+            return marshal.dumps((CHECKPOINT_FORMAT, values))
+        except ValueError:
+            # Some value isn't a built-in type; only then pay for converting everything
+            return marshal.dumps((CHECKPOINT_FORMAT, _plain(values)))
+    
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "AgentState":
+        """
+        Rebuild a state from to_bytes() output.
+        
+        Args:
+            data: Checkpoint bytes
+        
+        Returns:
+            The restored state
+        
+        Raises:
+            ValueError: If the checkpoint is corrupt or from another format version
+        """
+        try:
+            version, values = marshal.loads(data)
+        except (EOFError, ValueError, TypeError) as e:
+            raise ValueError(f"Corrupt agent checkpoint: {e}") from e
+        if version != CHECKPOINT_FORMAT or len(values) != len(cls.__slots__):
+            raise ValueError(f"Unsupported agent checkpoint format: {version}")
+        
+        state = cls.__new__(cls)
+        for name, value in zip(cls.__slots__, values):
+            setattr(state, name, value)
+        return state
+    
+    def save(self, path: str):
+        """
+        Write a checkpoint file.
+        
+        The data is flushed to disk before the file is replaced
+        atomically, so a crash (or power loss) mid-write leaves the
+        previous checkpoint intact.
+        
+        Args:
+            path: Checkpoint file path
+        """
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(self.to_bytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    
+    @classmethod
+    def load(cls, path: str) -> "AgentState":
+        """
+        Read a checkpoint file written by save().
+        
+        Args:
+            path: Checkpoint file path
+        
+        Returns:
+            The restored state
+        """
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+    
     def __repr__(self) -> str:
         """String representation of the state."""
-        return f"AgentState(steps={self.steps}, done={self.done})"
\ No newline at end of file
+        return f"AgentState(steps={self.steps}, done={self.done})"
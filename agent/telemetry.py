@@ -48,6 +48,7 @@ class Metrics:
     llm_retries: int = 0
     tool_calls: int = 0
     tool_failures: int = 0
+    tool_cache_hits: int = 0
     memory_operations: int = 0
     total_tokens: int = 0
     total_latency_ms: float = 0.0
@@ -67,6 +68,11 @@ class Metrics:
         """Tool call success rate (0.0 to 1.0)."""
         return 1 - (self.tool_failures / self.tool_calls) if self.tool_calls > 0 else 0.0
     
+    @property
+    def tool_cache_hit_rate(self) -> float:
+        """Fraction of tool calls answered from the tool cache (0.0 to 1.0)."""
+        return self.tool_cache_hits / self.tool_calls if self.tool_calls > 0 else 0.0
+    
     def to_dict(self) -> dict:
         """Export metrics as dictionary."""
         return {
@@ -78,6 +84,8 @@ class Metrics:
             "tool_calls": self.tool_calls,
             "tool_failures": self.tool_failures,
             "tool_success_rate": f"{self.tool_success_rate:.2%}",
+            "tool_cache_hits": self.tool_cache_hits,
+            "tool_cache_hit_rate": f"{self.tool_cache_hit_rate:.2%}",
             "memory_operations": self.memory_operations,
         }
 
@@ -176,7 +184,8 @@ class Telemetry:
                       arguments: dict,
                       result: Any = None,
                       duration_ms: float = None,
-                      error: str = None):
+                      error: str = None,
+                      cached: bool = False):
         """
         Log a tool call.
         
@@ -186,6 +195,7 @@ class Telemetry:
             result: Result of the tool execution
             duration_ms: Time taken in milliseconds
             error: Error message if failed
+            cached: Whether the result came from the tool cache
         """
         span = Span(
             span_id=str(uuid4())[:8],
@@ -196,7 +206,8 @@ class Telemetry:
             data={
                 "tool": tool_name,
                 "arguments": arguments,
-                "result": str(result)[:200] if result else None  # Truncate long results
+                "result": str(result)[:200] if result else None,  # Truncate long results
+                "cached": cached
             },
             error=error
         )
@@ -207,6 +218,8 @@ class Telemetry:
         self.metrics.tool_calls += 1
         if error:
             self.metrics.tool_failures += 1
+        if cached:
+            self.metrics.tool_cache_hits += 1
     
     def log_memory_operation(self,
                              operation: str,
@@ -305,6 +318,7 @@ class Telemetry:
         print(f"  Retries:      {m['llm_retries']}")
         print(f"Tool Calls:     {m['tool_calls']}")
         print(f"  Success Rate: {m['tool_success_rate']}")
+        print(f"  Cache Hits:   {m['tool_cache_hit_rate']}")
         print(f"Memory Ops:     {m['memory_operations']}")
         print("="*40)
 
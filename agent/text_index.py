@@ -0,0 +1,176 @@
+"""
+Inverted index with BM25 ranking.
+
+An inverted index maps each word to the documents that contain it (a
+"posting list"). A query only touches the posting lists of its own words,
+so lookups don't slow down with every item ever stored.
+
+BM25 is the standard bag-of-words relevance score: rare words count more
+than common ones, repeated words count with diminishing returns, and long
+documents don't win just by being long.
+"""
+
+import heapq
+import math
+import re
+
+_TOKEN = re.compile(r"\w+")
+
+# Words too common to say anything about relevance
+STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "do", "does", "for", "from",
+    "has", "have", "i", "in", "is", "it", "me", "my", "of", "on", "or", "s",
+    "that", "the", "to", "was", "what", "where", "which", "who", "with", "you", "your",
+})
+
+
+def _stem(token: str) -> str:
+    """Strip a plural/third-person "s" so "lives" matches "live"."""
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Split text into lowercase word tokens, dropping stopwords.
+    
+    Args:
+        text: Text to split
+    
+    Returns:
+        List of tokens in order (duplicates kept)
+    """
+    return [_stem(token) for token in _TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class InvertedIndex:
+    """
+    Incrementally maintained full-text index with BM25 top-k search.
+    
+    Usage:
+        index = InvertedIndex()
+        index.add(1, "User prefers dark mode")
+        index.search("dark mode", top_k=3)  # [(1, 0.58)]
+    """
+    
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """
+        Initialize an empty index.
+        
+        Args:
+            k1: How quickly repeated words stop adding to the score
+            b: How strongly long documents are penalized (0 = not at all)
+        """
+        self.k1 = k1
+        self.b = b
+        self._postings: dict[str, dict[int, int]] = {}   # token -> {doc_id: term frequency}
+        self._lengths: dict[int, int] = {}               # doc_id -> number of tokens
+        self._total_length = 0
+    
+    def add(self, doc_id: int, text: str):
+        """
+        Index a document.
+        
+        Args:
+            doc_id: Integer id (higher ids are treated as newer on ties)
+            text: Document text
+        """
+        if doc_id in self._lengths:
+            self.remove(doc_id)
+        
+        tokens = tokenize(text)
+        self._lengths[doc_id] = len(tokens)
+        self._total_length += len(tokens)
+        
+        counts: dict[str, int] = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        for token, count in counts.items():
+            self._postings.setdefault(token, {})[doc_id] = count
+    
+    def remove(self, doc_id: int, text: str | None = None):
+        """
+        Remove a document.
+        
+        Args:
+            doc_id: Id passed to add()
+            text: The document's text, if known (avoids scanning all posting lists)
+        """
+        length = self._lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self._total_length -= length
+        
+        tokens = set(tokenize(text)) if text is not None else list(self._postings)
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is not None and postings.pop(doc_id, None) is not None and not postings:
+                del self._postings[token]
+    
+    def search(self, query: str, top_k: int | None = None) -> list[tuple[int, float]]:
+        """
+        Rank documents by BM25 relevance to a query.
+        
+        Args:
+            query: Query text
+            top_k: Maximum results (None = every matching document)
+        
+        Returns:
+            List of (doc_id, score), best first; ties go to the newer document
+        """
+        doc_count = len(self._lengths)
+        if doc_count == 0:
+            return []
+        avg_length = self._total_length / doc_count or 1.0
+        
+        # Rarest words first: they carry the most weight
+        terms = []
+        for token in set(tokenize(query)):
+            postings = self._postings.get(token)
+            if postings:
+                df = len(postings)
+                terms.append((math.log(1 + (doc_count - df + 0.5) / (df + 0.5)), postings))
+        terms.sort(key=lambda term: term[0], reverse=True)
+        
+        # The most any one document can still gain from the remaining words
+        max_gain = [0.0] * (len(terms) + 1)
+        for i in range(len(terms) - 1, -1, -1):
+            max_gain[i] = max_gain[i + 1] + terms[i][0] * (self.k1 + 1)
+        
+        scores: dict[int, float] = {}
+        for i, (idf, postings) in enumerate(terms):
+            # If a document nobody has scored yet couldn't reach the current
+            # top k even with every remaining word, only rescore the candidates
+            # we have instead of walking a long posting list of common words.
+            doc_ids = postings
+            if top_k is not None and len(scores) >= top_k and len(scores) < len(postings):
+                kth_best = heapq.nlargest(top_k, scores.values())[-1]
+                if max_gain[i] < kth_best:
+                    doc_ids = [doc_id for doc_id in scores if doc_id in postings]
+            
+            for doc_id in doc_ids:
+                tf = postings[doc_id]
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        
+        ranked = ((score, doc_id) for doc_id, score in scores.items())
+        if top_k is not None:
+            best = heapq.nlargest(top_k, ranked)
+        else:
+            best = sorted(ranked, reverse=True)
+        return [(doc_id, score) for score, doc_id in best]
+    
+    def clear(self):
+        """Remove all documents."""
+        self._postings = {}
+        self._lengths = {}
+        self._total_length = 0
+    
+    def __len__(self) -> int:
+        """Return the number of indexed documents."""
+        return len(self._lengths)
+    
+    def __repr__(self) -> str:
+        """String representation of the index."""
+        return f"InvertedIndex({len(self._lengths)} docs, {len(self._postings)} terms)"
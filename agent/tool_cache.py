@@ -0,0 +1,126 @@
+"""
+Tool result cache.
+
+A pure tool (same arguments -> same result, no side effects) never needs
+to run twice for the same arguments. Agents repeat tool calls a lot -
+retries, loops, many users asking the same thing - so the registry keeps
+results of tools registered with pure=True (or a ttl) here and answers
+repeats without calling the tool.
+
+Keys are built by the registry from the tool name and its arguments
+after defaults are filled in, so calculator(a=1, b=2) and
+calculator(a=1, b=2, operation="add") share an entry.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable
+
+
+@dataclass
+class ToolCacheStats:
+    """Hit/miss counters for the tool cache."""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups answered from the cache (0.0 to 1.0)."""
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+    
+    def to_dict(self) -> dict:
+        """Export stats as dictionary."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": f"{self.hit_rate:.2%}",
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class ToolCache:
+    """
+    Bounded LRU cache of tool results, with optional per-entry expiry.
+    
+    Safe to use from several threads (tool calls may run in parallel).
+    Cached results are shared between callers, so don't modify them.
+    """
+    
+    def __init__(self, max_entries: int = 1024, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize an empty cache.
+        
+        Args:
+            max_entries: Least recently used entries are evicted beyond this
+            clock: Time source for expiry (seconds)
+        """
+        self.max_entries = max_entries
+        self.clock = clock
+        self.stats = ToolCacheStats()
+        
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[Any, float | None]] = OrderedDict()  # key -> (result, expires_at)
+    
+    def get(self, key: str) -> tuple[bool, Any]:
+        """
+        Look up a result.
+        
+        Args:
+            key: Cache key from the registry
+        
+        Returns:
+            (True, result) on a hit, (False, None) on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                result, expires_at = entry
+                if expires_at is None or self.clock() < expires_at:
+                    self._entries.move_to_end(key)
+                    self.stats.hits += 1
+                    return True, result
+                del self._entries[key]
+                self.stats.expirations += 1
+            self.stats.misses += 1
+            return False, None
+    
+    def put(self, key: str, result: Any, ttl: float | None = None):
+        """
+        Store a result.
+        
+        Args:
+            key: Cache key from the registry
+            result: The tool's result
+            ttl: Seconds the result stays valid (None = until evicted)
+        """
+        expires_at = self.clock() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (result, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+    
+    def clear(self):
+        """Drop all entries (stats are kept)."""
+        with self._lock:
+            self._entries.clear()
+    
+    def get_stats(self) -> dict:
+        """Get hit-rate metrics as dictionary."""
+        with self._lock:
+            return {**self.stats.to_dict(), "entries": len(self._entries)}
+    
+    def __len__(self) -> int:
+        """Return the number of cached results."""
+        return len(self._entries)
+    
+    def __repr__(self) -> str:
+        """String representation of the cache."""
+        return f"ToolCache({len(self._entries)} entries, hit_rate={self.stats.hit_rate:.0%})"
@@ -0,0 +1,270 @@
+"""
+Process-pool tool execution.
+
+Tools normally run inside the agent's own process. A CPU-heavy tool then
+holds the GIL (so parallel calls don't use more cores), and a tool that
+hangs hangs the agent - a thread can't be stopped from outside.
+
+ToolProcessPool runs tools in a pool of worker processes instead:
+- workers are started up front ("warm"), so a call doesn't pay for
+  starting Python
+- every call has a timeout, counted from when a worker starts it; a
+  worker that runs past it is killed and the pool is restarted
+- each tool can be limited to a number of concurrent calls
+- results larger than max_result_bytes are rejected in the worker,
+  before they are copied back
+
+Tool functions and their arguments and results are sent between
+processes with pickle, so tools must be module-level functions.
+
+Workers are started with forkserver (spawn where that isn't available),
+never fork: a forked worker would inherit the agent's loaded model and
+any locks held by its other threads at that moment. Scripts that use
+the pool therefore need the usual `if __name__ == "__main__":` guard.
+"""
+
+import multiprocessing
+import os
+import pickle
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout, wait
+from dataclasses import dataclass
+from typing import Any, Callable
+
+
+class ToolTimeoutError(TimeoutError):
+    """A tool ran longer than its timeout."""
+
+
+class ToolResultTooLarge(ValueError):
+    """A tool returned more data than max_result_bytes."""
+
+
+def _run_in_worker(func: Callable, arguments: dict, max_result_bytes: int | None) -> bytes:
+    """Worker side: call the tool and return its pickled result, checking the size."""
+    data = pickle.dumps(func(**arguments), protocol=pickle.HIGHEST_PROTOCOL)
+    if max_result_bytes is not None and len(data) > max_result_bytes:
+        raise ToolResultTooLarge(f"result is {len(data)} bytes (limit {max_result_bytes})")
+    return data
+
+
+def _ready() -> int:
+    """Worker side: no-op used to start workers ahead of time."""
+    return os.getpid()
+
+
+def _report_pid(pids):
+    """Worker side (initializer): tell the parent this worker's pid."""
+    pids.put(os.getpid())
+
+
+_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+class _Workers:
+    """A ProcessPoolExecutor plus the pids its workers reported, so they can be killed."""
+    
+    def __init__(self, max_workers: int):
+        """Start the executor (its workers start on first use)."""
+        context = multiprocessing.get_context(_START_METHOD)
+        self._pids = context.SimpleQueue()
+        self.executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=context,
+            initializer=_report_pid,
+            initargs=(self._pids,)
+        )
+    
+    def terminate(self):
+        """Stop the pool, killing workers that are still running a call."""
+        # Running calls can't be cancelled, so the workers themselves are killed
+        terminate_workers = getattr(self.executor, "terminate_workers", None)
+        if terminate_workers is not None:
+            terminate_workers()         # Python 3.14+
+        else:
+            pids = []
+            while not self._pids.empty():
+                pids.append(self._pids.get())
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            for pid in pids:
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                except OSError:
+                    pass                # Already exited
+        self._pids.close()
+    
+    def shutdown(self):
+        """Stop the pool once running calls have finished."""
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self._pids.close()
+
+
+@dataclass
+class ToolPoolStats:
+    """Counters for the tool process pool."""
+    calls: int = 0
+    timeouts: int = 0
+    too_large: int = 0
+    restarts: int = 0
+    
+    def to_dict(self) -> dict:
+        """Export stats as dictionary."""
+        return {"calls": self.calls, "timeouts": self.timeouts, "too_large": self.too_large, "restarts": self.restarts}
+
+
+class ToolProcessPool:
+    """
+    Run tool functions in warm worker processes with limits.
+    
+    Usage:
+        pool = ToolProcessPool(max_workers=4, default_timeout=10.0)
+        result = pool.run("render", render, {"page": 3}, timeout=2.0, max_concurrent=1)
+        pool.close()
+    
+    When a call times out the whole pool is restarted, so other calls
+    running at that moment fail too (with the pool's BrokenProcessPool
+    error). Timeouts should be generous limits, not normal control flow.
+    """
+    
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        default_timeout: float | None = 30.0,
+        max_result_bytes: int | None = 1024 * 1024,
+        warm: bool = True
+    ):
+        """
+        Initialize the pool.
+        
+        Args:
+            max_workers: Worker processes (default: number of CPUs)
+            default_timeout: Seconds a call may take unless the tool sets its own
+                (None = no limit)
+            max_result_bytes: Largest pickled result accepted (None = no limit)
+            warm: Start all workers now instead of on first use
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.default_timeout = default_timeout
+        self.max_result_bytes = max_result_bytes
+        self.stats = ToolPoolStats()
+        
+        self._lock = threading.Lock()
+        # At most one call per worker is submitted, so no call waits inside
+        # the pool and its timeout only counts time spent running
+        self._slots = threading.BoundedSemaphore(self.max_workers)
+        self._pool: _Workers | None = None
+        self._limits: dict[str, tuple[int, threading.BoundedSemaphore]] = {}   # Tool name -> (max_concurrent, limit)
+        if warm:
+            self.warm()
+    
+    def _get_pool(self) -> _Workers:
+        """The current pool, started if needed."""
+        with self._lock:
+            if self._pool is None:
+                self._pool = _Workers(self.max_workers)
+            return self._pool
+    
+    def warm(self):
+        """Start every worker process (and wait until they're ready)."""
+        executor = self._get_pool().executor
+        wait([executor.submit(_ready) for _ in range(self.max_workers)])
+    
+    def _limit_for(self, name: str, max_concurrent: int | None) -> threading.BoundedSemaphore | None:
+        """
+        The semaphore limiting concurrent calls of one tool.
+        
+        A tool re-registered with another max_concurrent gets a new
+        semaphore; calls already holding the old one still release it, so
+        for a moment both limits' calls may run.
+        """
+        if max_concurrent is None:
+            return None
+        with self._lock:
+            current = self._limits.get(name)
+            if current is None or current[0] != max_concurrent:
+                current = self._limits[name] = (max_concurrent, threading.BoundedSemaphore(max_concurrent))
+            return current[1]
+    
+    def _restart(self, pool: _Workers):
+        """Kill a pool with a stuck worker and start a fresh one."""
+        with self._lock:
+            if self._pool is not pool:
+                return   # Another thread already restarted it
+            self._pool = None
+            self.stats.restarts += 1
+        pool.terminate()
+        self.warm()
+    
+    def run(
+        self,
+        name: str,
+        func: Callable,
+        arguments: dict,
+        timeout: float | None = None,
+        max_concurrent: int | None = None
+    ) -> Any:
+        """
+        Call a tool function in a worker process.
+        
+        Blocks the calling thread until the result is back (call it from
+        several threads to run tools in parallel). Calls beyond
+        max_workers (or the tool's max_concurrent) wait in the calling
+        thread, and that wait doesn't count toward the timeout.
+        
+        Args:
+            name: Tool name (for concurrency limits and errors)
+            func: Module-level tool function
+            arguments: Keyword arguments for the tool
+            timeout: Seconds this call may take (default: default_timeout)
+            max_concurrent: Most calls of this tool running at once (None = no limit)
+        
+        Returns:
+            The tool's result
+        
+        Raises:
+            ToolTimeoutError: If the call took longer than its timeout
+            ToolResultTooLarge: If the result was larger than max_result_bytes
+        """
+        if timeout is None:
+            timeout = self.default_timeout
+        limit = self._limit_for(name, max_concurrent)
+        if limit is not None:
+            limit.acquire()
+        try:
+            with self._slots:
+                pool = self._get_pool()
+                future = pool.executor.submit(_run_in_worker, func, arguments, self.max_result_bytes)
+                with self._lock:
+                    self.stats.calls += 1
+                try:
+                    data = future.result(timeout)
+                except FutureTimeout:
+                    with self._lock:
+                        self.stats.timeouts += 1
+                    self._restart(pool)
+                    raise ToolTimeoutError(f"Tool {name} timed out after {timeout}s") from None
+                except ToolResultTooLarge as e:
+                    with self._lock:
+                        self.stats.too_large += 1
+                    raise ToolResultTooLarge(f"Tool {name}: {e}") from None
+            return pickle.loads(data)
+        finally:
+            if limit is not None:
+                limit.release()
+    
+    def close(self):
+        """Stop the worker processes."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
+    
+    def get_stats(self) -> dict:
+        """Get pool counters as dictionary."""
+        with self._lock:
+            return {**self.stats.to_dict(), "workers": self.max_workers}
+    
+    def __repr__(self) -> str:
+        """String representation of the pool."""
+        return f"ToolProcessPool({self.max_workers} workers, timeout={self.default_timeout})"
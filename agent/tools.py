@@ -3,20 +3,631 @@ Tool definitions for the agent.
 
 Tools are APIs, not abilities.
 The agent requests tools; the system executes them.
+
+Tools are registered with the @tool decorator. The registry reads each
+tool's signature (types, defaults, Literal choices) and the Args: section
+of its docstring once, at registration, to build the schema the model
+sees - so adding a tool is just writing a typed, documented function:
+
+    @tool(description="Look up the weather for a city")
+    def weather(city: str, unit: Literal["C", "F"] = "C") -> str:
+        ...
+
+Tools may also be async functions. When the model asks for several
+tools in one turn, execute_many() runs them at the same time: plain
+tools on a thread pool, async tools together on one event loop.
+
+Tools registered with pure=True (same arguments -> same result, no side
+effects) or a ttl have their results cached, so repeated calls skip the
+tool entirely.
+
+After enable_process_pool(), plain tools run in worker processes (see
+tool_pool.py) with per-tool timeouts and concurrency limits, so a slow or
+CPU-heavy tool can't freeze the agent.
+
+A tool can also have a vectorized batch implementation (@TOOLS.batch).
+execute_batch() then evaluates thousands of rows in one call instead of
+one Python call per row.
 """
 
-from typing import Any
+import asyncio
+import inspect
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Literal, get_args, get_origin
+
+import numpy as np
+
+from agent.telemetry import Telemetry
+from agent.tool_cache import ToolCache
+from agent.tool_pool import ToolProcessPool
+
+# Python annotation -> JSON schema type
+_JSON_TYPES = {
+    int: "integer",
+    float: "number",
+    str: "string",
+    bool: "boolean",
+    list: "array",
+    dict: "object",
+}
+
+
+def _param_descriptions(func: Callable) -> dict[str, str]:
+    """Read "name: description" lines from the Args: section of a docstring."""
+    descriptions = {}
+    in_args = False
+    for line in (inspect.getdoc(func) or "").splitlines():
+        stripped = line.strip()
+        if stripped == "Args:":
+            in_args = True
+        elif in_args:
+            if not stripped:
+                continue
+            if not line.startswith(" ") and stripped.endswith(":"):
+                break   # Next section (Returns:, Raises:...)
+            name, sep, text = stripped.partition(":")
+            if sep and name.isidentifier():
+                descriptions[name] = text.strip()
+    return descriptions
+
+
+def _param_schema(annotation: Any, description: str) -> dict:
+    """JSON schema for one parameter, from its annotation."""
+    if get_origin(annotation) is Literal:
+        choices = list(get_args(annotation))
+        schema = {"type": _JSON_TYPES.get(type(choices[0]), "string"), "enum": choices}
+    else:
+        schema = {"type": _JSON_TYPES.get(annotation, "string")}
+    if description:
+        schema["description"] = description
+    return schema
+
+
+@dataclass
+class Tool:
+    """A registered tool: the function plus the schema derived from it."""
+    name: str
+    func: Callable
+    description: str
+    parameters: dict = field(default_factory=dict)
+    required: list[str] = field(default_factory=list)
+    pure: bool = False                  # Same arguments always give the same result
+    ttl: float | None = None            # Seconds a cached result stays valid
+    timeout: float | None = None        # Seconds a call may take in the process pool
+    max_concurrent: int | None = None   # Most calls running at once in the process pool
+    local: bool = False                 # Always run in the agent's process
+    batch: Callable | None = None       # Vectorized version: same parameters, arrays in, array out
+    signature: inspect.Signature | None = field(default=None, repr=False)
+    
+    @classmethod
+    def from_function(
+        cls,
+        func: Callable,
+        name: str | None = None,
+        description: str | None = None,
+        pure: bool = False,
+        ttl: float | None = None,
+        timeout: float | None = None,
+        max_concurrent: int | None = None,
+        local: bool = False
+    ) -> "Tool":
+        """
+        Build a tool from a function's signature and docstring.
+        
+        Args:
+            func: The tool function (parameters should be annotated)
+            name: Tool name (default: the function name)
+            description: What the tool does (default: first docstring line)
+            pure: Results depend only on the arguments (cache them forever)
+            ttl: Cache results for this many seconds (for tools that are
+                pure for a while, e.g. lookups of slowly changing data)
+            timeout: Seconds a call may take when run in the process pool
+                (default: the pool's default_timeout)
+            max_concurrent: Most calls running at once in the process pool
+            local: Never run in the process pool (e.g. the tool needs
+                objects from the agent's process)
+        
+        Returns:
+            The tool
+        """
+        docs = _param_descriptions(func)
+        signature = inspect.signature(func)
+        parameters = {}
+        required = []
+        for param in signature.parameters.values():
+            parameters[param.name] = _param_schema(param.annotation, docs.get(param.name, ""))
+            if param.default is inspect.Parameter.empty:
+                required.append(param.name)
+        
+        if description is None:
+            description = (inspect.getdoc(func) or "").split("\n", 1)[0].strip()
+        return cls(
+            name or func.__name__, func, description, parameters, required,
+            pure=pure, ttl=ttl, timeout=timeout, max_concurrent=max_concurrent,
+            local=local, signature=signature
+        )
+    
+    @property
+    def cacheable(self) -> bool:
+        """Whether results of this tool may be cached."""
+        return self.pure or self.ttl is not None
+    
+    def cache_key(self, arguments: dict) -> str | None:
+        """
+        Canonical cache key for a call.
+        
+        Defaults are filled in and keys sorted, so equivalent calls get
+        the same key.
+        
+        Returns:
+            The key, or None if the call can't be cached (bad or
+            non-JSON arguments - the call itself will report the problem)
+        """
+        try:
+            bound = self.signature.bind(**arguments)
+        except TypeError:
+            return None
+        bound.apply_defaults()
+        try:
+            return f"{self.name}:{json.dumps(bound.arguments, sort_keys=True, separators=(',', ':'))}"
+        except (TypeError, ValueError):
+            return None
+    
+    def schema(self) -> dict:
+        """The tool's schema (the format get_tool_schema() returns per tool)."""
+        return {"description": self.description, "parameters": self.parameters, "required": self.required}
+    
+    def prompt_line(self) -> str:
+        """Describe the tool in one prompt line."""
+        params = []
+        for name, spec in self.parameters.items():
+            if "enum" in spec:
+                choices = [f'"{choice}"' for choice in spec["enum"]]
+                kind = ", ".join(choices[:-1]) + f", or {choices[-1]}" if len(choices) > 1 else choices[0]
+            else:
+                kind = spec["type"]
+            params.append(f"{name} ({kind})" if name in self.required else f"{name} ({kind}, optional)")
+        return f"- {self.name}: {self.description.rstrip('.')}. Parameters: {', '.join(params) or 'none'}"
+
+
+@dataclass
+class ToolResult:
+    """Outcome of one tool call (error is set instead of result if it failed)."""
+    tool: str
+    arguments: dict
+    result: Any = None
+    error: str | None = None
+    cached: bool = False                # Answered from the tool cache
+    duration_ms: float | None = None
+    
+    @property
+    def ok(self) -> bool:
+        """Whether the call succeeded."""
+        return self.error is None
+    
+    def to_dict(self) -> dict:
+        """Export as dictionary."""
+        return {
+            "tool": self.tool,
+            "arguments": self.arguments,
+            "result": self.result,
+            "error": self.error,
+            "cached": self.cached,
+        }
+
+
+def _error_text(error: Exception) -> str:
+    """How a failed call's error is reported (in ToolResult and telemetry)."""
+    return f"{type(error).__name__}: {error}"
+
+
+def _elapsed_ms(start: float) -> float:
+    """Milliseconds since a time.perf_counter() reading."""
+    return (time.perf_counter() - start) * 1000
+
+
+class ToolRegistry:
+    """
+    The tools an agent may call.
+    
+    Schemas are derived once per tool, and the schema dict and prompt
+    text are built once and reused until another tool is registered, so
+    building a prompt or dispatching a call doesn't get slower as tools
+    are added.
+    """
+    
+    def __init__(self, max_workers: int = 8, cache_size: int = 1024):
+        """
+        Initialize an empty registry.
+        
+        Args:
+            max_workers: Threads for running several tool calls at once
+            cache_size: Most results kept for pure / ttl tools
+        """
+        self.max_workers = max_workers
+        self.cache = ToolCache(max_entries=cache_size)
+        # Set to log every tool call (with cache hits) to telemetry
+        self.telemetry: Telemetry | None = None
+        # Worker processes for plain tools (None = run them in this process)
+        self.process_pool: ToolProcessPool | None = None
+        self._tools: dict[str, Tool] = {}
+        self._schema: dict | None = None
+        self._prompt: str | None = None
+        self._pool: ThreadPoolExecutor | None = None   # Started on first parallel call
+    
+    def register(
+        self,
+        func: Callable,
+        name: str | None = None,
+        description: str | None = None,
+        pure: bool = False,
+        ttl: float | None = None,
+        timeout: float | None = None,
+        max_concurrent: int | None = None,
+        local: bool = False
+    ) -> Tool:
+        """
+        Register a function as a tool (replacing any tool with the same name).
+        
+        Args:
+            func: The tool function
+            name: Tool name (default: the function name)
+            description: What the tool does (default: first docstring line)
+            pure: Results depend only on the arguments (cache them forever)
+            ttl: Cache results for this many seconds
+            timeout: Seconds a call may take in the process pool
+            max_concurrent: Most calls running at once in the process pool
+            local: Never run in the process pool
+        
+        Returns:
+            The registered tool
+        """
+        registered = Tool.from_function(func, name, description, pure, ttl, timeout, max_concurrent, local)
+        if registered.name in self._tools:
+            # Results of the replaced function are no longer valid
+            self.cache.clear()
+        self._tools[registered.name] = registered
+        self._schema = None
+        self._prompt = None
+        return registered
+    
+    def tool(
+        self,
+        func: Callable | None = None,
+        *,
+        name: str | None = None,
+        description: str | None = None,
+        pure: bool = False,
+        ttl: float | None = None,
+        timeout: float | None = None,
+        max_concurrent: int | None = None,
+        local: bool = False
+    ):
+        """
+        Decorator form of register(); usable as @tool or @tool(pure=True, ...).
+        
+        The function itself is returned unchanged, so it can still be
+        called directly (bypassing the cache).
+        """
+        def decorate(f: Callable) -> Callable:
+            self.register(f, name, description, pure, ttl, timeout, max_concurrent, local)
+            return f
+        
+        return decorate(func) if func is not None else decorate
+    
+    def get(self, name: str) -> Tool:
+        """
+        Look up a tool.
+        
+        Raises:
+            ValueError: If the tool doesn't exist
+        """
+        registered = self._tools.get(name)
+        if registered is None:
+            raise ValueError(f"Unknown tool: {name}")
+        return registered
+    
+    def schema(self) -> dict:
+        """
+        Schemas of all tools, keyed by name.
+        
+        The dict is cached and shared; don't modify it.
+        """
+        if self._schema is None:
+            self._schema = {name: registered.schema() for name, registered in self._tools.items()}
+        return self._schema
+    
+    def prompt_fragment(self) -> str:
+        """The tool list for a prompt, one line per tool (cached)."""
+        if self._prompt is None:
+            self._prompt = "Available tools:\n" + "\n".join(
+                registered.prompt_line() for registered in self._tools.values()
+            )
+        return self._prompt
+    
+    def execute(self, name: str, arguments: dict) -> Any:
+        """
+        Call a tool.
+        
+        Args:
+            name: Tool name
+            arguments: Keyword arguments for the tool
+        
+        Returns:
+            The tool's result
+        
+        Raises:
+            ValueError: If the tool doesn't exist
+        """
+        registered = self.get(name)
+        start = time.perf_counter()
+        try:
+            key, cached, result = self._lookup(registered, arguments)
+            if not cached:
+                func = registered.func
+                result = asyncio.run(func(**arguments)) if inspect.iscoroutinefunction(func) else self._invoke(registered, arguments)
+                self._remember(registered, key, result)
+        except Exception as e:
+            self._log(ToolResult(name, arguments, error=_error_text(e), duration_ms=_elapsed_ms(start)))
+            raise
+        self._log(ToolResult(name, arguments, result, cached=cached, duration_ms=_elapsed_ms(start)))
+        return result
+    
+    def _invoke(self, registered: Tool, arguments: dict) -> Any:
+        """Call a plain tool, in a worker process if the process pool is on."""
+        if self.process_pool is None or registered.local:
+            return registered.func(**arguments)
+        return self.process_pool.run(
+            registered.name, registered.func, arguments,
+            timeout=registered.timeout, max_concurrent=registered.max_concurrent
+        )
+    
+    def _lookup(self, registered: Tool, arguments: dict) -> tuple[str | None, bool, Any]:
+        """Check the cache for a call: (key or None, hit, cached result)."""
+        if not registered.cacheable:
+            return None, False, None
+        key = registered.cache_key(arguments)
+        if key is None:
+            return None, False, None
+        hit, result = self.cache.get(key)
+        return key, hit, result
+    
+    def _remember(self, registered: Tool, key: str | None, result: Any):
+        """Cache a successful result (key is None for uncacheable calls)."""
+        if key is not None:
+            self.cache.put(key, result, registered.ttl)
+    
+    def _log(self, outcome: ToolResult):
+        """Report a call to telemetry, if it's set."""
+        if self.telemetry is not None:
+            self.telemetry.log_tool_call(
+                outcome.tool, outcome.arguments, outcome.result,
+                duration_ms=outcome.duration_ms, error=outcome.error, cached=outcome.cached
+            )
+    
+    def _call(self, name: str, arguments: dict) -> ToolResult:
+        """Run a plain tool, capturing its error."""
+        registered = self._tools[name]
+        start = time.perf_counter()
+        try:
+            key, cached, result = self._lookup(registered, arguments)
+            if not cached:
+                result = self._invoke(registered, arguments)
+                self._remember(registered, key, result)
+            return ToolResult(name, arguments, result, cached=cached, duration_ms=_elapsed_ms(start))
+        except Exception as e:
+            return ToolResult(name, arguments, error=_error_text(e), duration_ms=_elapsed_ms(start))
+    
+    async def _call_async(self, name: str, arguments: dict) -> ToolResult:
+        """Run an async tool, capturing its error."""
+        registered = self._tools[name]
+        start = time.perf_counter()
+        try:
+            key, cached, result = self._lookup(registered, arguments)
+            if not cached:
+                result = await registered.func(**arguments)
+                self._remember(registered, key, result)
+            return ToolResult(name, arguments, result, cached=cached, duration_ms=_elapsed_ms(start))
+        except Exception as e:
+            return ToolResult(name, arguments, error=_error_text(e), duration_ms=_elapsed_ms(start))
+    
+    async def _gather(self, calls: list[tuple[str, dict]]) -> list[ToolResult]:
+        """Run async tools concurrently on one event loop."""
+        return await asyncio.gather(*(self._call_async(name, arguments) for name, arguments in calls))
+    
+    def execute_many(self, calls: list[dict]) -> list[ToolResult]:
+        """
+        Run several tool calls at the same time.
+        
+        A failing call doesn't stop the others; its ToolResult has the
+        error instead. Calls made from inside a running event loop should
+        not include async tools (they need their own loop).
+        
+        Args:
+            calls: Tool calls, each {"tool": name, "arguments": {...}}
+        
+        Returns:
+            One ToolResult per call, in the same order as calls
+        """
+        results: list[ToolResult | None] = [None] * len(calls)
+        plain, coroutines = [], []
+        for i, call in enumerate(calls):
+            name, arguments = call["tool"], call["arguments"]
+            if name not in self._tools:
+                results[i] = ToolResult(name, arguments, error=f"Unknown tool: {name}")
+            elif inspect.iscoroutinefunction(self._tools[name].func):
+                coroutines.append((i, name, arguments))
+            else:
+                plain.append((i, name, arguments))
+        
+        if len(plain) + len(coroutines) == 1 and plain:
+            # Nothing to overlap with: skip the pool
+            i, name, arguments = plain[0]
+            results[i] = self._call(name, arguments)
+            plain = []
+        
+        if plain:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="tool")
+            futures = [(i, self._pool.submit(self._call, name, arguments)) for i, name, arguments in plain]
+        else:
+            futures = []
+        
+        # Async tools run here while the thread pool works on the rest
+        if coroutines:
+            gathered = asyncio.run(self._gather([(name, arguments) for _, name, arguments in coroutines]))
+            for (i, _, _), result in zip(coroutines, gathered):
+                results[i] = result
+        
+        for i, future in futures:
+            results[i] = future.result()
+        
+        # Logged from this thread, in order (telemetry isn't thread-safe)
+        for outcome in results:
+            self._log(outcome)
+        return results
+    
+    def enable_process_pool(
+        self,
+        max_workers: int | None = None,
+        default_timeout: float | None = 30.0,
+        max_result_bytes: int | None = 1024 * 1024
+    ) -> ToolProcessPool:
+        """
+        Run plain (non-async, non-local) tools in warm worker processes.
+        
+        Tools then use more than one core when called in parallel, and a
+        call that runs past its timeout fails with ToolTimeoutError instead
+        of blocking the agent. Tool functions must be module-level (they
+        are pickled to the workers), and since workers are not forked (see
+        agent/tool_pool.py) scripts need an `if __name__ == "__main__":`
+        guard.
+        
+        Args:
+            max_workers: Worker processes (default: number of CPUs)
+            default_timeout: Seconds a call may take unless the tool sets its own
+            max_result_bytes: Largest (pickled) result accepted
+        
+        Returns:
+            The pool (inspect get_stats() for timeouts and restarts)
+        """
+        if self.process_pool is not None:
+            self.process_pool.close()
+        self.process_pool = ToolProcessPool(max_workers, default_timeout, max_result_bytes)
+        return self.process_pool
+    
+    def disable_process_pool(self):
+        """Stop the worker processes and run tools in this process again."""
+        if self.process_pool is not None:
+            self.process_pool.close()
+            self.process_pool = None
+    
+    def close(self):
+        """
+        Stop the threads used for parallel calls and the worker processes.
+        
+        The registry can still be used afterwards; both start again on
+        the next call that needs them (the process pool only if it is
+        enabled again).
+        """
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+        self.disable_process_pool()
+    
+    def batch(self, name: str):
+        """
+        Decorator registering a vectorized implementation of a tool.
+        
+        The function takes the tool's parameters as arrays (one element
+        per row) and returns one result per row.
+        
+        Args:
+            name: Name of an already registered tool
+        """
+        def decorate(f: Callable) -> Callable:
+            self.get(name).batch = f
+            return f
+        
+        return decorate
+    
+    def execute_batch(self, name: str, arguments: dict) -> np.ndarray | list:
+        """
+        Call a tool for many rows at once.
+        
+        Arguments are given as columns: {"a": [1, 2], "b": [3, 4]}. A
+        column given as a single value applies to every row.
+        
+        Tools with a batch implementation are evaluated in one call; for
+        the rest each row is executed (and cached) like a normal call.
+        
+        Args:
+            name: Tool name
+            arguments: Parameter name -> sequence of values (or one value)
+        
+        Returns:
+            One result per row (an array for tools with a batch implementation)
+        
+        Raises:
+            ValueError: If the tool doesn't exist or the columns differ in length
+        """
+        registered = self.get(name)
+        lengths = {len(value) for value in arguments.values() if isinstance(value, (list, tuple, np.ndarray))}
+        if len(lengths) > 1:
+            raise ValueError(f"Batch columns have different lengths: {sorted(lengths)}")
+        rows = lengths.pop() if lengths else 1
+        
+        if registered.batch is None:
+            columns = {
+                key: value if isinstance(value, (list, tuple, np.ndarray)) else [value] * rows
+                for key, value in arguments.items()
+            }
+            return [self.execute(name, {key: column[i] for key, column in columns.items()}) for i in range(rows)]
+        
+        start = time.perf_counter()
+        try:
+            results = registered.batch(**arguments)
+        except Exception as e:
+            self._log(ToolResult(name, {"rows": rows}, error=_error_text(e), duration_ms=_elapsed_ms(start)))
+            raise
+        self._log(ToolResult(name, {"rows": rows}, f"{rows} results", duration_ms=_elapsed_ms(start)))
+        return results
+    
+    def names(self) -> list[str]:
+        """Names of the registered tools."""
+        return list(self._tools)
+    
+    def __contains__(self, name: str) -> bool:
+        """Check whether a tool is registered."""
+        return name in self._tools
+    
+    def __len__(self) -> int:
+        """Return the number of tools."""
+        return len(self._tools)
+    
+    def __repr__(self) -> str:
+        """String representation of the registry."""
+        return f"ToolRegistry({', '.join(self._tools)})"
+
 
+# The default registry, used by the agent and the functions below
+TOOLS = ToolRegistry()
+tool = TOOLS.tool
 
-def calculator(a: float, b: float, operation: str = "add") -> float:
+
+@tool(description="Perform basic arithmetic operations", pure=True)
+def calculator(a: float, b: float, operation: Literal["add", "subtract", "multiply", "divide"] = "add") -> float:
     """
     Simple calculator tool.
     
     Args:
         a: First number
         b: Second number
-        operation: One of "add", "subtract", "multiply", "divide"
-        
+        operation: The operation to perform
+    
     Returns:
         Result of the operation
     """
@@ -33,6 +644,58 @@ def calculator(a: float, b: float, operation: str = "add") -> float:
     return operations[operation](a, b)
 
 
+# Vectorized calculator operations (divide matches calculator: x / 0 -> inf)
+_BATCH_OPERATIONS = {
+    "add": np.add,
+    "subtract": np.subtract,
+    "multiply": np.multiply,
+    "divide": lambda x, y: np.divide(x, y, out=np.full_like(x, np.inf), where=y != 0),
+}
+
+
+@TOOLS.batch("calculator")
+def calculator_batch(a, b, operation="add") -> np.ndarray:
+    """
+    Calculator over arrays: row i is calculator(a[i], b[i], operation[i]).
+    
+    Rows are grouped by operation, so each operation is one NumPy call
+    however many rows use it.
+    
+    Args:
+        a: First numbers (array-like, or one number for all rows)
+        b: Second numbers (array-like, or one number for all rows)
+        operation: Operations (array-like, or one operation for all rows)
+    
+    Returns:
+        float64 array of results
+    
+    Raises:
+        ValueError: If an operation is unknown
+    """
+    a, b = np.broadcast_arrays(np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64))
+    operations = np.asarray(operation)
+    
+    if operations.ndim == 0:
+        op = str(operations)
+        if op not in _BATCH_OPERATIONS:
+            raise ValueError(f"Unknown operation: {op}")
+        return _BATCH_OPERATIONS[op](a, b)
+    
+    operations = np.broadcast_to(operations, a.shape)
+    results = np.empty(a.shape, dtype=np.float64)
+    matched = 0
+    for op, func in _BATCH_OPERATIONS.items():
+        rows = operations == op
+        count = np.count_nonzero(rows)
+        if count:
+            results[rows] = func(a[rows], b[rows])
+            matched += count
+    if matched != operations.size:
+        unknown = operations[~np.isin(operations, list(_BATCH_OPERATIONS))]
+        raise ValueError(f"Unknown operation: {unknown.flat[0]}")
+    return results
+
+
 def get_tool_schema() -> dict:
     """
     Get the schema for available tools.
@@ -42,21 +705,7 @@ def get_tool_schema() -> dict:
     Returns:
         Dictionary of tool names to their schemas
     """
-    return {
-        "calculator": {
-            "description": "Perform basic arithmetic operations",
-            "parameters": {
-                "a": {"type": "number", "description": "First number"},
-                "b": {"type": "number", "description": "Second number"},
-                "operation": {
-                    "type": "string",
-                    "enum": ["add", "subtract", "multiply", "divide"],
-                    "description": "The operation to perform"
-                }
-            },
-            "required": ["a", "b"]
-        }
-    }
+    return TOOLS.schema()
 
 
 def execute_tool(tool_name: str, arguments: dict) -> Any:
@@ -66,18 +715,38 @@ def execute_tool(tool_name: str, arguments: dict) -> Any:
     Args:
         tool_name: Name of the tool to execute
         arguments: Dictionary of arguments for the tool
-        
+    
     Returns:
         Result of the tool execution
-        
+    
     Raises:
         ValueError: If tool doesn't exist
     """
-    tools = {
-        "calculator": calculator,
-    }
+    return TOOLS.execute(tool_name, arguments)
+
+
+def execute_tools(calls: list[dict]) -> list[ToolResult]:
+    """
+    Execute several tool calls concurrently.
     
-    if tool_name not in tools:
-        raise ValueError(f"Unknown tool: {tool_name}")
+    Args:
+        calls: Tool calls, each {"tool": name, "arguments": {...}}
     
-    return tools[tool_name](**arguments)
\ No newline at end of file
+    Returns:
+        One ToolResult per call, in order
+    """
+    return TOOLS.execute_many(calls)
+
+
+def execute_tool_batch(tool_name: str, arguments: dict) -> np.ndarray | list:
+    """
+    Execute a tool for many rows at once (see ToolRegistry.execute_batch).
+    
+    Args:
+        tool_name: Name of the tool to execute
+        arguments: Parameter name -> sequence of values (or one value)
+    
+    Returns:
+        One result per row
+    """
+    return TOOLS.execute_batch(tool_name, arguments)
@@ -0,0 +1,5 @@
+"""
+Benchmarks package - Micro-benchmarks for the agent's hot paths.
+
+Run one with: python -m benchmarks.<name>
+"""
@@ -0,0 +1,78 @@
+"""
+Benchmark: approximate (IVF) vs exact vector search.
+
+Measures recall@k, query latency and build time of shared.ivf_index
+against brute force (shared.vector_index) on clustered vectors shaped like
+sentence embeddings of many related facts.
+
+Run with:
+    python -m benchmarks.ann_recall
+"""
+
+import time
+
+import numpy as np
+
+from shared.ivf_index import IVFIndex
+from shared.vector_index import VectorIndex, normalize
+
+
+def make_data(n: int, queries: int, dim: int = 128, topics: int = 2000, seed: int = 3):
+    """
+    Generate vectors scattered around a few thousand topic directions.
+    
+    Returns:
+        (stored vectors, query vectors) - queries are about the same topics
+    """
+    rng = np.random.default_rng(seed)
+    centers = normalize(rng.standard_normal((topics, dim)))
+    
+    def sample(count: int) -> np.ndarray:
+        noise = rng.standard_normal((count, dim)).astype(np.float32) * 0.08
+        return normalize(centers[rng.integers(0, topics, count)] + noise)
+    
+    return sample(n), sample(queries)
+
+
+def build(index, vectors: np.ndarray, batch: int = 1024) -> float:
+    """Insert vectors in batches (as SemanticMemory does); return seconds taken."""
+    start = time.perf_counter()
+    for offset in range(0, len(vectors), batch):
+        rows = vectors[offset:offset + batch]
+        index.add_many(list(range(offset, offset + len(rows))), rows)
+    return time.perf_counter() - start
+
+
+def run(sizes: tuple = (10_000, 100_000, 300_000), k: int = 10, queries: int = 200):
+    """Run the benchmark and print a comparison table."""
+    print(f"{'vectors':>9}{'n_probe':>9}{'recall@' + str(k):>11}{'exact ms':>10}{'ivf ms':>8}{'speedup':>9}{'build s':>9}")
+    print("-" * 65)
+    
+    for n in sizes:
+        vectors, query_vectors = make_data(n, queries)
+        
+        exact = VectorIndex(dim=vectors.shape[1])
+        build(exact, vectors)
+        ivf = IVFIndex(dim=vectors.shape[1])
+        build_seconds = build(ivf, vectors)
+        # Training runs in the background: wait until the layout has caught up
+        start = time.perf_counter()
+        while not ivf.finish_training():
+            pass
+        build_seconds += time.perf_counter() - start
+        
+        start = time.perf_counter()
+        truth = [{key for key, _ in exact.search(q, k)} for q in query_vectors]
+        exact_ms = (time.perf_counter() - start) / queries * 1e3
+        
+        for n_probe in (4, 16, 64):
+            start = time.perf_counter()
+            found = [{key for key, _ in ivf.search(q, k, n_probe=n_probe)} for q in query_vectors]
+            ivf_ms = (time.perf_counter() - start) / queries * 1e3
+            recall = sum(len(f & t) for f, t in zip(found, truth)) / (k * queries)
+            print(f"{n:>9}{n_probe:>9}{recall:>11.3f}{exact_ms:>10.2f}{ivf_ms:>8.2f}"
+                  f"{exact_ms / ivf_ms:>8.1f}x{build_seconds:>9.1f}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,65 @@
+"""
+Micro-benchmark: batch calculator vs one tool call per row.
+
+Batch workloads used to call execute_tool("calculator", ...) once per
+row. execute_batch hands whole columns to the NumPy implementation, one
+vectorized operation per distinct operation.
+
+Run with:
+    python -m benchmarks.batch_tools
+"""
+
+import time
+
+import numpy as np
+
+from agent.tools import TOOLS, execute_tool, execute_tool_batch
+
+OPERATIONS = ["add", "subtract", "multiply", "divide"]
+
+
+def _rows(n: int, seed: int = 0) -> tuple[list, list, list]:
+    """Random rows, including some divisions by zero."""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(-1000, 1000, n).astype(float).tolist()
+    b = rng.integers(-5, 5, n).astype(float).tolist()
+    ops = [OPERATIONS[i] for i in rng.integers(0, len(OPERATIONS), n)]
+    return a, b, ops
+
+
+def run(sizes: tuple = (100, 1_000, 10_000, 100_000)):
+    """
+    Run the benchmark and print a comparison table.
+    
+    Args:
+        sizes: Row counts to time
+    """
+    # Measure evaluation, not the result cache
+    TOOLS.cache.clear()
+    calculator = TOOLS.get("calculator")
+    pure, calculator.pure = calculator.pure, False
+    
+    execute_tool_batch("calculator", {"a": [1.0], "b": [0.0], "operation": ["divide"]})   # Warm up NumPy
+    
+    print(f"{'rows':>8}{'per-row ms':>13}{'batch ms':>10}{'speedup':>9}  equal")
+    print("-" * 48)
+    try:
+        for n in sizes:
+            a, b, ops = _rows(n)
+            
+            start = time.perf_counter()
+            expected = [execute_tool("calculator", {"a": x, "b": y, "operation": op}) for x, y, op in zip(a, b, ops)]
+            per_row = (time.perf_counter() - start) * 1000
+            
+            start = time.perf_counter()
+            results = execute_tool_batch("calculator", {"a": a, "b": b, "operation": ops})
+            batch = (time.perf_counter() - start) * 1000
+            
+            equal = "yes" if np.array_equal(results, np.array(expected, dtype=np.float64)) else "no"
+            print(f"{n:>8}{per_row:>13.2f}{batch:>10.2f}{per_row / batch:>8.1f}x  {equal}")
+    finally:
+        calculator.pure = pure
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,72 @@
+"""
+Micro-benchmark: JSON extraction from model outputs.
+
+Compares the single-pass scanner (shared.json_scanner.scan_json) with the
+strategy-by-strategy cleanup that extract_json_from_text used before it
+(shared.utils._extract_json_heuristics), on outputs shaped like the ones
+the agent's prompts actually produce.
+
+Run with:
+    python -m benchmarks.json_extraction
+"""
+
+import timeit
+
+from shared.json_scanner import scan_json
+from shared.utils import extract_json_from_text, _extract_json_heuristics
+
+
+# Outputs in the shapes we see from local models, one per failure mode
+CORPUS = {
+    "clean": '{"decision": "summarize_text"}',
+    "tool_call": '{"tool": "calculator", "arguments": {"a": 42, "b": 7, "operation": "multiply"}}',
+    "fenced": '```json\n{"topic": "quantum computing", "difficulty": "advanced"}\n```',
+    "prefixed": 'Here\'s the JSON: {"reply": "Nice to meet you, Alice!", "save_to_memory": "User\'s name is Alice"}',
+    "trailing_text": (
+        '{"action": "analyze", "reason": "The user wants to understand loops"}\n'
+        'I chose analyze because the request is broad and needs to be broken down first.'
+    ),
+    "two_objects": '{"action": "research", "reason": "gather facts"} {"action": "write", "reason": "draft"}',
+    "brace_in_string": '{"reply": "Use {} for dicts and [] for lists", "save_to_memory": null}',
+    "aot_graph": (
+        'Response: {"nodes": [' + ", ".join(
+            f'{{"id": "{i}", "action": "step_{i}", "depends_on": ["{i - 1}"]}}' for i in range(1, 30)
+        ) + ']}'
+    ),
+    "plan_multiline": '{\n  "steps": [\n    "Research AI agents",\n    "Outline the post",\n    "Write the draft",\n    "Review"\n  ]\n}',
+    "truncated": '{"reply": "Sure, here is a long explanation that got cut off by max_tok',
+    "no_json": "I'm sorry, I can't help with that request.",
+}
+
+
+def _time(func, text: str, number: int) -> float:
+    """Average time per call in microseconds."""
+    return timeit.timeit(lambda: func(text), number=number) / number * 1e6
+
+
+def run(number: int = 20000):
+    """
+    Run the benchmark and print a comparison table.
+    
+    Args:
+        number: Calls per function per corpus entry
+    """
+    print(f"{'case':<18}{'heuristics µs':>15}{'scanner µs':>12}{'extract µs':>12}{'speedup':>9}  agree")
+    print("-" * 74)
+    
+    total_old = total_new = 0.0
+    for name, text in CORPUS.items():
+        old = _time(_extract_json_heuristics, text, number)
+        new = _time(scan_json, text, number)
+        combined = _time(extract_json_from_text, text, number)
+        total_old += old
+        total_new += combined
+        agree = "yes" if _extract_json_heuristics(text) == extract_json_from_text(text) else "no"
+        print(f"{name:<18}{old:>15.2f}{new:>12.2f}{combined:>12.2f}{old / combined:>8.1f}x  {agree}")
+    
+    print("-" * 74)
+    print(f"{'total':<18}{total_old:>15.2f}{'':>12}{total_new:>12.2f}{total_old / total_new:>8.1f}x")
+
+
+if __name__ == "__main__":
+    run()
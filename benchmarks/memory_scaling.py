@@ -0,0 +1,96 @@
+"""
+Benchmark: Memory add/search cost as memory grows.
+
+Compares the hash-indexed Memory with the original list-based version
+(duplicate check by scanning the list) at 10^3 to 10^6 facts.
+
+Run with:
+    python -m benchmarks.memory_scaling
+"""
+
+import random
+import time
+
+from agent.memory import Memory
+
+
+class ListMemory:
+    """The original list-backed memory, kept here as the baseline."""
+    
+    def __init__(self):
+        self.items = []
+    
+    def add(self, item: str):
+        if item and item not in self.items:
+            self.items.append(item)
+    
+    def search(self, query: str, top_k: int | None = None) -> list[str]:
+        query_lower = query.lower()
+        return [item for item in self.items if query_lower in item.lower()]
+
+
+# The list baseline is O(N^2) to fill; beyond this it would run for hours
+LIST_BASELINE_LIMIT = 10_000
+
+
+VERBS = ["prefers", "lives in", "works on", "asked about", "is allergic to", "owns", "visited",
+         "wants to learn", "dislikes", "is planning", "recommended", "mentioned"]
+# A few thousand made-up nouns, so word frequencies look like real text
+NOUNS = [f"{a}{b}" for a in ("ka", "lo", "mi", "ne", "ru", "sa", "te", "vo", "zi", "po")
+         for b in range(400)]
+
+
+def make_facts(n: int, seed: int = 7) -> list[str]:
+    """Generate n distinct facts shaped like what agents save."""
+    rng = random.Random(seed)
+    return [
+        f"User {rng.choice(VERBS)} {rng.choice(NOUNS)} and {rng.choice(NOUNS)} (fact {i})"
+        for i in range(n)
+    ]
+
+
+def make_queries(count: int, seed: int = 11) -> list[str]:
+    """Generate questions that mention one or two remembered things."""
+    rng = random.Random(seed)
+    return [f"What does the user think about {rng.choice(NOUNS)}?" for _ in range(count)]
+
+
+def measure(memory_class, facts: list[str], queries: int = 20) -> tuple[float, float]:
+    """
+    Time filling a memory and searching it.
+    
+    Returns:
+        (µs per add, ms per search)
+    """
+    memory = memory_class()
+    start = time.perf_counter()
+    for fact in facts:
+        memory.add(fact)
+    add_us = (time.perf_counter() - start) / len(facts) * 1e6
+    
+    start = time.perf_counter()
+    for query in make_queries(queries):
+        memory.search(query, top_k=5)
+    search_ms = (time.perf_counter() - start) / queries * 1e3
+    
+    return add_us, search_ms
+
+
+def run(sizes: tuple = (1_000, 10_000, 100_000, 1_000_000)):
+    """Run the benchmark and print a comparison table."""
+    print(f"{'items':>10}{'list add µs':>14}{'dict add µs':>14}{'list search ms':>17}{'dict search ms':>17}")
+    print("-" * 72)
+    
+    for n in sizes:
+        facts = make_facts(n)
+        dict_add, dict_search = measure(Memory, facts)
+        if n <= LIST_BASELINE_LIMIT:
+            list_add, list_search = measure(ListMemory, facts)
+            list_add, list_search = f"{list_add:.2f}", f"{list_search:.2f}"
+        else:
+            list_add = list_search = "(skipped)"
+        print(f"{n:>10}{list_add:>14}{dict_add:>14.2f}{list_search:>17}{dict_search:>17.2f}")
+
+
+if __name__ == "__main__":
+    run()
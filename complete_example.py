@@ -238,7 +238,7 @@ def lesson_12_telemetry():
     from agent.telemetry import Telemetry
     
     agent = Agent("models/llama-3-8b-instruct.gguf")
-    telemetry = Telemetry(log_file="agent_telemetry.jsonl")
+    telemetry = agent.enable_telemetry(Telemetry(log_file="agent_telemetry.jsonl"))
     
     # Clear previous telemetry for clean demo
     telemetry.clear()
@@ -282,13 +282,9 @@ def lesson_12_telemetry():
     )
     
     if tool_call:
-        telemetry.log_tool_call(
-            tool_name=tool_call.get("tool", "unknown"),
-            arguments=tool_call.get("arguments", {}),
-            result=agent.execute_tool_call(tool_call) if tool_call else None,
-            duration_ms=1.0  # Tool execution is fast
-        )
-        print(f"   Tool: {tool_call}")
+        # The registry logs the call itself (timing, errors, cache hits)
+        result2 = agent.execute_tool_call(tool_call)
+        print(f"   Tool: {tool_call} -> {result2}")
     
     # Operation 3: Memory
     print("\n3. Memory operation...")
@@ -0,0 +1,411 @@
+"""
+IVFIndex - Approximate cosine search for large vector sets, on NumPy.
+
+Brute force compares the query with every vector. An inverted-file (IVF)
+index first groups the vectors into clusters with k-means, and a query
+only scans the few clusters whose centres are closest to it. With ~sqrt(N)
+clusters and a handful of them probed, a query touches a few percent of
+the vectors instead of all of them.
+
+The price is recall: a true neighbour that landed in a cluster we didn't
+probe is missed. Probing more clusters (n_probe) trades speed for recall.
+
+Until there are enough vectors to be worth clustering, the index is a
+single exact VectorIndex. Clustering (k-means plus sorting every vector
+into its cluster) takes seconds on large indexes, so it runs in a
+background thread on a copy of the vectors; adds and searches keep using
+the current layout until the new one is ready.
+"""
+
+import json
+import math
+import threading
+
+import numpy as np
+
+from shared.vector_index import VectorIndex, normalize
+
+
+def _nearest(vectors: np.ndarray, centroids: np.ndarray, chunk: int = 8192) -> np.ndarray:
+    """Index of the most similar centroid for each vector (in chunks to bound memory)."""
+    assignment = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), chunk):
+        assignment[start:start + chunk] = np.argmax(vectors[start:start + chunk] @ centroids.T, axis=1)
+    return assignment
+
+
+def kmeans(vectors: np.ndarray, n_clusters: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """
+    Cluster unit vectors by cosine similarity (spherical k-means).
+    
+    Args:
+        vectors: Unit-length float32 array of shape (n, dim)
+        n_clusters: Number of clusters (at most n)
+        iterations: Assignment/update rounds
+        seed: Random seed for the initial centres
+    
+    Returns:
+        Unit-length centroids, shape (n_clusters, dim)
+    """
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)].copy()
+    
+    for _ in range(iterations):
+        assignment = _nearest(vectors, centroids)
+        
+        # Sum each cluster's members in one pass over the sorted assignment
+        order = np.argsort(assignment, kind="stable")
+        counts = np.bincount(assignment, minlength=n_clusters)
+        filled = counts > 0
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        sums = np.add.reduceat(vectors[order], starts[filled], axis=0)
+        
+        centroids[filled] = normalize(sums)
+        # Restart empty clusters at random vectors
+        empty = int((~filled).sum())
+        if empty:
+            centroids[~filled] = vectors[rng.choice(len(vectors), empty, replace=False)]
+    
+    return centroids
+
+
+def _group(keys: list, vectors: np.ndarray, assignment: np.ndarray, lists: list[VectorIndex], list_of: dict):
+    """Add each vector to the list of its assigned cluster, recording where it went."""
+    for cluster in np.unique(assignment):
+        rows = np.flatnonzero(assignment == cluster)
+        cluster_keys = [keys[row] for row in rows]
+        lists[cluster].add_many(cluster_keys, vectors[rows])
+        for key in cluster_keys:
+            list_of[key] = int(cluster)
+
+
+class IVFIndex:
+    """
+    Approximate top-k cosine search with incremental inserts and deletes.
+    
+    Same interface as VectorIndex, so either can back SemanticMemory.
+    
+    Usage:
+        index = IVFIndex(dim=768)
+        index.add_many(keys, vectors)
+        index.search(query_vector, k=5)  # [(key, 0.91), ...]
+    
+    The clustering is learned from the vectors present when the index first
+    reaches train_after vectors, and relearned whenever the index has grown
+    by retrain_growth times since. New vectors in between join the nearest
+    existing cluster.
+    
+    With auto_train, that training runs in a background thread and the
+    result is swapped in by the next add_many or search (vectors added or
+    removed meanwhile are carried over). Without it, nothing is clustered
+    until train() is called. The index itself is not thread-safe: use it
+    from one thread at a time, as before.
+    """
+    
+    def __init__(
+        self,
+        dim: int,
+        n_probe: int = 16,
+        train_after: int = 4096,
+        retrain_growth: float = 4.0,
+        seed: int = 0,
+        auto_train: bool = True
+    ):
+        """
+        Initialize an empty index.
+        
+        Args:
+            dim: Vector dimension
+            n_probe: Clusters scanned per query (more = better recall, slower)
+            train_after: Stay exact until the index holds this many vectors
+            retrain_growth: Re-cluster after growing by this factor
+            seed: Random seed for k-means
+            auto_train: Train in the background when the sizes above are
+                reached (False = only when train() is called)
+        """
+        self.dim = dim
+        self.n_probe = n_probe
+        self.train_after = train_after
+        self.retrain_growth = retrain_growth
+        self.seed = seed
+        self.auto_train = auto_train
+        
+        self._centroids: np.ndarray | None = None    # None until trained
+        self._lists: list[VectorIndex] = [VectorIndex(dim)]
+        self._list_of: dict = {}                     # Key -> cluster number
+        self._trained_size = 0
+        self._training: tuple[threading.Thread, list] | None = None   # (thread, [result] once done)
+        self._changed: set = set()                   # Keys added or removed since training started
+    
+    @property
+    def trained(self) -> bool:
+        """Whether vectors are clustered (searches are approximate)."""
+        return self._centroids is not None
+    
+    @property
+    def needs_training(self) -> bool:
+        """Whether the index has reached train_after, or grown retrain_growth times since training."""
+        size = len(self._list_of)
+        if self._centroids is None:
+            return size >= self.train_after
+        return size >= self._trained_size * self.retrain_growth
+    
+    @property
+    def training(self) -> bool:
+        """Whether a background training has started and not been swapped in yet."""
+        return self._training is not None
+    
+    def add(self, key, vector):
+        """
+        Add or replace one vector.
+        
+        Args:
+            key: Any hashable identifier
+            vector: Vector of length dim
+        """
+        self.add_many([key], np.asarray(vector, dtype=np.float32).reshape(1, -1))
+    
+    def add_many(self, keys: list, vectors):
+        """
+        Add or replace many vectors.
+        
+        Args:
+            keys: Identifiers, one per row of vectors
+            vectors: Array of shape (len(keys), dim)
+        """
+        vectors = normalize(np.asarray(vectors, dtype=np.float32).reshape(len(keys), self.dim))
+        for key in keys:
+            self.remove(key)
+        if self._training is not None:
+            self._changed.update(keys)
+        self._place(keys, vectors)
+        self._poll_training()
+    
+    def _place(self, keys: list, vectors: np.ndarray):
+        """Put new (unit length) vectors into their nearest clusters."""
+        if self._centroids is None:
+            assignment = np.zeros(len(keys), dtype=np.int64)
+        else:
+            assignment = _nearest(vectors, self._centroids)
+        _group(keys, vectors, assignment, self._lists, self._list_of)
+    
+    def train(self, n_lists: int | None = None):
+        """
+        Cluster the current vectors and redistribute them, in this thread.
+        
+        This is slow on large indexes; auto_train does the same in the
+        background. A background training still running is abandoned.
+        
+        Args:
+            n_lists: Number of clusters (default: about sqrt of the vector count)
+        """
+        self._training = None
+        self._changed = set()
+        keys, vectors = self._all_vectors()
+        if keys:
+            self._install(self._fit(keys, vectors, n_lists), set())
+    
+    def _fit(self, keys: list, vectors: np.ndarray, n_lists: int | None = None) -> tuple:
+        """
+        Cluster a copy of the vectors into a new layout.
+        
+        Only reads its arguments and the index settings, so it can run in
+        another thread while the index is in use.
+        
+        Returns:
+            (centroids, lists, list_of, number of vectors)
+        """
+        n_lists = min(n_lists or max(16, int(math.sqrt(len(keys)))), len(keys))
+        
+        # k-means on a sample is as good as on everything, and much cheaper
+        sample = vectors
+        if len(vectors) > 256 * n_lists:
+            rng = np.random.default_rng(self.seed)
+            sample = vectors[rng.choice(len(vectors), 256 * n_lists, replace=False)]
+        
+        centroids = kmeans(sample, n_lists, seed=self.seed)
+        lists = [VectorIndex(self.dim) for _ in range(n_lists)]
+        list_of = {}
+        _group(keys, vectors, _nearest(vectors, centroids), lists, list_of)
+        return centroids, lists, list_of, len(keys)
+    
+    def _install(self, layout: tuple, changed: set):
+        """
+        Switch to a layout from _fit, carrying over the keys in changed
+        (added, replaced or removed after its vectors were copied).
+        """
+        centroids, lists, list_of, size = layout
+        for key in changed:
+            cluster = list_of.pop(key, None)
+            if cluster is not None:
+                lists[cluster].remove(key)
+        present = [key for key in changed if key in self._list_of]
+        vectors = [self._lists[self._list_of[key]].get(key) for key in present]
+        
+        self._centroids, self._lists, self._list_of, self._trained_size = centroids, lists, list_of, size
+        if present:
+            self._place(present, np.stack(vectors))
+    
+    def _poll_training(self):
+        """Swap in a finished background training, and start one if it's time."""
+        if self._training is not None:
+            thread, result = self._training
+            if thread.is_alive():
+                return
+            self._training = None
+            changed, self._changed = self._changed, set()
+            if result:
+                self._install(result[0], changed)
+        
+        if self.auto_train and self.needs_training:
+            keys, vectors = self._all_vectors()   # A copy: the thread never sees later changes
+            result = []
+            thread = threading.Thread(
+                target=lambda: result.append(self._fit(keys, vectors)), name="ivf-train", daemon=True
+            )
+            self._training = (thread, result)
+            thread.start()
+    
+    def finish_training(self, timeout: float | None = None) -> bool:
+        """
+        Wait for a background training and swap it in.
+        
+        Args:
+            timeout: Seconds to wait at most (None = until it's done)
+        
+        Returns:
+            True if no training is left running
+        """
+        if self._training is not None:
+            self._training[0].join(timeout)
+            self._poll_training()
+        return self._training is None
+    
+    def _all_vectors(self) -> tuple[list, np.ndarray]:
+        """Collect every key and vector across clusters."""
+        keys = []
+        parts = []
+        for cluster in self._lists:
+            cluster_keys, cluster_vectors = cluster.items()
+            keys.extend(cluster_keys)
+            parts.append(cluster_vectors)
+        if not keys:
+            return [], np.zeros((0, self.dim), dtype=np.float32)
+        return keys, np.concatenate(parts)
+    
+    def remove(self, key) -> bool:
+        """
+        Remove a vector.
+        
+        Args:
+            key: Identifier to remove
+        
+        Returns:
+            True if the key was present
+        """
+        cluster = self._list_of.pop(key, None)
+        if cluster is None:
+            return False
+        if self._training is not None:
+            self._changed.add(key)
+        return self._lists[cluster].remove(key)
+    
+    def search(self, vector, k: int = 5, n_probe: int | None = None) -> list[tuple]:
+        """
+        Find (approximately) the k most similar vectors.
+        
+        Args:
+            vector: Query vector of length dim
+            k: Number of results
+            n_probe: Override the number of clusters scanned
+        
+        Returns:
+            List of (key, cosine similarity), most similar first
+        """
+        self._poll_training()
+        if not self._list_of or k <= 0:
+            return []
+        
+        query = normalize(vector)
+        if self._centroids is None:
+            return self._lists[0].search(query, k)
+        
+        n_probe = min(n_probe or self.n_probe, len(self._lists))
+        closeness = self._centroids @ query
+        probe = np.argpartition(-closeness, n_probe - 1)[:n_probe]
+        
+        results = []
+        for cluster in probe:
+            results.extend(self._lists[cluster].search(query, k))
+        results.sort(key=lambda result: result[1], reverse=True)
+        return results[:k]
+    
+    def save(self, path: str):
+        """
+        Write the index (vectors and clustering) to a .npz file.
+        
+        A background training that hasn't finished is not saved.
+        
+        Args:
+            path: File to write (keys must be JSON-serializable)
+        """
+        keys, vectors = self._all_vectors()
+        clusters = np.array([self._list_of[key] for key in keys], dtype=np.int64)
+        centroids = self._centroids if self._centroids is not None else np.zeros((0, self.dim), dtype=np.float32)
+        np.savez(
+            path,
+            vectors=vectors,
+            clusters=clusters,
+            centroids=centroids,
+            keys=np.array(json.dumps(keys)),
+            settings=np.array([self.n_probe, self.train_after, self.retrain_growth, self.seed, self._trained_size]),
+        )
+    
+    @classmethod
+    def load(cls, path: str) -> "IVFIndex":
+        """
+        Read an index written by save() without re-clustering.
+        
+        Args:
+            path: File to read
+        
+        Returns:
+            The loaded index
+        """
+        with np.load(path) as data:
+            vectors = data["vectors"]
+            clusters = data["clusters"]
+            centroids = data["centroids"]
+            keys = json.loads(str(data["keys"]))
+            n_probe, train_after, retrain_growth, seed, trained_size = data["settings"].tolist()
+        
+        index = cls(vectors.shape[1], int(n_probe), int(train_after), retrain_growth, int(seed))
+        if len(centroids):
+            index._centroids = centroids
+            index._lists = [VectorIndex(index.dim) for _ in range(len(centroids))]
+            index._trained_size = int(trained_size)
+        
+        _group(keys, vectors, clusters, index._lists, index._list_of)
+        return index
+    
+    def clear(self):
+        """Remove all vectors and forget the clustering (and any training in progress)."""
+        self._training = None
+        self._changed = set()
+        self._centroids = None
+        self._lists = [VectorIndex(self.dim)]
+        self._list_of = {}
+        self._trained_size = 0
+    
+    def __contains__(self, key) -> bool:
+        """Check whether a key is indexed."""
+        return key in self._list_of
+    
+    def __len__(self) -> int:
+        """Return the number of indexed vectors."""
+        return len(self._list_of)
+    
+    def __repr__(self) -> str:
+        """String representation of the index."""
+        clusters = len(self._lists) if self.trained else "untrained"
+        return f"IVFIndex({len(self._list_of)} vectors, dim={self.dim}, clusters={clusters})"
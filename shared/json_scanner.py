@@ -0,0 +1,197 @@
+"""
+Incremental JSON scanner for model outputs.
+
+Models wrap JSON in fences, prefixes ("JSON:", "Here's the JSON:") and
+trailing explanations. Instead of trying one cleanup strategy after
+another, the scanner walks the text once, tracking open brackets and
+strings, and parses the first top-level value the moment it closes.
+
+Because it keeps its state between calls, it can be fed a stream token by
+token - which lets generation stop as soon as the JSON is complete.
+"""
+
+import json
+import re
+
+# Characters that matter outside a string: brackets and the start of a string
+_STRUCTURE = re.compile(r'[{}\[\]"]')
+# Characters that matter inside a string: its end and escapes
+_STRING_SPECIAL = re.compile(r'["\\]')
+# The rest of a string that closes within the text we have, in one step
+_STRING_REST = re.compile(r'(?:[^"\\]|\\.)*"', re.DOTALL)
+_OPENER = re.compile(r'[{\[]')
+_OBJECT_OPENER = re.compile(r'\{')
+
+_decoder = json.JSONDecoder()
+
+
+class JsonScanner:
+    """
+    Find the first complete top-level JSON value in a stream of text.
+    
+    Usage:
+        scanner = JsonScanner()
+        for token in stream:
+            if scanner.feed(token) is not None:
+                break
+        print(scanner.value)
+    
+    Each character is looked at once. Only when brackets balance is the
+    candidate handed to json.loads. If that candidate turns out not to be
+    JSON (e.g. "[see below]"), scanning resumes right after its opening
+    bracket.
+    
+    With objects_only, a value can only start at "{": arrays before the
+    first object ("[1, 2] then {...}") are skipped like any other text.
+    """
+    
+    def __init__(self, objects_only: bool = False):
+        """
+        Initialize an empty scanner.
+        
+        Args:
+            objects_only: Only accept a JSON object as the value
+        """
+        self._opener = _OBJECT_OPENER if objects_only else _OPENER
+        self.reset()
+    
+    def reset(self):
+        """Forget everything fed so far."""
+        self.value = None
+        self.done = False
+        self._stack = []
+        self._in_string = False
+        self._escaped = False
+        self._pieces = []       # Text of the current candidate from earlier chunks
+    
+    def feed(self, chunk: str):
+        """
+        Feed the next piece of text.
+        
+        Args:
+            chunk: Next piece of model output (a token, a line, or everything)
+        
+        Returns:
+            The parsed value once the first complete JSON value has been
+            seen, None until then
+        """
+        if self.done or not chunk:
+            return self.value
+        
+        pos = 0
+        piece_start = 0
+        
+        while pos < len(chunk):
+            # Looking for the start of a candidate value
+            if not self._stack:
+                match = self._opener.search(chunk, pos)
+                if match is None:
+                    return None
+                self._stack.append(match.group())
+                self._pieces = []
+                piece_start = match.start()
+                pos = match.end()
+                continue
+            
+            if self._in_string:
+                if self._escaped:
+                    # The escaped character was the first one of this chunk
+                    self._escaped = False
+                    pos += 1
+                    continue
+                match = _STRING_SPECIAL.search(chunk, pos)
+                if match is None:
+                    break
+                if match.group() == '\\':
+                    if match.end() < len(chunk):
+                        pos = match.end() + 1
+                    else:
+                        self._escaped = True
+                        pos = match.end()
+                else:
+                    self._in_string = False
+                    pos = match.end()
+                continue
+            
+            match = _STRUCTURE.search(chunk, pos)
+            if match is None:
+                break
+            char = match.group()
+            pos = match.end()
+            
+            if char == '"':
+                rest = _STRING_REST.match(chunk, pos)
+                if rest is not None:
+                    pos = rest.end()
+                else:
+                    self._in_string = True
+            elif char in '{[':
+                self._stack.append(char)
+            else:
+                self._stack.pop()
+                if not self._stack:
+                    if self._pieces:
+                        # The candidate started in an earlier chunk: join it
+                        # once, so a rejected candidate is rescanned in place
+                        prefix = "".join(self._pieces)
+                        chunk = prefix + chunk[piece_start:]
+                        pos = len(prefix) + pos - piece_start
+                        piece_start = 0
+                        self._pieces = []
+                    if self._accept(chunk[piece_start:pos]):
+                        return self.value
+                    # Not JSON after all: rescan from just after its opening bracket
+                    pos = piece_start + 1
+                    self._in_string = False
+                    self._escaped = False
+        
+        if self._stack:
+            self._pieces.append(chunk[piece_start:])
+        return None
+    
+    def _accept(self, candidate: str) -> bool:
+        """Try to parse a balanced candidate; remember it on success."""
+        try:
+            self.value = json.loads(candidate)
+        except (json.JSONDecodeError, RecursionError):
+            return False
+        self.done = True
+        return True
+    
+    @property
+    def pending(self) -> bool:
+        """Whether a value has been opened but not yet closed."""
+        return bool(self._stack)
+
+
+def scan_json(text: str, objects_only: bool = False):
+    """
+    Return the first complete top-level JSON value in text.
+    
+    Fences, prefixes and anything after the value are skipped without a
+    separate cleanup pass. Gives the same result as feeding the whole text
+    to a JsonScanner.
+    
+    Args:
+        text: Text that might contain JSON
+        objects_only: Only accept a JSON object as the value
+    
+    Returns:
+        Parsed JSON (dict, or list unless objects_only) if found, None otherwise
+    """
+    if not text:
+        return None
+    
+    # Well-formed values are decoded straight from their opening bracket by
+    # the C decoder, which stops at the end of the value and ignores the rest
+    match = (_OBJECT_OPENER if objects_only else _OPENER).search(text)
+    if match is None:
+        return None
+    try:
+        return _decoder.raw_decode(text, match.start())[0]
+    except (json.JSONDecodeError, RecursionError):
+        pass
+    
+    # Malformed or truncated: walk the brackets once from there
+    scanner = JsonScanner(objects_only=objects_only)
+    return scanner.feed(text[match.start():])
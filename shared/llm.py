@@ -10,16 +10,84 @@ It intentionally has no magic:
 Just text in, text out.
 """
 
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+
 from shared.llama_logging import disable_llama_logging
-from llama_cpp import Llama
+from shared.utils import extract_json_from_text, is_truncated_json, repair_truncated_json
+from shared.json_scanner import JsonScanner
+from llama_cpp import Llama, LlamaState
 
 disable_llama_logging()
 
+
+class Deadline:
+    """
+    A wall-clock point in time after which work should stop.
+    
+    One deadline can be shared by every call in a trace (a whole agent
+    loop, a whole graph execution), so the total time is bounded and not
+    just each individual call.
+    """
+    
+    def __init__(self, seconds: float | None = None):
+        """
+        Start a deadline.
+        
+        Args:
+            seconds: Time budget from now, or None for no limit
+        """
+        self.expires_at = None if seconds is None else time.monotonic() + seconds
+    
+    def remaining(self) -> float | None:
+        """Seconds left before expiry (never negative), or None if unbounded."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+    
+    def expired(self) -> bool:
+        """Check whether the deadline has passed."""
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+    
+    def __repr__(self) -> str:
+        """String representation of the deadline."""
+        remaining = self.remaining()
+        if remaining is None:
+            return "Deadline(unbounded)"
+        return f"Deadline({remaining:.2f}s left)"
+
+
+@dataclass
+class GenerationResult:
+    """
+    Generated text plus the reason generation stopped.
+    
+    finish_reason is "stop" (stop sequence or end of text), "length"
+    (max_tokens reached) or "timeout" (a deadline expired mid-decode,
+    so text is only the partial output).
+    """
+    text: str
+    finish_reason: str = "stop"
+    
+    @property
+    def timed_out(self) -> bool:
+        """Whether generation was cut off by a deadline."""
+        return self.finish_reason == "timeout"
+
+
 class LocalLLM:
     """
     A minimal wrapper for local LLM inference using llama.cpp.
     
     This class is intentionally simple and grows throughout the lessons.
+    
+    llama.cpp must not be used from two threads at once, so every method
+    that touches the model holds `lock` (an RLock). Code that needs several
+    calls to follow each other in the KV cache can hold it across them.
     """
     
     def __init__(
@@ -27,7 +95,8 @@ class LocalLLM:
         model_path: str,
         temperature: float = 0.2,
         max_tokens: int = 512,
-        n_ctx: int = 2048
+        n_ctx: int = 2048,
+        timeout: float | None = None
     ):
         """
         Initialize the local LLM.
@@ -37,6 +106,7 @@ class LocalLLM:
             temperature: Sampling temperature (0.0 = deterministic, 1.0 = creative)
             max_tokens: Maximum tokens to generate per response
             n_ctx: Context window size
+            timeout: Default per-call time limit in seconds (None = no limit)
         """
         self.llm = Llama(
             model_path=model_path,
@@ -44,9 +114,77 @@ class LocalLLM:
             n_ctx=n_ctx,
             verbose=False,
         )
+        self.model_path = model_path
+        self.n_ctx = n_ctx
         self.max_tokens = max_tokens
+        self.timeout = timeout
+        self._embedder = None
+        self.lock = threading.RLock()
     
-    def generate(self, prompt: str, temperature: float = None, stop: list[str] = None) -> str:
+    def embed(self, texts: list[str]) -> np.ndarray:
+        """
+        Embed texts with the model in embedding mode.
+        
+        llama.cpp needs a context created with embedding=True, so a second
+        context is opened on the same GGUF file the first time this is
+        called. The weights are memory-mapped, so they are not loaded twice.
+        
+        Args:
+            texts: Texts to embed (one batch)
+        
+        Returns:
+            float32 array of shape (len(texts), dim)
+        """
+        with self.lock:
+            if self._embedder is None:
+                self._embedder = Llama(
+                    model_path=self.model_path,
+                    n_ctx=self.n_ctx,
+                    embedding=True,
+                    verbose=False,
+                )
+            
+            vectors = []
+            for embedding in self._embedder.embed(list(texts)):
+                vector = np.asarray(embedding, dtype=np.float32)
+                # Models without a pooling layer return one vector per token
+                if vector.ndim == 2:
+                    vector = vector.mean(axis=0)
+                vectors.append(vector)
+            return np.stack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+    
+    def save_state(self) -> LlamaState:
+        """
+        Snapshot the evaluated context (KV cache, tokens and logits).
+        
+        Returns:
+            State that load_state() can put back
+        """
+        with self.lock:
+            return self.llm.save_state()
+    
+    def load_state(self, state: LlamaState):
+        """
+        Put back a context snapshot from save_state().
+        
+        The next prompt that starts with the snapshot's tokens only
+        evaluates what comes after them.
+        
+        Args:
+            state: Snapshot taken from this model with the same n_ctx (its
+                scores may be just the last row, see agent/kv_pager.py)
+        """
+        with self.lock:
+            self.llm.load_state(state)
+    
+    def generate(
+        self,
+        prompt: str,
+        temperature: float = None,
+        stop: list[str] = None,
+        timeout: float | None = None,
+        deadline: Deadline | None = None
+    ) -> str:
         """
         Generate text from a prompt.
         
@@ -54,18 +192,211 @@ class LocalLLM:
             prompt: The input text prompt
             temperature: Optional temperature override
             stop: Optional list of stop sequences
+            timeout: Optional per-call time limit in seconds
+            deadline: Optional shared deadline (e.g. for a whole agent loop)
+            
+        Returns:
+            Generated text as a string (partial if a time limit was hit)
+        """
+        return self.complete(prompt, temperature, stop, timeout, deadline).text
+    
+    def complete(
+        self,
+        prompt: str,
+        temperature: float = None,
+        stop: list[str] = None,
+        timeout: float | None = None,
+        deadline: Deadline | None = None
+    ) -> GenerationResult:
+        """
+        Generate text and report why generation stopped.
+        
+        Without a time limit this is a single blocking call. With one, the
+        output is streamed token by token and decoding is abandoned as soon
+        as the limit passes, returning whatever was produced so far.
+        
+        Args:
+            prompt: The input text prompt
+            temperature: Optional temperature override
+            stop: Optional list of stop sequences
+            timeout: Optional per-call time limit in seconds
+            deadline: Optional shared deadline (e.g. for a whole agent loop)
             
         Returns:
-            Generated text as a string
+            GenerationResult with the text and finish reason
+        """
+        result = self._run(prompt, temperature, stop, timeout, deadline)
+        result.text = result.text.strip()
+        return result
+    
+    def continue_from(
+        self,
+        prompt: str,
+        partial: str,
+        max_tokens: int = 64,
+        stop: list[str] = None,
+        deadline: Deadline | None = None,
+        until: Callable[[str], object] | None = None
+    ) -> GenerationResult:
+        """
+        Continue a generation that stopped early, without starting over.
+        
+        llama.cpp keeps the tokens of the last call in its KV cache and only
+        evaluates the part of a new prompt that differs. Feeding back the
+        original prompt plus the partial output therefore costs only the
+        newly decoded tokens, not a whole new inference.
+        
+        Args:
+            prompt: The prompt of the interrupted generation
+            partial: The (stripped) text it produced
+            max_tokens: Token budget for the continuation
+            stop: Stop sequences (default: end of sequence only, so the
+                continuation is not cut by the same stop that ended the original)
+            deadline: Optional shared deadline
+            until: Optional callback fed each new token; decoding stops once
+                it returns something other than None
+            
+        Returns:
+            GenerationResult with only the new text, unstripped so it can be
+            appended to partial as-is
+        """
+        # complete() strips the space the model emits after the prompt's last word
+        return self._run(
+            f"{prompt} {partial}",
+            temperature=0.0,
+            stop=stop if stop is not None else ["</s>"],
+            deadline=deadline,
+            max_tokens=max_tokens,
+            until=until
+        )
+    
+    def generate_json(
+        self,
+        prompt: str,
+        temperature: float = 0.0,
+        deadline: Deadline | None = None,
+        repair: bool = True,
+        repair_tokens: int = 64
+    ) -> dict | None:
+        """
+        Generate and parse JSON, repairing output that was cut off.
+        
+        Output is streamed into a JsonScanner and decoding stops as soon as
+        the first JSON object closes, so tokens the model would add after the
+        JSON (explanations, a second object) are never generated.
+        
+        When the output opens a JSON value but never closes it (max_tokens
+        or a stop sequence hit mid-object), generation is first continued
+        from where it stopped. If that still doesn't parse, the minimal
+        closing characters are appended. Either way, the caller doesn't have
+        to throw away the partial output and regenerate from scratch.
+        
+        Output cut off by the deadline is not repaired: a half-decoded value
+        would look like a real answer, so the timeout is reported as None.
+        
+        Args:
+            prompt: The input text prompt
+            temperature: Sampling temperature
+            deadline: Optional shared deadline
+            repair: Whether to try to recover truncated JSON
+            repair_tokens: Token budget for the continuation
+            
+        Returns:
+            Parsed JSON, or None if nothing usable was produced before the
+            deadline
+        """
+        # Held across the repair too, so the continuation follows the original in the KV cache
+        with self.lock:
+            scanner = JsonScanner(objects_only=True)
+            result = self._run(prompt, temperature, deadline=deadline, until=scanner.feed)
+            if scanner.done:
+                return scanner.value
+            if result.timed_out:
+                # Whatever was decoded before the deadline is a guess, not an answer
+                return None
+            
+            partial = result.text.strip()
+            parsed = extract_json_from_text(partial)
+            if parsed is not None or not repair or not is_truncated_json(partial):
+                return parsed
+            
+            scanner = JsonScanner(objects_only=True)
+            scanner.feed(partial)
+            continuation = self.continue_from(
+                prompt, partial, max_tokens=repair_tokens, deadline=deadline, until=scanner.feed
+            )
+            if scanner.done:
+                return scanner.value
+            if continuation.timed_out:
+                return None
+            partial += continuation.text
+            parsed = extract_json_from_text(partial)
+            if parsed is not None:
+                return parsed
+            
+            return repair_truncated_json(partial)
+    
+    def _run(
+        self,
+        prompt: str,
+        temperature: float = None,
+        stop: list[str] = None,
+        timeout: float | None = None,
+        deadline: Deadline | None = None,
+        max_tokens: int | None = None,
+        until: Callable[[str], object] | None = None
+    ) -> GenerationResult:
+        """
+        Run one generation and return the raw (unstripped) text.
+        
+        If until is given, the output is streamed into it token by token and
+        decoding stops as soon as it returns something other than None.
         """
         kwargs = {
             "prompt": prompt,
-            "max_tokens": self.max_tokens,
+            "max_tokens": max_tokens if max_tokens is not None else self.max_tokens,
             "stop": stop if stop is not None else ["</s>", "\n\n", "User:", "Assistant:"],
         }
         
         if temperature is not None:
             kwargs["temperature"] = temperature
         
-        response = self.llm(**kwargs)
-        return response["choices"][0]["text"].strip()
\ No newline at end of file
+        # The call stops at whichever comes first: its own timeout or the shared deadline
+        if timeout is None:
+            timeout = self.timeout
+        call_deadline = Deadline(timeout)
+        if deadline is not None and deadline.expires_at is not None:
+            if call_deadline.expires_at is None or deadline.expires_at < call_deadline.expires_at:
+                call_deadline = deadline
+        
+        # One generation at a time: llama.cpp contexts are not thread-safe
+        with self.lock:
+            if call_deadline.expires_at is None and until is None:
+                response = self.llm(**kwargs)
+                choice = response["choices"][0]
+                return GenerationResult(choice["text"], choice.get("finish_reason") or "stop")
+            
+            if call_deadline.expired():
+                return GenerationResult("", "timeout")
+            
+            # Stream so we get control back between tokens and can stop decoding
+            # (on a deadline, or once `until` has seen enough)
+            pieces = []
+            finish_reason = "stop"
+            stream = self.llm(stream=True, **kwargs)
+            try:
+                for chunk in stream:
+                    choice = chunk["choices"][0]
+                    pieces.append(choice["text"])
+                    if choice.get("finish_reason"):
+                        finish_reason = choice["finish_reason"]
+                        break
+                    if until is not None and until(choice["text"]) is not None:
+                        break
+                    if call_deadline.expired():
+                        finish_reason = "timeout"
+                        break
+            finally:
+                stream.close()
+            
+            return GenerationResult("".join(pieces), finish_reason)
\ No newline at end of file
@@ -7,6 +7,8 @@ Nothing clever lives here.
 
 import json
 
+from shared.json_scanner import scan_json
+
 
 def safe_json_parse(text: str) -> dict | None:
     """
@@ -29,6 +31,35 @@ def extract_json_from_text(text: str) -> dict | None:
     Try to extract JSON from text that might have extra content.
     
     This handles cases where the model adds explanations before/after JSON.
+    The single-pass scanner handles almost every real output; the older
+    strategy-by-strategy cleanup only runs when it finds no object first
+    (nothing, or an array such as "[1, 2] then {...}"), so those outputs
+    give the same result as before.
+    
+    Args:
+        text: Text that might contain JSON
+    
+    Returns:
+        Parsed JSON if found, None otherwise
+    """
+    if not text:
+        return None
+    
+    result = scan_json(text)
+    if isinstance(result, dict):
+        return result
+    
+    fallback = _extract_json_heuristics(text)
+    return fallback if fallback is not None else result
+
+
+def _extract_json_heuristics(text: str) -> dict | None:
+    """
+    Extract JSON by trying cleanup strategies one after another.
+    
+    Each strategy re-scans the text, so this is the slow path. It still
+    catches a few things the scanner doesn't (bare scalars, a string that
+    was never closed before the final brace).
     
     Args:
         text: Text that might contain JSON
@@ -110,6 +141,147 @@ def extract_json_from_text(text: str) -> dict | None:
     return None
 
 
+def _scan_open_json(text: str) -> tuple[int, list[str], bool, bool, tuple | None]:
+    """
+    Walk the first JSON value in text and report what is still open.
+    
+    Returns:
+        (start index or -1, stack of unclosed "{"/"[", inside a string?,
+        a key is waiting for its value?, (index, stack) at the last comma)
+    """
+    start = -1
+    for i, char in enumerate(text):
+        if char in '{[':
+            start = i
+            break
+    if start == -1:
+        return -1, [], False, False, None
+    
+    stack = []
+    in_string = False
+    escaped = False
+    expect_key = False
+    dangling_key = False
+    last_comma = None
+    
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+                if expect_key:
+                    dangling_key = True
+                    expect_key = False
+            continue
+        
+        if char == '"':
+            in_string = True
+        elif char in '{[':
+            stack.append(char)
+            expect_key = char == '{'
+        elif char in '}]':
+            if stack:
+                stack.pop()
+            if not stack:
+                # The value is complete - nothing to repair
+                return start, [], False, False, None
+            expect_key = False
+        elif char == ':':
+            dangling_key = False
+        elif char == ',':
+            last_comma = (i, tuple(stack))
+            expect_key = stack[-1] == '{'
+    
+    return start, stack, in_string, dangling_key or (in_string and expect_key), last_comma
+
+
+def is_truncated_json(text: str) -> bool:
+    """
+    Check whether text starts a JSON object/array that was never closed.
+    
+    This is what output cut off by max_tokens or a stop sequence looks like.
+    
+    Args:
+        text: Model output
+        
+    Returns:
+        True if a JSON value was opened but not closed
+    """
+    if not text:
+        return False
+    start, stack, _, _, _ = _scan_open_json(text)
+    return start != -1 and bool(stack)
+
+
+def _close(body: str, stack, dangling_key: bool) -> str:
+    """Append the minimal characters that close an open JSON prefix (outside any string)."""
+    body = body.rstrip()
+    if dangling_key:
+        body += ': null'
+    elif body.endswith(','):
+        body = body[:-1]
+    elif body.endswith(':'):
+        body += ' null'
+    closers = {'{': '}', '[': ']'}
+    return body + "".join(closers[c] for c in reversed(stack))
+
+
+def repair_truncated_json(text: str) -> dict | list | None:
+    """
+    Recover JSON that was cut off by appending the minimal closing tokens.
+    
+    For example '{"reply": "Hi", "mood": "happy", "save_to_memory": "User lik'
+    becomes '{"reply": "Hi", "mood": "happy"}'. A cut inside a string or
+    another literal (like 'tru' or '12.') can't be finished without making
+    up the rest of the value, so the incomplete member is dropped instead.
+    
+    Args:
+        text: Output that is a truncated JSON value (possibly with a prefix)
+        
+    Returns:
+        Parsed JSON if it could be closed, None otherwise
+    """
+    if not text:
+        return None
+    
+    start, stack, in_string, dangling_key, last_comma = _scan_open_json(text)
+    if start == -1 or not stack:
+        return None
+    
+    # '"ana' is not '"analyze"': never close a string the model didn't finish
+    if not in_string:
+        result = safe_json_parse(_close(text[start:], stack, dangling_key))
+        if result is not None:
+            return result
+    
+    # Drop the incomplete last member and close what was open before it
+    if last_comma is not None:
+        comma_index, comma_stack = last_comma
+        return safe_json_parse(_close(text[start:comma_index], comma_stack, False))
+    
+    return None
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Roughly estimate how many tokens a text takes in a prompt.
+    
+    About 4 characters per token for English. Good enough for budgets,
+    and free compared to running the tokenizer.
+    
+    Args:
+        text: Text to measure
+    
+    Returns:
+        Estimated token count (at least 1 for non-empty text)
+    """
+    return (len(text) + 3) // 4
+
+
 def format_messages(messages: list[dict]) -> str:
     """
     Format a list of messages into a readable string.
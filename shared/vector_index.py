@@ -0,0 +1,222 @@
+"""
+VectorIndex - Brute-force cosine similarity search on NumPy.
+
+Vectors live in one contiguous float32 matrix that grows by doubling, so
+adding N vectors costs amortized O(N) copies, and a query is a single
+matrix-vector product over the rows in use.
+
+No approximation, no clever data structures. For tens of thousands of
+vectors this is fast enough and always exact.
+"""
+
+import json
+
+import numpy as np
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """
+    Scale vectors to unit length so a dot product is a cosine similarity.
+    
+    Args:
+        vectors: Array of shape (dim,) or (n, dim)
+    
+    Returns:
+        float32 array of the same shape (zero vectors stay zero)
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class VectorIndex:
+    """
+    Exact top-k cosine search over a growing set of keyed vectors.
+    
+    Usage:
+        index = VectorIndex(dim=768)
+        index.add("a", vector_a)
+        index.search(query_vector, k=3)  # [("a", 0.93), ...]
+    """
+    
+    def __init__(self, dim: int, initial_capacity: int = 64):
+        """
+        Initialize an empty index.
+        
+        Args:
+            dim: Vector dimension
+            initial_capacity: Rows to allocate up front
+        """
+        self.dim = dim
+        self._matrix = np.zeros((max(1, initial_capacity), dim), dtype=np.float32)
+        self._keys: list = []          # Row -> key
+        self._rows: dict = {}          # Key -> row
+    
+    def _reserve(self, needed: int):
+        """Grow the matrix (by doubling) so it holds at least `needed` rows."""
+        capacity = self._matrix.shape[0]
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        grown = np.zeros((capacity, self.dim), dtype=np.float32)
+        grown[:len(self._keys)] = self._matrix[:len(self._keys)]
+        self._matrix = grown
+    
+    def add(self, key, vector):
+        """
+        Add or replace one vector.
+        
+        Args:
+            key: Any hashable identifier
+            vector: Vector of length dim
+        """
+        self.add_many([key], np.asarray(vector, dtype=np.float32).reshape(1, -1))
+    
+    def add_many(self, keys: list, vectors):
+        """
+        Add or replace many vectors in one copy.
+        
+        Args:
+            keys: Identifiers, one per row of vectors
+            vectors: Array of shape (len(keys), dim)
+        """
+        vectors = normalize(np.asarray(vectors, dtype=np.float32).reshape(len(keys), self.dim))
+        new = {}
+        for key, vector in zip(keys, vectors):
+            row = self._rows.get(key)
+            if row is not None:
+                self._matrix[row] = vector
+            else:
+                new[key] = vector
+        
+        if not new:
+            return
+        
+        start = len(self._keys)
+        self._reserve(start + len(new))
+        self._matrix[start:start + len(new)] = list(new.values())
+        for offset, key in enumerate(new):
+            self._rows[key] = start + offset
+            self._keys.append(key)
+    
+    def remove(self, key) -> bool:
+        """
+        Remove a vector by moving the last row into its place.
+        
+        Args:
+            key: Identifier to remove
+        
+        Returns:
+            True if the key was present
+        """
+        row = self._rows.pop(key, None)
+        if row is None:
+            return False
+        
+        last = len(self._keys) - 1
+        if row != last:
+            moved_key = self._keys[last]
+            self._matrix[row] = self._matrix[last]
+            self._keys[row] = moved_key
+            self._rows[moved_key] = row
+        self._keys.pop()
+        return True
+    
+    def search(self, vector, k: int = 5) -> list[tuple]:
+        """
+        Find the k most similar vectors.
+        
+        Args:
+            vector: Query vector of length dim
+            k: Number of results
+        
+        Returns:
+            List of (key, cosine similarity), most similar first
+        """
+        count = len(self._keys)
+        if count == 0 or k <= 0:
+            return []
+        
+        query = normalize(vector)
+        scores = self._matrix[:count] @ query
+        
+        k = min(k, count)
+        if k < count:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(count)
+        top = top[np.argsort(-scores[top])]
+        
+        return [(self._keys[i], float(scores[i])) for i in top]
+    
+    def get(self, key) -> np.ndarray | None:
+        """
+        Get the (unit length) vector stored for a key.
+        
+        Args:
+            key: Identifier to look up
+        
+        Returns:
+            A copy of the vector, or None if the key isn't indexed
+        """
+        row = self._rows.get(key)
+        return self._matrix[row].copy() if row is not None else None
+    
+    def items(self) -> tuple[list, np.ndarray]:
+        """
+        Get every key with its (unit length) vector.
+        
+        Returns:
+            (keys, matrix) where row i of the read-only matrix belongs to keys[i]
+        """
+        view = self._matrix[:len(self._keys)]
+        view.flags.writeable = False
+        return list(self._keys), view
+    
+    def save(self, path: str):
+        """
+        Write the index to a .npz file.
+        
+        Args:
+            path: File to write (keys must be JSON-serializable)
+        """
+        keys, vectors = self.items()
+        np.savez(path, vectors=vectors, keys=np.array(json.dumps(keys)))
+    
+    @classmethod
+    def load(cls, path: str) -> "VectorIndex":
+        """
+        Read an index written by save().
+        
+        Args:
+            path: File to read
+        
+        Returns:
+            The loaded index
+        """
+        with np.load(path) as data:
+            vectors = data["vectors"]
+            keys = json.loads(str(data["keys"]))
+        index = cls(dim=vectors.shape[1], initial_capacity=len(keys))
+        if keys:
+            index.add_many(keys, vectors)
+        return index
+    
+    def clear(self):
+        """Remove all vectors (keeps the allocated matrix)."""
+        self._keys = []
+        self._rows = {}
+    
+    def __contains__(self, key) -> bool:
+        """Check whether a key is indexed."""
+        return key in self._rows
+    
+    def __len__(self) -> int:
+        """Return the number of indexed vectors."""
+        return len(self._keys)
+    
+    def __repr__(self) -> str:
+        """String representation of the index."""
+        return f"VectorIndex({len(self._keys)} vectors, dim={self.dim})"
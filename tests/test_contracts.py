@@ -0,0 +1,52 @@
+"""Tests for contract retries and the AoT graph contract."""
+
+import pytest
+
+pytest.importorskip("llama_cpp")
+
+from agent.contracts import AGENT_ACTION, AOT_GRAPH, generate_validated
+from agent.planner import create_aot_graph
+
+
+class _ScriptedLLM:
+    """Returns scripted JSON responses and records the prompts."""
+    
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.prompts = []
+    
+    def generate_json(self, prompt, deadline=None):
+        self.prompts.append(prompt)
+        return self.responses.pop(0) if self.responses else None
+
+
+def test_retries_end_with_the_prompt_s_own_cue():
+    llm = _ScriptedLLM([{"reason": "no action"}, {"action": "analyze"}])
+    parsed, violation = generate_validated(llm, "Task: x\n\nStep 3:", AGENT_ACTION, cue="Step 3:")
+    
+    assert parsed == {"action": "analyze"} and violation is None
+    assert llm.prompts[1].endswith("That response was rejected: action: required field is missing\n\nStep 3:")
+
+
+def test_retries_default_to_the_json_cue():
+    llm = _ScriptedLLM([None, {"action": "analyze"}])
+    generate_validated(llm, "Response (JSON only):", AGENT_ACTION)
+    
+    assert llm.prompts[1].endswith("\n\nResponse (JSON only):")
+
+
+def test_aot_graph_needs_one_well_formed_node():
+    assert AOT_GRAPH.is_valid({"nodes": [{"id": "1", "action": "a", "depends_on": []}, {"id": "2"}]})
+    assert str(AOT_GRAPH.validate({"nodes": []})) == "nodes: at least one node is required"
+    assert str(AOT_GRAPH.validate({"nodes": [{"id": "1", "action": "a"}]})) == (
+        "nodes[0].depends_on: required field is missing"
+    )
+
+
+def test_create_aot_graph_retries_then_drops_malformed_nodes():
+    good = {"id": "1", "action": "research", "depends_on": []}
+    llm = _ScriptedLLM([{"nodes": [{"id": "1"}]}, {"nodes": [good, {"action": "write"}]}])
+    
+    assert create_aot_graph(llm, "Write a post") == {"nodes": [good]}
+    assert "rejected: nodes[0].action: required field is missing" in llm.prompts[1]
+    assert create_aot_graph(_ScriptedLLM([]), "Write a post") is None
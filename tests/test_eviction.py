@@ -0,0 +1,163 @@
+"""Tests for bounded memory, eviction policies and compaction."""
+
+import pytest
+
+from agent.eviction import ImportancePolicy, LRUPolicy, TTLPolicy
+from agent.memory import Memory
+from agent.sqlite_memory import SQLiteMemory
+
+
+class _Clock:
+    """Manually advanced time source."""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_lru_keeps_recently_used_items():
+    memory = Memory(max_items=3, policy=LRUPolicy(), low_water=1.0)
+    memory.add_many(["alpha fact", "beta fact", "gamma fact"])
+    
+    memory.search("alpha")
+    memory.add("delta fact")
+    
+    assert memory.get_all() == ["alpha fact", "gamma fact", "delta fact"]
+    assert memory.evictions == 1
+
+
+def test_eviction_shrinks_to_low_water():
+    memory = Memory(max_items=10, low_water=0.5)
+    memory.add_many([f"fact {i}" for i in range(11)])
+    
+    assert len(memory) == 5
+    assert memory.get_oldest(1) == ["fact 6"]
+
+
+def test_importance_policy_evicts_least_important():
+    policy = ImportancePolicy(score=lambda item: 1.0 if "name" in item else 0.0)
+    memory = Memory(max_items=2, policy=policy, low_water=1.0)
+    memory.add_many(["User's name is Alice", "It rained", "User likes tea"])
+    
+    assert memory.get_all() == ["User's name is Alice", "User likes tea"]
+
+
+@pytest.mark.parametrize("make_memory", [
+    lambda policy: Memory(max_items=100, policy=policy),
+    lambda policy: SQLiteMemory(":memory:", max_items=100, policy=policy),
+])
+def test_expired_items_are_never_read(make_memory):
+    clock = _Clock()
+    memory = make_memory(TTLPolicy(ttl_seconds=60, clock=clock))
+    memory.add("old dark mode fact")
+    clock.now += 30
+    memory.add("new dark mode fact")
+    clock.now += 40     # Only the first item is past its ttl, and nothing is added
+    
+    assert memory.get_all() == ["new dark mode fact"]
+    assert memory.search("dark") == ["new dark mode fact"]
+    assert memory.select("dark mode") == ["new dark mode fact"]
+    assert list(memory.view()) == ["new dark mode fact"]
+    assert "old dark mode fact" not in memory
+    assert memory.evictions == 1
+
+
+def test_reopened_memory_keeps_item_ages(tmp_path):
+    import sqlite3
+    import time
+    
+    path = str(tmp_path / "memory.db")
+    memory = SQLiteMemory(path)
+    memory.add_many(["old fact", "new fact"])
+    memory.close()
+    with sqlite3.connect(path) as conn:
+        conn.execute("UPDATE memories SET created_at = ? WHERE item = 'old fact'", (time.time() - 120,))
+    
+    reopened = SQLiteMemory(path, max_items=100, policy=TTLPolicy(ttl_seconds=60))
+    assert reopened.get_all() == ["new fact"]
+    assert reopened.evictions == 1
+
+
+def test_set_limits_bounds_existing_memory():
+    memory = Memory()
+    memory.add_many([f"fact {i}" for i in range(20)])
+    memory.set_limits(10)
+    
+    assert len(memory) == 9
+    assert memory.get_recent(1) == ["fact 19"]
+
+
+class _ScriptedLLM:
+    """Returns scripted JSON responses in place of the model."""
+    
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = 0
+    
+    def generate_json(self, prompt, deadline=None):
+        self.calls += 1
+        response = self.responses.pop(0) if self.responses else None
+        return response(prompt) if callable(response) else response
+
+
+def _compactor(llm, clock, lock=None):
+    from agent.compaction import MemoryCompactor
+    memory = Memory()
+    memory.add_many(["User lives in Paris", "User moved to Paris in 2021", "User's flat in Paris is small"])
+    compactor = MemoryCompactor(
+        memory, llm, lock=lock, min_items=3, min_group=3, backoff=10.0, clock=clock
+    )
+    return memory, compactor
+
+
+def test_compactor_merges_related_facts():
+    pytest.importorskip("llama_cpp")
+    llm = _ScriptedLLM([{"summary": "User has lived in a small Paris flat since 2021"}])
+    memory, compactor = _compactor(llm, _Clock())
+    
+    assert compactor.compact_once()
+    assert memory.get_all() == ["User has lived in a small Paris flat since 2021"]
+    assert compactor.get_stats()["merged_facts"] == 3
+
+
+def test_compactor_backs_off_from_a_failing_group():
+    pytest.importorskip("llama_cpp")
+    clock = _Clock()
+    llm = _ScriptedLLM([])
+    memory, compactor = _compactor(llm, clock)
+    
+    assert not compactor.compact_once()
+    calls = llm.calls
+    assert not compactor.compact_once()         # Backing off: the LLM isn't asked again
+    assert llm.calls == calls
+    
+    clock.now += 10
+    assert not compactor.compact_once()         # Retried, failed again: now waits 20s
+    assert llm.calls > calls
+    calls = llm.calls
+    clock.now += 15
+    assert not compactor.compact_once()
+    assert llm.calls == calls
+    assert compactor.get_stats()["failures"] == 2
+
+
+def test_compactor_summarizes_without_the_memory_lock():
+    pytest.importorskip("llama_cpp")
+    import threading
+    
+    lock = threading.Lock()
+    memory = None
+    
+    def summarize(prompt):
+        # Another thread takes the lock and changes the group meanwhile
+        assert lock.acquire(timeout=2), "the memory lock is held while the model runs"
+        memory.remove("User lives in Paris")
+        lock.release()
+        return {"summary": "User has lived in a small Paris flat since 2021"}
+    
+    memory, compactor = _compactor(_ScriptedLLM([summarize]), _Clock(), lock=lock)
+    
+    assert not compactor.compact_once()
+    assert memory.get_all() == ["User moved to Paris in 2021", "User's flat in Paris is small"]
@@ -0,0 +1,96 @@
+"""Tests for the IVF index: recall, background training and save/load."""
+
+import numpy as np
+
+from benchmarks.ann_recall import make_data
+from shared.ivf_index import IVFIndex
+from shared.vector_index import VectorIndex
+
+
+def _recall(index: IVFIndex, exact: VectorIndex, queries: np.ndarray, k: int = 10) -> float:
+    found = 0
+    for query in queries:
+        truth = {key for key, _ in exact.search(query, k)}
+        found += len(truth & {key for key, _ in index.search(query, k)})
+    return found / (k * len(queries))
+
+
+def _same(results: list, expected: list) -> bool:
+    """Same keys in the same order, with scores equal up to float rounding."""
+    return [key for key, _ in results] == [key for key, _ in expected] and np.allclose(
+        [score for _, score in results], [score for _, score in expected], atol=1e-5
+    )
+
+
+def _build(n: int = 4000, **settings) -> tuple[IVFIndex, VectorIndex, np.ndarray]:
+    vectors, queries = make_data(n, 50, dim=32, topics=100)
+    index = IVFIndex(dim=32, **settings)
+    exact = VectorIndex(dim=32)
+    for offset in range(0, n, 500):
+        keys = list(range(offset, offset + 500))
+        index.add_many(keys, vectors[offset:offset + 500])
+        exact.add_many(keys, vectors[offset:offset + 500])
+    return index, exact, queries
+
+
+def test_recall_against_exact_search():
+    index, exact, queries = _build(auto_train=False)
+    index.train()
+    
+    assert index.trained
+    assert _recall(index, exact, queries) >= 0.9
+    assert _same(index.search(queries[0], 10, n_probe=len(index._lists)), exact.search(queries[0], 10))
+
+
+def test_adds_never_wait_for_training():
+    vectors, _ = make_data(1200, 1, dim=32, topics=100)
+    index = IVFIndex(dim=32, train_after=1000)
+    index.add_many(list(range(1000)), vectors[:1000])
+    
+    # Training started, but the add returned before the clustering exists
+    assert index.training and not index.trained
+    assert len(index.search(vectors[0], 5)) == 5
+    
+    # Changes made while it runs are carried over to the new layout
+    index.add_many(list(range(1000, 1200)), vectors[1000:])
+    index.add(0, vectors[1])
+    assert index.remove(5)
+    assert index.finish_training()
+    
+    assert index.trained and len(index) == 1199 and 5 not in index
+    every_cluster = len(index._lists)
+    for key in (1100, 1199):
+        assert index.search(vectors[key], 1, n_probe=every_cluster)[0][0] == key
+    # Key 0 now holds the same vector as key 1
+    assert {key for key, _ in index.search(vectors[1], 2, n_probe=every_cluster)} == {0, 1}
+
+
+def test_without_auto_train_the_index_stays_exact():
+    index, exact, queries = _build(n=1000, train_after=500, auto_train=False)
+    
+    assert index.needs_training and not index.training and not index.trained
+    assert _same(index.search(queries[0], 10), exact.search(queries[0], 10))
+
+
+def test_save_and_load_keep_the_clustering(tmp_path):
+    index, _, queries = _build(auto_train=False)
+    index.train()
+    path = str(tmp_path / "index.npz")
+    index.save(path)
+    
+    loaded = IVFIndex.load(path)
+    assert loaded.trained and len(loaded) == len(index)
+    assert np.array_equal(loaded._centroids, index._centroids)
+    for query in queries[:10]:
+        assert _same(loaded.search(query, 10), index.search(query, 10))
+
+
+def test_clear_abandons_a_running_training():
+    vectors, _ = make_data(1000, 1, dim=32, topics=100)
+    index = IVFIndex(dim=32, train_after=1000)
+    index.add_many(list(range(1000)), vectors)
+    index.clear()
+    
+    assert not index.training and len(index) == 0
+    index.add(1, vectors[1])
+    assert index.search(vectors[1], 1)[0][0] == 1 and not index.trained
@@ -0,0 +1,80 @@
+"""Tests for truncated-JSON repair and generate_json's timeout handling."""
+
+import threading
+
+import pytest
+
+from shared.utils import is_truncated_json, repair_truncated_json
+
+
+def test_closes_open_containers():
+    assert repair_truncated_json('{"calls": [{"tool": "calculator"}') == {"calls": [{"tool": "calculator"}]}
+    assert repair_truncated_json('Here: [1, 2, [3') == [1, 2, [3]]
+
+
+def test_never_closes_a_string_mid_value():
+    assert repair_truncated_json('{"action": "ana') is None
+    assert repair_truncated_json('{"reply": "Hi", "save_to_memory": "User lik') == {"reply": "Hi"}
+    assert repair_truncated_json('["done", "pend') == ["done"]
+
+
+def test_drops_incomplete_literals_and_keys():
+    assert repair_truncated_json('{"ok": true, "count": 12.') == {"ok": True}
+    assert repair_truncated_json('{"ok": true, "cou') == {"ok": True}
+    assert repair_truncated_json('{"ok": true, "count":') == {"ok": True, "count": None}
+
+
+def test_complete_or_missing_json_is_not_repaired():
+    assert repair_truncated_json('{"a": 1}') is None
+    assert repair_truncated_json("no json here") is None
+    assert not is_truncated_json('{"a": 1}')
+    assert is_truncated_json('{"a": [1')
+
+
+class _ScriptedRun:
+    """Stands in for LocalLLM._run, replaying GenerationResults in order."""
+    
+    def __init__(self, results):
+        self.results = list(results)
+    
+    def __call__(self, *args, until=None, **kwargs):
+        result = self.results.pop(0)
+        if until is not None:
+            until(result.text)
+        return result
+
+
+def _scripted_llm(*results):
+    """A LocalLLM (without a loaded model) whose generations are scripted."""
+    from shared.llm import LocalLLM
+    llm = LocalLLM.__new__(LocalLLM)
+    llm.lock = threading.RLock()
+    llm._run = _ScriptedRun(results)
+    return llm
+
+
+def test_generate_json_reports_a_deadline_cut_as_none():
+    pytest.importorskip("llama_cpp")
+    from shared.llm import GenerationResult
+    llm = _scripted_llm(GenerationResult('{"action": "analyze", "reason": "bec', "timeout"))
+    assert llm.generate_json("prompt") is None
+
+
+def test_generate_json_continues_truncated_output():
+    pytest.importorskip("llama_cpp")
+    from shared.llm import GenerationResult
+    llm = _scripted_llm(
+        GenerationResult('{"action": "analyze", "reason": "bec', "length"),
+        GenerationResult('ause"}', "stop"),
+    )
+    assert llm.generate_json("prompt") == {"action": "analyze", "reason": "because"}
+
+
+def test_generate_json_gives_up_when_the_continuation_times_out():
+    pytest.importorskip("llama_cpp")
+    from shared.llm import GenerationResult
+    llm = _scripted_llm(
+        GenerationResult('{"action": "analyze", "reason": "bec', "length"),
+        GenerationResult('ause', "timeout"),
+    )
+    assert llm.generate_json("prompt") is None
@@ -0,0 +1,74 @@
+"""Tests for the incremental JSON scanner against the old cleanup heuristics."""
+
+import random
+import time
+
+import pytest
+
+from benchmarks.json_extraction import CORPUS
+from shared.json_scanner import JsonScanner, scan_json
+from shared.utils import _extract_json_heuristics, extract_json_from_text
+
+# Wrappers models put around JSON; each keeps the old heuristics working
+PREFIXES = ["", "JSON:", "Response: ", "Here's the JSON: ", "```json\n", "```\n"]
+SUFFIXES = ["", "\n```", "\n\nLet me know if you need anything else."]
+
+
+def _stream(text: str, scanner: JsonScanner, size: int):
+    """Feed text in pieces of the given size; return the scanner's value."""
+    for start in range(0, len(text), size):
+        if scanner.feed(text[start:start + size]) is not None:
+            break
+    return scanner.value
+
+
+@pytest.mark.parametrize("name", sorted(CORPUS))
+def test_matches_heuristics_on_the_benchmark_corpus(name):
+    text = CORPUS[name]
+    if name == "two_objects":
+        # The heuristics join both objects and give up; the scanner takes the first
+        assert extract_json_from_text(text) == {"action": "research", "reason": "gather facts"}
+    else:
+        assert extract_json_from_text(text) == _extract_json_heuristics(text)
+
+
+def test_fuzz_agrees_with_heuristics_on_wrapped_objects():
+    rng = random.Random(0)
+    values = [CORPUS[name] for name in ("clean", "tool_call", "brace_in_string", "plan_multiline")]
+    for _ in range(500):
+        fence = rng.choice(PREFIXES)
+        text = fence + rng.choice(values) + (rng.choice(SUFFIXES) if "```" not in fence else "\n```")
+        assert extract_json_from_text(text) == _extract_json_heuristics(text), text
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 1000])
+def test_streaming_gives_the_same_value_as_whole_text(size):
+    for text in CORPUS.values():
+        assert _stream(text, JsonScanner(), size) == scan_json(text)
+
+
+def test_an_object_is_preferred_to_an_earlier_array():
+    text = 'Candidates: [1, 2]. Answer: {"tool": "calculator", "arguments": {}}'
+    expected = {"tool": "calculator", "arguments": {}}
+    
+    assert scan_json(text) == [1, 2]
+    assert scan_json(text, objects_only=True) == expected
+    assert extract_json_from_text(text) == expected
+    assert _stream(text, JsonScanner(objects_only=True), 3) == expected
+    # A bare array is still returned when there is no object
+    assert extract_json_from_text("[1, 2]") == [1, 2]
+
+
+def test_rejected_candidates_are_rescanned_in_place():
+    text = '[see below] ' * 100000 + '{"ok": true}'
+    
+    start = time.perf_counter()
+    assert scan_json(text) == {"ok": True}
+    assert _stream(text, JsonScanner(), 4096) == {"ok": True}
+    assert time.perf_counter() - start < 4.0
+
+
+def test_candidate_split_across_chunks_is_rescanned_after_rejection():
+    scanner = JsonScanner()
+    assert scanner.feed("[not ") is None
+    assert scanner.feed('json {"a": [1]}] tail') == {"a": [1]}
@@ -0,0 +1,107 @@
+"""Tests for paging per-session model state to RAM and disk."""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("llama_cpp")
+
+from llama_cpp import LlamaState
+
+from agent.kv_pager import KVCachePager
+
+VOCAB = 32
+
+
+class _StubModel:
+    """
+    Mimics the parts of llama_cpp.Llama the pager relies on.
+    
+    save_state() returns every logits row up to n_tokens, and load_state()
+    assigns the saved rows into a preallocated (n_ctx, vocab) array, like
+    llama-cpp-python does.
+    """
+    
+    def __init__(self, model_path: str = "model.gguf", n_ctx: int = 64):
+        self.model_path = model_path
+        self.n_ctx = n_ctx
+        self.scores = np.zeros((n_ctx, VOCAB), dtype=np.single)
+        self.input_ids = np.zeros(n_ctx, dtype=np.intc)
+        self.n_tokens = 0
+        self.context = b""
+    
+    def evaluate(self, tokens: list[int], context: bytes):
+        """Pretend to run a prompt through the model."""
+        self.n_tokens = len(tokens)
+        self.input_ids[:self.n_tokens] = tokens
+        self.scores[:self.n_tokens] = np.arange(self.n_tokens * VOCAB, dtype=np.single).reshape(-1, VOCAB)
+        self.context = context
+    
+    def save_state(self) -> LlamaState:
+        """Snapshot like Llama.save_state (one logits row per token)."""
+        return LlamaState(
+            input_ids=self.input_ids.copy(),
+            scores=self.scores[:self.n_tokens].copy(),
+            n_tokens=self.n_tokens,
+            llama_state=self.context,
+            llama_state_size=len(self.context),
+            seed=7,
+        )
+    
+    def load_state(self, state: LlamaState):
+        """Restore like Llama.load_state (assigning into the first n_tokens rows)."""
+        self.scores[:state.n_tokens, :] = state.scores.copy()
+        self.input_ids = state.input_ids.copy()
+        self.n_tokens = state.n_tokens
+        self.context = state.llama_state
+
+
+def _switch(model: _StubModel, pager: KVCachePager, session_id: str, tokens: list[int]):
+    """Run a prompt for one session, then let it go idle."""
+    model.evaluate(tokens, f"kv:{session_id}".encode())
+    pager.save(session_id)
+
+
+def test_restore_puts_back_tokens_context_and_last_logits(tmp_path):
+    model = _StubModel()
+    pager = KVCachePager(model, str(tmp_path))
+    _switch(model, pager, "alice", [1, 2, 3, 4])
+    expected_last = model.scores[3].copy()
+    _switch(model, pager, "bob", [9, 9])
+    
+    assert pager.restore("alice")
+    assert model.n_tokens == 4
+    assert model.context == b"kv:alice"
+    assert list(model.input_ids[:4]) == [1, 2, 3, 4]
+    np.testing.assert_array_equal(model.scores[3], expected_last)
+
+
+def test_saved_states_keep_only_the_last_logits_row(tmp_path):
+    model = _StubModel()
+    pager = KVCachePager(model, str(tmp_path))
+    _switch(model, pager, "alice", list(range(40)))
+    
+    assert pager._ram["alice"].scores.shape == (1, VOCAB)
+
+
+def test_spilled_states_round_trip_through_disk(tmp_path):
+    model = _StubModel()
+    pager = KVCachePager(model, str(tmp_path), max_ram_bytes=0)
+    _switch(model, pager, "alice", [5, 6, 7])
+    expected_last = model.scores[2].copy()
+    _switch(model, pager, "bob", [1])
+    
+    assert len(pager) == 0
+    assert pager.restore("alice")
+    assert pager.get_stats()["disk_hits"] == 1
+    assert model.context == b"kv:alice"
+    np.testing.assert_array_equal(model.scores[2], expected_last)
+
+
+def test_states_from_another_model_are_ignored(tmp_path):
+    model = _StubModel()
+    pager = KVCachePager(model, str(tmp_path), max_ram_bytes=0)
+    _switch(model, pager, "alice", [5, 6, 7])
+    
+    other = KVCachePager(_StubModel(model_path="other.gguf"), str(tmp_path))
+    assert not other.restore("alice")
+    assert not pager.restore("nobody")
@@ -0,0 +1,51 @@
+"""Tests for the cached memory section of the run_with_memory prompt."""
+
+import pytest
+
+pytest.importorskip("llama_cpp")
+
+from agent.agent import Agent
+from agent.eviction import LRUPolicy
+from agent.memory import Memory
+
+
+def _agent(memory: Memory) -> Agent:
+    agent = Agent(llm=object())
+    agent.memory = memory
+    return agent
+
+
+def test_block_is_reused_until_memory_changes():
+    agent = _agent(Memory())
+    agent.memory.add("User prefers dark mode")
+    
+    block = agent._memory_block("dark mode?", 8, 256)
+    assert agent._memory_block("dark mode?", 8, 256) is block
+    
+    agent.memory.add("User likes dark chocolate")
+    assert "chocolate" in agent._memory_block("dark mode?", 8, 256)
+
+
+def test_swapped_in_memory_with_the_same_version_gets_a_fresh_block():
+    agent = _agent(Memory())
+    agent.memory.add("User prefers dark mode")
+    agent._memory_block("dark?", 8, 256)
+    
+    other = Memory()
+    other.add("User prefers dark chocolate")
+    assert other.version == agent.memory.version
+    agent.memory = other
+    
+    assert "chocolate" in agent._memory_block("dark?", 8, 256)
+
+
+def test_reused_blocks_count_as_use_for_eviction():
+    agent = _agent(Memory(max_items=3, policy=LRUPolicy(), low_water=1.0))
+    agent.memory.add_many(["alpha note", "beta note", "gamma note"])
+    
+    agent._memory_block("alpha", 8, 256)
+    agent.memory.search("beta")
+    agent._memory_block("alpha", 8, 256)    # Cached, but alpha is still in use
+    agent.memory.add("delta note")
+    
+    assert agent.memory.get_all() == ["alpha note", "beta note", "delta note"]
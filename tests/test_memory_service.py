@@ -0,0 +1,106 @@
+"""Tests for the multi-tenant memory service."""
+
+import threading
+
+import pytest
+
+from agent.memory_service import MemoryService
+from agent.sqlite_memory import SQLiteMemory
+
+
+def test_tenants_are_isolated():
+    service = MemoryService()
+    service.add("alice", "alice fact")
+    service.add("bob", "bob fact")
+    
+    assert service.get_all("alice") == ["alice fact"]
+    assert service.search("bob", "fact") == ["bob fact"]
+
+
+def test_spilled_tenants_load_back(tmp_path):
+    service = MemoryService(str(tmp_path / "memory.db"), max_resident=1)
+    service.add_many("alice", ["first", "second"])
+    service.add("bob", "bob fact")
+    
+    assert service.get_stats()["resident"] == 1
+    assert service.get_all("alice") == ["first", "second"]
+    assert service.metrics("alice")["loads"] == 1
+    assert service.metrics("alice")["spills"] == 1
+
+
+def test_failed_spill_keeps_the_stored_items(tmp_path):
+    path = str(tmp_path / "memory.db")
+    store = SQLiteMemory(path, namespace="alice")
+    store.add_many(["old one", "old two"])
+    
+    def broken():
+        yield "new one"
+        raise OSError("disk went away")
+    
+    with pytest.raises(OSError):
+        store.replace_all(broken())
+    store.close()
+    
+    assert SQLiteMemory(path, namespace="alice").get_all() == ["old one", "old two"]
+
+
+def test_replace_all_swaps_contents_and_dedupes(tmp_path):
+    store = SQLiteMemory(str(tmp_path / "memory.db"), normalize=True)
+    store.add_many(["old"])
+    store.replace_all(["New fact", "new   FACT", "other"])
+    
+    assert store.get_all() == ["New fact", "other"]
+    assert len(store) == 2
+    assert store.search("other") == ["other"]
+
+
+def test_concurrent_adds_are_not_lost(tmp_path):
+    service = MemoryService(str(tmp_path / "memory.db"), max_resident=2, stripes=4)
+    tenants = [f"tenant{i}" for i in range(5)]
+    
+    def worker(tenant):
+        for n in range(20):
+            service.add(tenant, f"{tenant} fact {n}")
+    
+    threads = [threading.Thread(target=worker, args=(tenant,)) for tenant in tenants]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    for tenant in tenants:
+        assert len(service.get_all(tenant)) == 20
+
+
+def test_each_stripe_reuses_one_connection(tmp_path, monkeypatch):
+    import agent.memory_service
+    
+    opened = []
+    
+    class CountingStore(SQLiteMemory):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            opened.append(self)
+    
+    monkeypatch.setattr(agent.memory_service, "SQLiteMemory", CountingStore)
+    service = MemoryService(str(tmp_path / "memory.db"), max_resident=1, stripes=2)
+    for round_ in range(3):
+        for tenant in ["alice", "bob", "carol", "dave"]:
+            service.add(tenant, f"{tenant} fact {round_}")
+    
+    assert len(opened) <= 2
+    assert service.get_all("alice") == [f"alice fact {n}" for n in range(3)]
+    assert service.metrics("alice")["loads"] == 3
+    service.close()
+
+
+def test_use_namespace_switches_the_store(tmp_path):
+    store = SQLiteMemory(str(tmp_path / "memory.db"), namespace="alice")
+    store.add("alice fact")
+    store.use_namespace("bob")
+    store.add_many(["bob fact", "another bob fact"])
+    
+    assert (store.get_all(), len(store)) == (["bob fact", "another bob fact"], 2)
+    store.use_namespace("alice")
+    assert (store.get_all(), len(store)) == (["alice fact"], 1)
+    store.close()
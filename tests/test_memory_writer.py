@@ -0,0 +1,101 @@
+"""Tests for the background memory writer."""
+
+import threading
+
+import pytest
+
+from agent.memory import Memory
+from agent.memory_writer import MemoryWriteError, MemoryWriter
+
+
+class _FlakyMemory(Memory):
+    """Memory whose add_many fails while `failing` is set."""
+    
+    def __init__(self):
+        super().__init__()
+        self.failing = threading.Event()
+    
+    def add_many(self, items):
+        if self.failing.is_set():
+            raise OSError("disk full")
+        super().add_many(items)
+
+
+def test_writes_are_visible_after_sync():
+    memory = Memory()
+    writer = MemoryWriter(memory, batch_size=4)
+    for i in range(10):
+        writer.put(f"fact {i}")
+    
+    assert writer.sync(timeout=5)
+    writer.close()
+    assert memory.get_all() == [f"fact {i}" for i in range(10)]
+    assert writer.get_stats()["written"] == 10
+
+
+def test_failed_writes_are_raised_once_on_sync():
+    memory = _FlakyMemory()
+    writer = MemoryWriter(memory)
+    memory.failing.set()
+    writer.put("User prefers dark mode")
+    
+    with pytest.raises(MemoryWriteError) as raised:
+        writer.sync(timeout=5)
+    assert raised.value.items == ["User prefers dark mode"]
+    assert isinstance(raised.value.__cause__, OSError)
+    assert "OSError: disk full" in str(raised.value)
+    
+    # Reported once; later writes still work
+    memory.failing.clear()
+    writer.put("User likes tea")
+    assert writer.sync(timeout=5)
+    writer.close()
+    assert memory.get_all() == ["User likes tea"]
+    assert writer.get_stats()["errors"] == 1
+
+
+def test_failures_not_yet_reported_are_raised_on_close():
+    memory = _FlakyMemory()
+    memory.failing.set()
+    writer = MemoryWriter(memory)
+    writer.put("User lives in Paris")
+    
+    with pytest.raises(MemoryWriteError):
+        writer.close()
+
+
+def test_session_switch_completes_before_a_lost_write_is_raised():
+    pytest.importorskip("llama_cpp")
+    from agent.agent import Agent
+    from agent.session import Session
+    
+    agent = Agent(llm=object())
+    alice, bob = Session("alice", memory=_FlakyMemory()), Session("bob")
+    agent.use_session(alice)
+    agent.enable_deferred_memory_writes()
+    alice.memory.failing.set()
+    agent.memory_writer.put("Alice prefers dark mode")
+    
+    with pytest.raises(MemoryWriteError):
+        agent.use_session(bob)
+    assert agent.session is bob and agent.memory_writer.memory is bob.memory
+    agent.memory_writer.close()
+
+
+def test_switching_backends_moves_queued_facts_and_the_writer():
+    pytest.importorskip("llama_cpp")
+    from agent.agent import Agent
+    
+    agent = Agent(llm=object())
+    writer = agent.enable_deferred_memory_writes(batch_size=8)
+    for i in range(20):
+        writer.put(f"fact {i}")
+    
+    memory = agent.enable_persistent_memory(":memory:")
+    assert memory.get_all() == [f"fact {i}" for i in range(20)]
+    assert agent.memory_writer is not writer and agent.memory_writer.memory is memory
+    assert agent.memory_writer.batch_size == 8
+    
+    agent.memory_writer.put("fact after the switch")
+    agent.memory_writer.close()
+    assert memory.get_recent(1) == ["fact after the switch"]
@@ -0,0 +1,78 @@
+"""Tests for the semantic response cache."""
+
+import numpy as np
+import pytest
+
+from agent.response_cache import SemanticCache
+
+# Fixed unit vectors, so similarities are known exactly
+VECTORS = {
+    "reset password": [1.0, 0.0, 0.0],
+    "password reset how": [0.99, 0.141, 0.0],
+    "weather today": [0.0, 1.0, 0.0],
+}
+
+
+def _embed(texts: list[str]) -> np.ndarray:
+    """Look up each text's vector."""
+    return np.array([VECTORS[text] for text in texts], dtype=np.float32)
+
+
+def test_rephrasing_hits_and_other_questions_miss():
+    cache = SemanticCache(_embed, threshold=0.95)
+    cache.store("reset password", "Use the settings page.")
+    
+    assert cache.lookup("Reset   PASSWORD") == "Use the settings page."
+    assert cache.lookup("password reset how") == "Use the settings page."
+    assert cache.lookup("weather today") is None
+    assert (cache.stats.exact_hits, cache.stats.hits, cache.stats.misses) == (1, 2, 1)
+
+
+def test_entries_in_other_scopes_do_not_crowd_out_candidates():
+    cache = SemanticCache(_embed, threshold=0.95, candidates=1)
+    cache.store("password reset how", "Answer for alice", scope="alice")
+    cache.store("reset password", "Answer for bob", scope="bob")
+    
+    # alice's entry is the closest overall, but only bob's can match
+    assert cache.lookup("reset password", scope="bob") == "Answer for bob"
+    assert cache.lookup("password reset how", scope="bob") == "Answer for bob"
+    assert cache.lookup("weather today", scope="alice") is None
+
+
+def test_removing_a_scope_s_last_entry_drops_its_index():
+    cache = SemanticCache(_embed, max_entries=1)
+    cache.store("reset password", "old", scope="memory:1")
+    cache.store("weather today", "sunny", scope="memory:2")
+    
+    assert list(cache._indexes) == ["memory:2"]
+    assert cache.stats.evictions == 1
+
+
+def test_expired_entries_are_skipped(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("agent.response_cache.time.time", lambda: now[0])
+    cache = SemanticCache(_embed, threshold=0.95, ttl_seconds=10)
+    cache.store("reset password", "Use the settings page.")
+    
+    now[0] += 11
+    assert cache.lookup("password reset how") is None
+    assert cache.stats.expirations == 1 and len(cache) == 0
+
+
+def test_fallback_answer_looks_up_the_cache_once():
+    pytest.importorskip("llama_cpp")
+    from agent.agent import Agent
+    
+    class _LLM:
+        embed = staticmethod(_embed)
+        
+        def generate(self, prompt: str) -> str:
+            return "It is sunny."
+    
+    agent = Agent(llm=_LLM())
+    cache = agent.enable_response_cache()
+    agent.run_with_memory = lambda user_input: None
+    
+    assert agent._answer("weather today") == "It is sunny."
+    assert cache.stats.misses == 1
+    assert cache.lookup("weather today", scope="role") == "It is sunny."
@@ -0,0 +1,68 @@
+"""Tests for the fast-path router."""
+
+import pytest
+
+from agent.router import FastPathRouter
+
+
+def _call(a, b, operation: str) -> dict:
+    return {"tool": "calculator", "arguments": {"a": a, "b": b, "operation": operation}}
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("What is 42 * 7?", _call(42, 7, "multiply")),
+    ("calculate 100+50", _call(100, 50, "add")),
+    ("50 minus 25", _call(50, 25, "subtract")),
+    ("9 MULTIPLIED  BY 3", _call(9, 3, "multiply")),
+    ("6 x 7", _call(6, 7, "multiply")),
+    ("3 - -2", _call(3, -2, "subtract")),
+    ("how much is 12 ÷ 4.5?", _call(12, 4.5, "divide")),
+])
+def test_arithmetic_is_routed(text, expected):
+    assert FastPathRouter().route(text) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "0x10",
+    "What is 0x1F?",
+    "2x3",
+    "10plus5",
+    "If I have 15 apples and buy 27 more, how many do I have?",
+    "What is 1 + 2 + 3?",
+    "Tell me a joke",
+])
+def test_ambiguous_or_non_arithmetic_input_misses(text):
+    router = FastPathRouter()
+    assert router.route(text) is None
+    assert router.stats.misses == 1
+
+
+def test_intents_rules_and_unavailable_tools():
+    router = FastPathRouter(tools={"calculator", "reset_session"})
+    router.add_intent("Reset!", {"tool": "reset_session", "arguments": {}})
+    router.add_rule("weather", r"weather in (\w+)", lambda m: {"tool": "weather", "arguments": {"city": m[1]}})
+    
+    assert router.route("  reset ") == {"tool": "reset_session", "arguments": {}}
+    # The weather tool isn't available, so the rule doesn't route
+    assert router.route("weather in Paris") is None
+    assert router.get_stats()["by_route"] == {"intent": 1}
+
+
+def test_evals_ask_the_model_even_for_routable_input():
+    pytest.importorskip("llama_cpp")
+    from agent.evals import AgentEval
+    
+    class _Agent:
+        router = FastPathRouter()
+        
+        def request_tool(self, user_input: str) -> dict | None:
+            # The real agent would answer from the router here
+            assert self.router is None
+            return _call(2, 3, "add")
+    
+    agent = _Agent()
+    router = agent.router
+    suite = AgentEval(agent).test_tool_calls([{"input": "2 + 3", "expected_tool": "calculator"}])
+    
+    assert suite.passed == 1
+    assert agent.router is router
@@ -0,0 +1,60 @@
+"""Tests for SemanticMemory and switching the agent's memory backend."""
+
+import numpy as np
+import pytest
+
+from agent.eviction import LRUPolicy
+from agent.memory import Memory
+from agent.semantic_memory import SemanticMemory
+
+
+def _embed(texts: list[str]) -> np.ndarray:
+    """Bag-of-letters embedding: deterministic and good enough to rank."""
+    vectors = np.zeros((len(texts), 26), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for char in text.lower():
+            if "a" <= char <= "z":
+                vectors[row, ord(char) - ord("a")] += 1
+    return vectors
+
+
+def test_items_are_only_embedded_not_word_indexed():
+    memory = SemanticMemory(_embed)
+    memory.add_many(["User prefers dark mode", "User likes tea"])
+    memory.add("User lives in Paris")
+    
+    assert len(memory._index) == 0
+    assert memory.search("dark mode", top_k=1) == ["User prefers dark mode"]
+    
+    memory.remove("User likes tea")
+    assert len(memory._index) == 0
+    assert "User likes tea" not in memory.search("tea", top_k=3)
+
+
+def test_limits_and_normalize_are_kept():
+    memory = SemanticMemory(_embed, normalize=True, max_items=10, low_water=0.5)
+    memory.add_many([f"fact {i}" for i in range(11)])
+    
+    assert len(memory) == 5
+    memory.add("FACT   10")
+    assert len(memory) == 5
+
+
+def test_switching_backends_carries_settings_over(tmp_path):
+    pytest.importorskip("llama_cpp")
+    from agent.agent import Agent
+    
+    agent = Agent(llm=object())
+    policy = LRUPolicy()
+    agent.memory = Memory(normalize=True, max_items=4, policy=policy, low_water=0.5)
+    agent.memory.add_many(["a one", "b two", "c three"])
+    
+    memory = agent.enable_persistent_memory(str(tmp_path / "memory.db"))
+    assert memory.normalize and memory.max_items == 4 and memory.low_water == 0.5
+    assert memory.policy is policy
+    assert memory.get_all() == ["a one", "b two", "c three"]
+    
+    memory.add("A  ONE")
+    assert len(memory) == 3
+    memory.add_many(["d four", "e five"])
+    assert memory.get_all() == ["d four", "e five"]
@@ -0,0 +1,152 @@
+"""Tests for sessions and the spilling session store."""
+
+import threading
+
+import pytest
+
+from agent.eviction import LRUPolicy
+from agent.memory import Memory
+from agent.session import Session, SessionStore
+
+
+def test_round_trip_keeps_memory_version_and_settings():
+    session = Session("alice", memory=Memory(normalize=True, max_items=10, low_water=0.5))
+    session.memory.add_many(["User prefers dark mode", "User lives in Paris"])
+    session.memory.remove("User lives in Paris")
+    session.add_turn("user", "hi")
+    
+    restored = Session.from_bytes(session.to_bytes())
+    
+    assert restored.memory.get_all() == ["User prefers dark mode"]
+    assert restored.memory.version == session.memory.version
+    assert restored.memory.normalize and "user PREFERS dark mode" in restored.memory
+    assert (restored.memory.max_items, restored.memory.low_water) == (10, 0.5)
+    assert restored.conversation == [{"role": "user", "content": "hi"}]
+
+
+def test_corrupt_data_is_rejected():
+    with pytest.raises(ValueError):
+        Session.from_bytes(b"not a session")
+
+
+def test_spilled_sessions_come_back_from_disk(tmp_path):
+    store = SessionStore(str(tmp_path), max_resident=1)
+    store.get("alice").memory.add("alice fact")
+    store.get("bob")
+    
+    assert len(store) == 1
+    assert store.get("alice").memory.get_all() == ["alice fact"]
+    assert store.get_stats()["spills"] == 2
+    assert store.get_stats()["loads"] == 1
+
+
+def test_sessions_in_use_are_not_spilled(tmp_path):
+    store = SessionStore(str(tmp_path), max_resident=1)
+    with store.session("alice") as alice:
+        store.get("bob")
+        store.get("carol")
+        assert store.get("alice") is alice
+    assert len(store) == 1
+
+
+def test_memory_factory_is_used_for_new_and_rehydrated_sessions(tmp_path):
+    factory = lambda: Memory(max_items=100, policy=LRUPolicy())
+    store = SessionStore(str(tmp_path), max_resident=1, memory_factory=factory)
+    store.get("alice").memory.add("alice fact")
+    store.get("bob")
+    
+    alice = store.get("alice")
+    assert isinstance(alice.memory.policy, LRUPolicy)
+    assert alice.memory.get_all() == ["alice fact"]
+
+
+def test_session_requested_during_its_spill_comes_back_from_ram(tmp_path):
+    store = SessionStore(str(tmp_path), max_resident=1)
+    alice = store.get("alice")
+    alice.memory.add("alice fact")
+    
+    writing, release = threading.Event(), threading.Event()
+    write = store._write
+    
+    def slow_write(session_id, data):
+        if session_id == "alice":
+            writing.set()
+            release.wait(5)
+        write(session_id, data)
+    
+    store._write = slow_write
+    spiller = threading.Thread(target=store.get, args=("bob",))
+    spiller.start()
+    assert writing.wait(5)
+    
+    # The store lock is free while the file is written
+    assert store.get("alice") is alice
+    release.set()
+    spiller.join(5)
+    store._write = write
+    
+    assert store.get("alice") is alice
+    assert store.get_stats()["loads"] == 0
+
+
+def test_a_session_that_fails_to_serialize_stays_in_ram(tmp_path):
+    store = SessionStore(str(tmp_path), max_resident=1)
+    alice = store.get("alice")
+    
+    def broken():
+        raise TypeError("unmarshallable object")
+    
+    alice.to_bytes = broken
+    with pytest.raises(TypeError):
+        store.get("bob")
+    assert store.get_stats()["spills"] == 0
+    assert store.get("alice") is alice
+
+
+def test_a_session_that_fails_to_write_stays_in_ram(tmp_path):
+    store = SessionStore(str(tmp_path), max_resident=1)
+    alice = store.get("alice")
+    alice.memory.add("alice fact")
+    write = store._write
+    
+    def full_disk(session_id, data):
+        raise OSError("No space left on device")
+    
+    store._write = full_disk
+    with pytest.raises(OSError):
+        store.get("bob")
+    store._write = write
+    
+    assert store.get_stats()["spills"] == 0
+    assert store.get("alice") is alice       # Back in RAM, not lost or stuck half-spilled
+    store.get("bob")
+    assert store.get_stats()["spills"] == 2  # And spilled normally once the disk recovers
+    assert store.get("alice").memory.get_all() == ["alice fact"]
+
+
+def test_delete_removes_the_spill_file(tmp_path):
+    store = SessionStore(str(tmp_path), max_resident=1)
+    store.get("alice").memory.add("alice fact")
+    store.get("bob")
+    store.delete("alice")
+    
+    assert store.get("alice").memory.get_all() == []
+
+
+def test_use_session_moves_the_deferred_writer_to_the_session_memory():
+    pytest.importorskip("llama_cpp")
+    from agent.agent import Agent
+    
+    agent = Agent(llm=object())
+    writer = agent.enable_deferred_memory_writes(batch_size=4)
+    writer.put("agent fact")
+    session = Session("alice")
+    
+    agent.use_session(session)
+    
+    assert agent.memory.get_all() == []
+    assert "agent fact" in writer.memory
+    assert agent.memory_writer is not writer
+    assert agent.memory_writer.memory is session.memory
+    assert agent.memory_writer.batch_size == 4
+    agent.memory_writer.close()
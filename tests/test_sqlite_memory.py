@@ -0,0 +1,73 @@
+"""Tests for the SQLite-backed memory store."""
+
+from agent.eviction import LRUPolicy
+from agent.sqlite_memory import SQLiteMemory
+
+
+def test_items_persist_across_connections(tmp_path):
+    path = str(tmp_path / "memory.db")
+    memory = SQLiteMemory(path, namespace="alice")
+    memory.add_many(["User prefers dark mode", "User lives in Paris"])
+    memory.close()
+    
+    reopened = SQLiteMemory(path, namespace="alice")
+    assert reopened.get_all() == ["User prefers dark mode", "User lives in Paris"]
+    assert len(SQLiteMemory(path, namespace="bob")) == 0
+
+
+def test_search_returns_matching_items():
+    memory = SQLiteMemory(":memory:")
+    memory.add_many(["User prefers dark mode", "User lives in Paris"])
+    
+    assert memory.search("dark") == ["User prefers dark mode"]
+    assert memory.search("nothing here") == []
+
+
+def test_set_limits_evicts_existing_items():
+    memory = SQLiteMemory(":memory:")
+    memory.add_many([f"fact {i}" for i in range(10)])
+    
+    memory.set_limits(5)
+    assert len(memory) == 4     # Shrunk to low water (0.9 * 5)
+    assert memory.get_all() == ["fact 6", "fact 7", "fact 8", "fact 9"]
+    
+    memory.add("fact 10")
+    memory.add("fact 11")
+    assert len(memory) == 4
+    assert memory.evictions == 8
+
+
+def test_search_counts_as_use_for_lru():
+    memory = SQLiteMemory(":memory:", max_items=3, policy=LRUPolicy(), low_water=1.0)
+    memory.add_many(["alpha note", "beta note", "gamma note"])
+    
+    memory.search("alpha")
+    memory.add("delta note")
+    
+    assert "alpha note" in memory
+    assert "beta note" not in memory
+    assert len(memory) == 3
+
+
+def test_limits_apply_to_items_already_in_the_file(tmp_path):
+    path = str(tmp_path / "memory.db")
+    memory = SQLiteMemory(path)
+    memory.add_many([f"fact {i}" for i in range(5)])
+    memory.close()
+    
+    bounded = SQLiteMemory(path, max_items=2, low_water=1.0)
+    assert bounded.get_all() == ["fact 3", "fact 4"]
+
+
+def test_remove_and_clear_update_the_policy():
+    memory = SQLiteMemory(":memory:", max_items=2, low_water=1.0)
+    memory.add_many(["one", "two"])
+    
+    assert memory.remove("one")
+    assert not memory.remove("one")
+    memory.add("three")
+    assert memory.get_all() == ["two", "three"]
+    
+    memory.clear()
+    memory.add_many(["four", "five"])
+    assert memory.get_all() == ["four", "five"]
@@ -0,0 +1,204 @@
+"""Tests for agent state checkpoints and resuming runs."""
+
+import time
+
+import pytest
+
+from agent.state import AgentState
+
+
+def _state() -> AgentState:
+    state = AgentState()
+    state.task = "Summarize the report"
+    state.mode = "loop"
+    state.results = [{"action": "analyze", "reason": "first"}]
+    state.increment_step()
+    return state
+
+
+def test_checkpoint_round_trip(tmp_path):
+    path = str(tmp_path / "state.ckpt")
+    _state().save(path)
+    
+    restored = AgentState.load(path)
+    assert restored.to_dict() == _state().to_dict()
+    assert not (tmp_path / "state.ckpt.tmp").exists()
+
+
+def test_results_marshal_cannot_write_are_saved_as_plain_data(tmp_path):
+    from agent.tools import ToolResult
+    
+    class Point:
+        def __repr__(self):
+            return "Point(1, 2)"
+    
+    state = _state()
+    state.results = [{"node_id": "1", "result": Point()}, ToolResult("calc", {"x": 1}, result={3, 4})]
+    path = str(tmp_path / "state.ckpt")
+    state.save(path)
+    
+    assert AgentState.load(path).results == [
+        {"node_id": "1", "result": "Point(1, 2)"},
+        {"tool": "calc", "arguments": {"x": 1}, "result": [3, 4], "error": None, "cached": False},
+    ]
+
+
+def test_corrupt_checkpoints_are_rejected():
+    with pytest.raises(ValueError):
+        AgentState.from_bytes(b"garbage")
+
+
+class _ScriptedLLM:
+    """Returns scripted JSON responses in place of the model."""
+    
+    def __init__(self, responses, slow_delay=0.0):
+        self.responses = list(responses)
+        self.slow_delay = slow_delay
+    
+    def generate_json(self, prompt, deadline=None):
+        return self.responses.pop(0) if self.responses else None
+    
+    def complete(self, prompt, deadline=None):
+        from shared.llm import GenerationResult
+        if "Step: slow" in prompt:
+            time.sleep(self.slow_delay)
+        if deadline is not None and deadline.expired():
+            return GenerationResult(" partial", finish_reason="timeout")
+        return GenerationResult(" step result ")
+
+
+def _agent(responses, checkpoint_path, slow_delay=0.0):
+    pytest.importorskip("llama_cpp")
+    from agent.agent import Agent
+    agent = Agent(llm=_ScriptedLLM(responses, slow_delay))
+    agent.enable_checkpoints(str(checkpoint_path))
+    return agent
+
+
+def test_resume_loop_continues_after_the_last_checkpoint(tmp_path):
+    path = tmp_path / "state.ckpt"
+    agent = _agent([{"action": "analyze", "reason": "a"}], path)
+    assert len(agent.run_loop("task", max_steps=3)) == 1   # Scripted model "crashes" after one step
+    
+    resumed = _agent([{"action": "done", "reason": "b"}], path)
+    results = resumed.resume_loop(max_steps=3)
+    assert [result["action"] for result in results] == ["analyze", "done"]
+    assert resumed.state.task == "task"
+
+
+def test_new_run_clears_the_previous_checkpoint(tmp_path):
+    path = tmp_path / "state.ckpt"
+    agent = _agent([{"action": "analyze", "reason": "a"}], path)
+    agent.run_loop("old task", max_steps=3)
+    assert path.exists()
+    
+    # The new task dies before its first step completes
+    agent.run_loop("new task", max_steps=3)
+    assert not path.exists()
+    assert _agent([], path).resume_loop() == []
+
+
+def test_graph_runs_leave_loop_state_alone(tmp_path):
+    agent = _agent([{"action": "analyze", "reason": "a"}, {"action": "done", "reason": "b"}], tmp_path / "state.ckpt")
+    agent.run_loop("task", max_steps=3)
+    steps, done = agent.state.steps, agent.state.done
+    
+    graph = {"nodes": [{"id": "1", "action": "research", "depends_on": []}]}
+    results = agent.execute_aot_plan(graph)
+    
+    assert [result["node_id"] for result in results] == ["1"]
+    assert (agent.state.steps, agent.state.done) == (steps, done)
+    assert agent.state.results == results
+
+
+def test_graph_nodes_run_tools_or_generate(tmp_path):
+    from agent.tools import ToolRegistry
+    
+    agent = _agent([{"action": "double", "inputs": {"x": 21}}, {"action": "write_summary"}], tmp_path / "state.ckpt")
+    agent.tools = ToolRegistry()
+    agent.tools.register(lambda x: 2 * x, name="double")
+    
+    graph = {"nodes": [
+        {"id": "1", "action": "Double 21", "depends_on": []},
+        {"id": "2", "action": "Summarize the result", "depends_on": ["1"]},
+    ]}
+    results = agent.execute_aot_plan(graph)
+    
+    assert [result["result"] for result in results] == [42, "step result"]
+    assert all(result["success"] for result in results)
+
+
+_CHAIN = {"nodes": [
+    {"id": "1", "action": "fast", "depends_on": []},
+    {"id": "2", "action": "slow", "depends_on": ["1"]},
+    {"id": "3", "action": "last", "depends_on": ["2"]},
+]}
+
+
+def test_a_node_cut_off_by_the_deadline_is_not_completed():
+    pytest.importorskip("llama_cpp")
+    from agent.planner import execute_graph
+    from shared.llm import Deadline
+    
+    deadline = Deadline(0.05)
+    recorded = []
+    
+    def executor(action):
+        if action == "slow":
+            time.sleep(0.1)
+            raise TimeoutError("Deadline exceeded during execution")
+        return action
+    
+    results = execute_graph(_CHAIN, executor, deadline=deadline, on_result=recorded.append)
+    
+    assert [result["node_id"] for result in recorded] == ["1"]
+    assert [(result["node_id"], result.get("timed_out", False)) for result in results] == [
+        ("1", False), ("2", True), ("3", True)
+    ]
+    assert results[1]["error"] == "Deadline exceeded during execution"
+
+
+def test_timeouts_before_the_deadline_are_ordinary_failures():
+    pytest.importorskip("llama_cpp")
+    from agent.planner import execute_graph
+    from shared.llm import Deadline
+    
+    def executor(action):
+        if action == "slow":
+            raise TimeoutError("tool timed out")
+        return action
+    
+    results = execute_graph(_CHAIN, executor, deadline=Deadline(60))
+    
+    assert [result["success"] for result in results] == [True, False, True]
+    assert not any(result.get("timed_out") for result in results)
+
+
+def test_resume_reruns_the_node_the_deadline_cut_off(tmp_path):
+    path = tmp_path / "state.ckpt"
+    agent = _agent([], path, slow_delay=0.2)
+    results = agent.execute_aot_plan(_CHAIN, timeout=0.1)
+    
+    assert [result.get("timed_out", False) for result in results] == [False, True, True]
+    assert agent.state.timed_out
+    assert [result["node_id"] for result in AgentState.load(str(path)).results] == ["1"]
+    
+    resumed = _agent([], path)
+    results = resumed.resume_aot_plan()
+    assert [(result["node_id"], result["success"]) for result in results] == [
+        ("1", True), ("2", True), ("3", True)
+    ]
+
+
+def test_graph_nodes_returning_objects_are_checkpointed(tmp_path):
+    from agent.tools import ToolRegistry
+    
+    path = tmp_path / "state.ckpt"
+    agent = _agent([{"action": "locate", "inputs": {}}], path)
+    agent.tools = ToolRegistry()
+    agent.tools.register(lambda: object(), name="locate")
+    
+    results = agent.execute_aot_plan({"nodes": [{"id": "1", "action": "Locate it", "depends_on": []}]})
+    
+    assert results[0]["success"]
+    assert AgentState.load(str(path)).results[0]["result"].startswith("<object object")
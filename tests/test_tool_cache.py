@@ -0,0 +1,126 @@
+"""Tests for the tool result cache and how the registry uses it."""
+
+import pytest
+
+from agent.telemetry import Telemetry
+from agent.tool_cache import ToolCache
+from agent.tools import ToolRegistry
+
+
+class _Clock:
+    """Manual time source."""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self) -> float:
+        return self.now
+
+
+def _registry() -> tuple[ToolRegistry, list]:
+    """A registry with a pure tool, a ttl tool and a failing tool; returns (registry, call log)."""
+    calls = []
+    registry = ToolRegistry()
+    
+    def add(a: int, b: int = 1) -> int:
+        """Add two numbers."""
+        calls.append(("add", a, b))
+        return a + b
+    
+    def price(item: str) -> float:
+        """Look up a price."""
+        calls.append(("price", item))
+        return 9.5
+    
+    def fail(reason: str) -> str:
+        """Always fail."""
+        raise RuntimeError(reason)
+    
+    registry.register(add, pure=True)
+    registry.register(price, ttl=60)
+    registry.register(fail)
+    return registry, calls
+
+
+def test_lru_evicts_the_least_recently_used_entry():
+    cache = ToolCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == (True, 1)
+    cache.put("c", 3)
+    
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1) and cache.get("c") == (True, 3)
+    assert cache.stats.evictions == 1
+
+
+def test_entries_expire_after_their_ttl():
+    clock = _Clock()
+    cache = ToolCache(clock=clock)
+    cache.put("a", 1, ttl=10)
+    
+    clock.now = 9.9
+    assert cache.get("a") == (True, 1)
+    clock.now = 10.0
+    assert cache.get("a") == (False, None)
+    assert cache.stats.expirations == 1 and len(cache) == 0
+
+
+def test_pure_calls_share_an_entry_once_defaults_are_filled_in():
+    registry, calls = _registry()
+    
+    assert registry.execute("add", {"a": 1}) == 2
+    assert registry.execute("add", {"b": 1, "a": 1}) == 2
+    assert calls == [("add", 1, 1)]
+    
+    [result] = registry.execute_many([{"tool": "add", "arguments": {"a": 1, "b": 1}}])
+    assert result.cached and result.result == 2
+
+
+def test_ttl_calls_are_cached_and_bad_calls_are_not():
+    registry, calls = _registry()
+    
+    registry.execute("price", {"item": "tea"})
+    registry.execute("price", {"item": "tea"})
+    assert calls == [("price", "tea")]
+    
+    with pytest.raises(TypeError):
+        registry.execute("add", {"c": 1})
+    assert len(registry.cache) == 1
+
+
+def test_reregistering_a_tool_drops_cached_results():
+    registry, calls = _registry()
+    registry.execute("add", {"a": 1})
+    registry.register(lambda a, b=1: a - b, name="add", pure=True)
+    
+    assert registry.execute("add", {"a": 1}) == 0
+
+
+def test_telemetry_logs_hits_and_errors_in_one_format():
+    registry, _ = _registry()
+    telemetry = registry.telemetry = Telemetry(log_file=None)
+    
+    registry.execute("add", {"a": 1})
+    registry.execute("add", {"a": 1})
+    with pytest.raises(RuntimeError):
+        registry.execute("fail", {"reason": "boom"})
+    [result] = registry.execute_many([{"tool": "fail", "arguments": {"reason": "boom"}}])
+    
+    spans = telemetry.get_recent_spans(4)
+    assert [span["data"]["cached"] for span in spans] == [False, True, False, False]
+    assert spans[2]["error"] == spans[3]["error"] == result.error == "RuntimeError: boom"
+    assert telemetry.metrics.tool_cache_hits == 1 and telemetry.metrics.tool_failures == 2
+
+
+def test_agent_telemetry_reaches_its_registry():
+    pytest.importorskip("llama_cpp")
+    from agent.agent import Agent
+    
+    agent = Agent(llm=object())
+    agent.tools, _ = _registry()
+    telemetry = agent.enable_telemetry(Telemetry(log_file=None))
+    
+    agent.execute_tool_call({"tool": "add", "arguments": {"a": 2}})
+    assert agent.tools.telemetry is telemetry
+    assert telemetry.metrics.tool_calls == 1
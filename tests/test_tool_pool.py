@@ -0,0 +1,123 @@
+"""Tests for running tools in the process pool."""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from agent.tool_pool import ToolProcessPool, ToolResultTooLarge, ToolTimeoutError
+
+
+# Tools run in worker processes, so they must be module-level functions
+def _add(a: int, b: int) -> int:
+    return a + b
+
+
+def _sleep(seconds: float) -> float:
+    time.sleep(seconds)
+    return seconds
+
+
+def _text(n: int) -> str:
+    return "x" * n
+
+
+def _pid_then_sleep(path: str, seconds: float) -> float:
+    with open(path, "w") as f:
+        f.write(str(os.getpid()))
+    time.sleep(seconds)
+    return seconds
+
+
+_SET_IN_PARENT = False
+
+
+def _set_in_parent() -> bool:
+    return _SET_IN_PARENT
+
+
+@pytest.fixture
+def pool():
+    pool = ToolProcessPool(max_workers=1, default_timeout=1.0, max_result_bytes=1000)
+    yield pool
+    pool.close()
+
+
+def test_runs_tools_in_a_worker(pool):
+    assert pool.run("add", _add, {"a": 2, "b": 3}) == 5
+    assert pool.get_stats()["calls"] == 1
+
+
+def test_timeout_raises_and_restarts_the_pool(pool):
+    with pytest.raises(ToolTimeoutError):
+        pool.run("sleep", _sleep, {"seconds": 5}, timeout=0.2)
+    assert pool.get_stats()["timeouts"] == 1
+    assert pool.get_stats()["restarts"] == 1
+    
+    # The restarted pool still works
+    assert pool.run("add", _add, {"a": 1, "b": 1}) == 2
+
+
+def test_time_spent_queued_does_not_count_toward_the_timeout(pool):
+    with ThreadPoolExecutor(max_workers=2) as threads:
+        futures = [threads.submit(pool.run, "sleep", _sleep, {"seconds": 0.6}) for _ in range(2)]
+        assert [future.result() for future in futures] == [0.6, 0.6]
+    
+    stats = pool.get_stats()
+    assert (stats["calls"], stats["timeouts"], stats["restarts"]) == (2, 0, 0)
+
+
+def test_large_results_are_rejected(pool):
+    with pytest.raises(ToolResultTooLarge):
+        pool.run("text", _text, {"n": 10_000})
+    assert pool.get_stats()["too_large"] == 1
+    assert pool.run("text", _text, {"n": 10}) == "x" * 10
+
+
+def _running(pid: int) -> bool:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            return "zombie" not in f.read()
+    except FileNotFoundError:
+        return False
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc"), reason="reads worker status from /proc")
+def test_a_timed_out_worker_is_killed(pool, tmp_path):
+    path = str(tmp_path / "pid")
+    with pytest.raises(ToolTimeoutError):
+        pool.run("sleep", _pid_then_sleep, {"path": path, "seconds": 30}, timeout=0.5)
+    
+    with open(path) as f:
+        pid = int(f.read())
+    deadline = time.monotonic() + 5
+    while _running(pid) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not _running(pid)
+
+
+def test_changing_max_concurrent_replaces_the_limit():
+    pool = ToolProcessPool(max_workers=2, default_timeout=5.0)
+    try:
+        assert pool.run("sleep", _sleep, {"seconds": 0.1}, max_concurrent=1) == 0.1
+        
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=2) as threads:
+            futures = [threads.submit(pool.run, "sleep", _sleep, {"seconds": 0.5}, max_concurrent=2) for _ in range(2)]
+            assert [future.result() for future in futures] == [0.5, 0.5]
+        assert time.monotonic() - start < 0.9     # Both ran at once, not one after the other
+    finally:
+        pool.close()
+
+
+def test_workers_are_not_forked_from_the_agent_process():
+    global _SET_IN_PARENT
+    _SET_IN_PARENT = True
+    pool = ToolProcessPool(max_workers=1)
+    try:
+        # A forked worker would have inherited the parent's changed global
+        assert pool.run("probe", _set_in_parent, {}) is False
+    finally:
+        pool.close()
+        _SET_IN_PARENT = False
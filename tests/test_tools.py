@@ -0,0 +1,76 @@
+"""Tests for running tool calls through the registry and the agent."""
+
+import pytest
+
+from agent.tools import ToolRegistry
+
+
+def _registry() -> ToolRegistry:
+    """A registry with one plain and one async tool."""
+    registry = ToolRegistry(max_workers=2)
+    
+    def double(x: int) -> int:
+        """Double a number."""
+        return 2 * x
+    
+    async def negate(x: int) -> int:
+        """Negate a number."""
+        return -x
+    
+    registry.register(double)
+    registry.register(negate)
+    return registry
+
+
+def test_execute_many_keeps_order_and_reports_unknown_tools():
+    registry = _registry()
+    results = registry.execute_many([
+        {"tool": "double", "arguments": {"x": 1}},
+        {"tool": "negate", "arguments": {"x": 2}},
+        {"tool": "missing", "arguments": {}},
+        {"tool": "double", "arguments": {"x": 3}},
+    ])
+    registry.close()
+    
+    assert [result.result for result in results] == [2, -2, None, 6]
+    assert results[2].error == "Unknown tool: missing"
+
+
+def test_close_stops_the_threads_and_the_registry_still_works():
+    registry = _registry()
+    calls = [{"tool": "double", "arguments": {"x": x}} for x in range(4)]
+    registry.execute_many(calls)
+    threads = list(registry._pool._threads)
+    assert threads
+    
+    registry.close()
+    assert not any(thread.is_alive() for thread in threads)
+    assert [result.result for result in registry.execute_many(calls)] == [0, 2, 4, 6]
+    registry.close()
+
+
+def test_run_with_tools_asks_through_request_tool_calls():
+    pytest.importorskip("llama_cpp")
+    from agent.agent import Agent
+    
+    prompts = []
+    
+    class _LLM:
+        def generate(self, prompt: str) -> str:
+            prompts.append(prompt)
+            return "2 doubled is 4."
+    
+    agent = Agent(llm=_LLM())
+    agent.tools = _registry()
+    requested = []
+    
+    def request_tool_calls(user_input: str) -> list[dict]:
+        requested.append(user_input)
+        return [{"tool": "double", "arguments": {"x": 2}}]
+    
+    agent.request_tool_calls = request_tool_calls
+    assert agent.run_with_tools("Double 2") == "2 doubled is 4."
+    agent.tools.close()
+    
+    assert requested == ["Double 2"]
+    assert "1. double({\"x\": 2}) -> 4" in prompts[0]